@@ -11,6 +11,7 @@ from PIL import Image, ImageTk
 from pdf2image import convert_from_path
 import json
 import sys
+import time
 from pathlib import Path
 
 # Add the src directory to the Python path
@@ -19,19 +20,49 @@ if src_path not in sys.path:
     sys.path.append(src_path)
 
 # Assuming other necessary imports from your project are here
-from core.processor import get_image_data, extract_json_data
-from utils.db_manager import save_to_sqlite_db, clear_db_data, browse_db_data, CREATE_TABLE_QUERY
-import pandas as pd
+from core.processor import get_image_data, extract_json_data, RunSummary
+from core.cancellation import CancellationToken
+from core.scheduling import DEFAULT_DISPATCH_ORDER, DISPATCH_ORDERS
+from core.exporter import FileExporter, find_resumable_export, new_export_dir
+from core.data_exporter import available_formats, export_records
+from core.reports import ReportEngine, format_report, REPORT_TYPES, AMOUNT_EXPR
+from core.snapshot import ColumnarSnapshot
+from core.normalizer import normalize_amount, parse_date, backfill_normalized_columns
+from utils.job_queue import JobQueue
+from utils import metrics
+from utils.metrics import ThroughputMeter, format_duration
+from utils.db_manager import save_to_sqlite_db, clear_db_data, browse_db_data, delete_records, cast_amount, ensure_schema, CREATE_TABLE_QUERY
+from utils.db_manager import backfill_tag_index, category_name, filter_choices, parse_tags
+from utils.db_manager import DEFAULT_PAGE_SIZE, DEFAULT_SORT, RECORD_COLUMNS, fetch_records_page, record_filter
+from utils.db_manager import bulk_edit_records, update_record
 import shutil
 import subprocess
-from utils.logger import setup_logger
+from utils.logger import setup_logger, get_logger, add_log_sink
+from utils.archives import is_member_path, local_file, path_exists, read_bytes, split_member_path
+from utils.blob_store import BlobStore, DEFAULT_BLOB_STORE_DIR
+import io
+
+# How often the live metrics strip is redrawn while an analysis runs.
+LIVE_STATS_INTERVAL_MS = 500
+# The log view is appended to once per tick and keeps only the newest lines.
+LOG_VIEW_INTERVAL_MS = 200
+LOG_VIEW_MAX_LINES = 2000
+LOG_VIEW_MAX_BATCH = 500
+# First entries of the data panel's filter controls, meaning "no filter".
+ALL_CATEGORIES_LABEL = "All categories"
+ALL_TAGS_LABEL = "All tags"
+# Records table columns whose header sorts by the given key (see SORT_COLUMNS).
+SORTABLE_HEADINGS = {"Amount": "amount", "Date": "date", "Category": "category"}
+# The next page of records is loaded once the view is scrolled this far down.
+PAGE_PREFETCH_FRACTION = 0.9
 
 try:
     import openpyxl
 except ImportError:
     messagebox.showerror("Error", "The openpyxl module is required to export data to XLSX. Please install it using 'pip install openpyxl'.")
 
-# Custom logger handler that redirects log messages to the UI
+# Custom logger handler that redirects log messages to the UI. It is fed by the
+# logging listener thread, so formatting here stays off the caller's thread.
 class QueueHandler(logging.Handler):
     def __init__(self, log_queue):
         super().__init__()
@@ -47,7 +78,7 @@ class SettingsWindow(ctk.CTkToplevel):
     def __init__(self, parent):
         super().__init__(parent.root)
         self.title("⚙️ Application Settings")
-        self.geometry("650x400")
+        self.geometry("650x620")
         self.transient(parent.root)
         self.grab_set()  # Make window modal
         
@@ -60,8 +91,8 @@ class SettingsWindow(ctk.CTkToplevel):
         # Center the window
         self.update_idletasks()
         x = (self.winfo_screenwidth() // 2) - (650 // 2)
-        y = (self.winfo_screenheight() // 2) - (400 // 2)
-        self.geometry(f"650x400+{x}+{y}")
+        y = (self.winfo_screenheight() // 2) - (620 // 2)
+        self.geometry(f"650x620+{x}+{y}")
         
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
@@ -165,10 +196,66 @@ class SettingsWindow(ctk.CTkToplevel):
             font=ctk.CTkFont(size=11, weight="bold")
         )
         browse_db_btn.grid(row=2, column=2, padx=(10, 20), pady=(0, 20))
+
+        self.store_receipts_var = tk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            db_section,
+            text=f"Keep one copy of each receipt in the content store ({DEFAULT_BLOB_STORE_DIR})",
+            variable=self.store_receipts_var,
+            font=ctk.CTkFont(size=11)
+        ).grid(row=3, column=0, columnspan=3, padx=20, pady=(0, 10), sticky="w")
+
+        self.columnar_cache_var = tk.BooleanVar(value=True)
+        ctk.CTkCheckBox(
+            db_section,
+            text="Keep an in-memory column cache for instant stats and reports",
+            variable=self.columnar_cache_var,
+            font=ctk.CTkFont(size=11)
+        ).grid(row=4, column=0, columnspan=3, padx=20, pady=(0, 20), sticky="w")
+
+        # Worker processes section
+        workers_section = ctk.CTkFrame(content_frame, corner_radius=10)
+        workers_section.grid(row=2, column=0, columnspan=3, sticky="ew", padx=30, pady=15)
+        workers_section.grid_columnconfigure(1, weight=1)
+
+        ctk.CTkLabel(
+            workers_section,
+            text="⚡ Worker Processes",
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).grid(row=0, column=0, columnspan=3, padx=20, pady=(15, 5), sticky="w")
+
+        ctk.CTkLabel(
+            workers_section,
+            text=f"Processes for hashing and extraction (0 = run in the app, this machine has {os.cpu_count() or 1} cores)",
+            font=ctk.CTkFont(size=11),
+            text_color="gray"
+        ).grid(row=1, column=0, columnspan=3, padx=20, pady=(0, 10), sticky="w")
+
+        self.workers_entry = ctk.CTkEntry(
+            workers_section,
+            placeholder_text="0",
+            font=ctk.CTkFont(size=11),
+            width=80,
+            height=35
+        )
+        self.workers_entry.grid(row=2, column=0, padx=20, pady=(0, 20), sticky="w")
+
+        ctk.CTkLabel(
+            workers_section,
+            text="Order:",
+            font=ctk.CTkFont(size=11)
+        ).grid(row=2, column=1, padx=(10, 5), pady=(0, 20), sticky="e")
+
+        self.order_var = tk.StringVar(value=DEFAULT_DISPATCH_ORDER)
+        ctk.CTkSegmentedButton(
+            workers_section,
+            values=list(DISPATCH_ORDERS),
+            variable=self.order_var
+        ).grid(row=2, column=2, padx=(0, 20), pady=(0, 20), sticky="e")
         
         # Action buttons
         button_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
-        button_frame.grid(row=2, column=0, columnspan=3, pady=30, sticky="ew")
+        button_frame.grid(row=3, column=0, columnspan=3, pady=30, sticky="ew")
         button_frame.grid_columnconfigure((0, 1), weight=1)
         
         cancel_btn = ctk.CTkButton(
@@ -214,14 +301,166 @@ class SettingsWindow(ctk.CTkToplevel):
     def load_settings(self):
         self.source_path_entry.insert(0, self.parent.source_path)
         self.db_path_entry.insert(0, self.parent.db_path)
+        self.workers_entry.insert(0, str(self.parent.worker_processes))
+        self.order_var.set(self.parent.dispatch_order)
+        self.store_receipts_var.set(self.parent.store_receipts)
+        self.columnar_cache_var.set(self.parent.columnar_cache)
 
     def save_and_close(self):
+        try:
+            worker_processes = int(self.workers_entry.get() or 0)
+            if worker_processes < 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Invalid Value", "Worker processes must be a whole number, 0 or more.", parent=self)
+            return
         self.parent.source_path = self.source_path_entry.get()
         self.parent.db_path = self.db_path_entry.get()
+        self.parent.worker_processes = worker_processes
+        self.parent.dispatch_order = self.order_var.get()
+        self.parent.store_receipts = self.store_receipts_var.get()
+        self.parent.columnar_cache = self.columnar_cache_var.get()
+        if not self.parent.columnar_cache:
+            self.parent.snapshot = None
         self.parent.save_app_settings()
         self.parent.update_paths_in_ui()
         self.destroy()
 
+# --- REPORTS WINDOW ---
+class ReportsWindow(ctk.CTkToplevel):
+    def __init__(self, parent):
+        super().__init__(parent.root)
+        self.title("📈 Spend Reports")
+        self.geometry("760x520")
+        self.transient(parent.root)
+
+        self.parent = parent
+        self.report_var = tk.StringVar(value=REPORT_TYPES[0])
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        self.create_ui()
+        self.show_report(self.report_var.get())
+
+    def create_ui(self):
+        header_frame = ctk.CTkFrame(self, height=60, corner_radius=0, fg_color=("#1f538d", "#144870"))
+        header_frame.grid(row=0, column=0, sticky="ew")
+        header_frame.grid_columnconfigure(0, weight=1)
+
+        ctk.CTkLabel(
+            header_frame,
+            text="📈 Spend Summary",
+            font=ctk.CTkFont(size=18, weight="bold"),
+            text_color="white"
+        ).grid(row=0, column=0, padx=20, pady=15, sticky="w")
+
+        ctk.CTkSegmentedButton(
+            header_frame,
+            values=list(REPORT_TYPES),
+            variable=self.report_var,
+            command=self.show_report
+        ).grid(row=0, column=1, padx=20, pady=15, sticky="e")
+
+        self.report_text = ctk.CTkTextbox(
+            self,
+            wrap=tk.NONE,
+            font=ctk.CTkFont(family="Consolas", size=11),
+            corner_radius=0
+        )
+        self.report_text.grid(row=1, column=0, sticky="nsew", padx=20, pady=20)
+
+    def show_report(self, report_type):
+        try:
+            db_path = self.parent.db_path_var.get()
+            snapshot = self.parent.current_snapshot(db_path)
+            rows = snapshot.report(report_type) if snapshot else ReportEngine(db_path).get_report(report_type)
+            text = format_report(rows, report_type)
+        except Exception as e:
+            self.parent.logger.error(f"Error generating {report_type} report: {e}")
+            text = f"⚠️ Could not generate report:\n{e}"
+        self.report_text.configure(state="normal")
+        self.report_text.delete("1.0", tk.END)
+        self.report_text.insert("1.0", text)
+        self.report_text.configure(state="disabled")
+
+# --- BULK EDIT WINDOW ---
+class BulkEditWindow(ctk.CTkToplevel):
+    """Edits the selected records, or all records matching the filters, in one go."""
+
+    def __init__(self, parent, record_ids, scope_text):
+        super().__init__(parent.root)
+        self.title("✏️ Bulk Edit")
+        self.geometry("520x420")
+        self.transient(parent.root)
+        self.grab_set()  # Make window modal
+
+        self.parent = parent
+        # None means every record matching the current filters.
+        self.record_ids = record_ids
+        self.grid_columnconfigure(1, weight=1)
+        self.create_ui(scope_text)
+
+    def create_ui(self, scope_text):
+        ctk.CTkLabel(
+            self,
+            text=f"✏️ Edit {scope_text}",
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).grid(row=0, column=0, columnspan=2, padx=20, pady=(20, 5), sticky="w")
+        ctk.CTkLabel(
+            self,
+            text="Leave a field blank to keep it unchanged.",
+            font=ctk.CTkFont(size=11),
+            text_color="gray"
+        ).grid(row=1, column=0, columnspan=2, padx=20, pady=(0, 15), sticky="w")
+
+        self.entries = {}
+        fields = [
+            ("category", "Set category", "e.g. Travel"),
+            ("add_tags", "Add tags", "comma-separated"),
+            ("remove_tags", "Remove tags", "comma-separated"),
+            ("shift_days", "Shift date by days", "e.g. 1 or -30"),
+        ]
+        for row, (name, label, placeholder) in enumerate(fields, start=2):
+            ctk.CTkLabel(self, text=label, font=ctk.CTkFont(size=12)).grid(row=row, column=0, padx=20, pady=8, sticky="w")
+            entry = ctk.CTkEntry(self, placeholder_text=placeholder, height=35, font=ctk.CTkFont(size=11))
+            entry.grid(row=row, column=1, padx=(0, 20), pady=8, sticky="ew")
+            self.entries[name] = entry
+
+        button_frame = ctk.CTkFrame(self, fg_color="transparent")
+        button_frame.grid(row=len(fields) + 2, column=0, columnspan=2, padx=20, pady=20, sticky="e")
+        ctk.CTkButton(
+            button_frame,
+            text="Cancel",
+            command=self.destroy,
+            width=100,
+            height=35,
+            fg_color="transparent",
+            border_width=2,
+            text_color=("gray10", "gray90")
+        ).pack(side="right", padx=(10, 0))
+        ctk.CTkButton(
+            button_frame,
+            text="✅ Apply",
+            command=self.apply,
+            width=100,
+            height=35,
+            font=ctk.CTkFont(size=12, weight="bold")
+        ).pack(side="right")
+
+    def apply(self):
+        category = self.entries["category"].get().strip()
+        add_tags = parse_tags(self.entries["add_tags"].get())
+        remove_tags = parse_tags(self.entries["remove_tags"].get())
+        try:
+            shift_days = int(self.entries["shift_days"].get().strip() or 0)
+        except ValueError:
+            messagebox.showerror("Invalid Value", "Shift date by days must be a whole number.", parent=self)
+            return
+        if not (category or add_tags or remove_tags or shift_days):
+            messagebox.showwarning("Nothing to Change", "Enter at least one change to apply.", parent=self)
+            return
+        if self.parent.apply_bulk_edit(self.record_ids, category or None, add_tags, remove_tags, shift_days):
+            self.destroy()
+
 # --- ENHANCED MAIN UI ---
 class ImageAnalyzerUI:
     def __init__(self, root):
@@ -239,6 +478,24 @@ class ImageAnalyzerUI:
         # Initialize logging queue and setup logger
         self.log_queue = queue.Queue()
         self.setup_logger()
+
+        # Set while an analysis runs; the Stop button cancels it.
+        self.cancel_token = None
+        # Shared with the analysis thread; read by refresh_live_stats on the Tk thread.
+        self.live_run = None
+        # Previews and exports read receipts from here when stored; new ones are
+        # only added when store_receipts is set.
+        self.blob_store = BlobStore()
+        # Columnar copy of the records behind the stats and reports when
+        # columnar_cache is set; built on first use, then refreshed incrementally.
+        self.snapshot = None
+        # Sort order of the records table and the (sort value, id) of its last loaded
+        # row, from which the next page continues.
+        self.sort_key = DEFAULT_SORT
+        self.sort_descending = True
+        self.page_after = None
+        self.pages_exhausted = True
+        self.page_pending = False
         
         # Load settings and create UI
         self.load_app_settings()
@@ -254,6 +511,7 @@ class ImageAnalyzerUI:
         # Configure and load data
         self.configure_treeview_style()
         self.load_data_from_db(self.db_path_var.get())
+        self.start_normalization_backfill(self.db_path_var.get())
         
         # Initialize log panel state
         self.log_minimized = False
@@ -278,13 +536,25 @@ class ImageAnalyzerUI:
                 settings = json.load(f)
                 self.source_path = settings.get("source_path", os.path.join(os.getcwd(), "inputs"))
                 self.db_path = settings.get("db_path", os.path.join(os.getcwd(), "outputs", "DB", "image_data.db"))
+                self.worker_processes = int(settings.get("worker_processes", 0))
+                self.dispatch_order = settings.get("dispatch_order", DEFAULT_DISPATCH_ORDER)
+                if self.dispatch_order not in DISPATCH_ORDERS:
+                    self.dispatch_order = DEFAULT_DISPATCH_ORDER
+                self.store_receipts = bool(settings.get("store_receipts", False))
+                self.columnar_cache = bool(settings.get("columnar_cache", True))
         except (FileNotFoundError, json.JSONDecodeError):
             self.source_path = os.path.join(os.getcwd(), "inputs")
             self.db_path = os.path.join(os.getcwd(), "outputs", "DB", "image_data.db")
+            self.worker_processes = 0
+            self.dispatch_order = DEFAULT_DISPATCH_ORDER
+            self.store_receipts = False
+            self.columnar_cache = True
     
     def save_app_settings(self):
         os.makedirs("config", exist_ok=True)
-        settings = {"source_path": self.source_path, "db_path": self.db_path}
+        settings = {"source_path": self.source_path, "db_path": self.db_path,
+                    "worker_processes": self.worker_processes, "dispatch_order": self.dispatch_order,
+                    "store_receipts": self.store_receipts, "columnar_cache": self.columnar_cache}
         with open("config/app_settings.json", "w") as f:
             json.dump(settings, f, indent=4)
 
@@ -478,6 +748,18 @@ class ImageAnalyzerUI:
             hover_color=("#43a047", "#2e7d32")
         )
         self.start_button.pack(fill="x", pady=5, padx=15)
+
+        self.stop_button = ctk.CTkButton(
+            actions_frame,
+            text="⏹️ Stop Analysis",
+            command=self.stop_analysis,
+            height=32,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=("#c62828", "#8e0000"),
+            hover_color=("#e53935", "#c62828"),
+            state="disabled"
+        )
+        self.stop_button.pack(fill="x", pady=(0, 5), padx=15)
         
         # Progress Bar with enhanced styling
         progress_container = ctk.CTkFrame(actions_frame, fg_color="transparent", height=30)
@@ -490,11 +772,22 @@ class ImageAnalyzerUI:
         )
         self.progress_bar.pack(fill="x", pady=10)
         self.progress_bar.set(0)
+
+        # Live metrics strip, redrawn by refresh_live_stats while an analysis runs
+        self.live_stats_label = ctk.CTkLabel(
+            actions_frame,
+            text="",
+            font=ctk.CTkFont(size=10),
+            text_color="gray",
+            justify="left",
+            anchor="w"
+        )
+        self.live_stats_label.pack(fill="x", padx=15, pady=(0, 5))
         
         # Secondary action buttons
         self.export_button = ctk.CTkButton(
             actions_frame,
-            text="📊 Export to CSV",
+            text="📊 Export Data",
             command=self.export_to_csv,
             height=38,
             font=ctk.CTkFont(size=12, weight="bold"),
@@ -525,6 +818,28 @@ class ImageAnalyzerUI:
         )
         self.delete_button.pack(fill="x", pady=3, padx=15)
 
+        self.bulk_edit_button = ctk.CTkButton(
+            actions_frame,
+            text="✏️ Bulk Edit",
+            command=self.open_bulk_edit_window,
+            height=38,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=("#00796b", "#004d40"),
+            hover_color=("#009688", "#00796b")
+        )
+        self.bulk_edit_button.pack(fill="x", pady=3, padx=15)
+
+        self.reports_button = ctk.CTkButton(
+            actions_frame,
+            text="📈 Reports",
+            command=self.open_reports_window,
+            height=38,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=("#6a1b9a", "#4a148c"),
+            hover_color=("#8e24aa", "#6a1b9a")
+        )
+        self.reports_button.pack(fill="x", pady=3, padx=15)
+
         # Add some spacing
         spacer = ctk.CTkFrame(actions_frame, height=10, fg_color="transparent")
         spacer.pack(fill="x", pady=5)
@@ -577,6 +892,30 @@ class ImageAnalyzerUI:
         )
         self.search_entry.pack(side="right", padx=(10, 0))
 
+        # Category and tag filters, answered from the Category/Tag index tables
+        self.tag_filter = ctk.CTkComboBox(
+            search_frame,
+            values=[ALL_TAGS_LABEL],
+            width=150,
+            height=35,
+            font=ctk.CTkFont(size=11),
+            command=self.apply_filters
+        )
+        self.tag_filter.set(ALL_TAGS_LABEL)
+        self.tag_filter.bind("<Return>", self.apply_filters)
+        self.tag_filter.pack(side="right", padx=(10, 0))
+
+        self.category_filter = ctk.CTkOptionMenu(
+            search_frame,
+            values=[ALL_CATEGORIES_LABEL],
+            width=150,
+            height=35,
+            font=ctk.CTkFont(size=11),
+            command=self.apply_filters
+        )
+        self.category_filter.set(ALL_CATEGORIES_LABEL)
+        self.category_filter.pack(side="right", padx=(10, 0))
+
         # Enhanced tree container
         tree_container = ctk.CTkFrame(self.data_panel, corner_radius=0)
         tree_container.grid(row=1, column=0, sticky="nsew", padx=0, pady=0)
@@ -599,7 +938,7 @@ class ImageAnalyzerUI:
             command=self.tree.yview
         )
         v_scrollbar.grid(row=0, column=1, sticky="ns", padx=(0, 20), pady=20)
-        self.tree.configure(yscrollcommand=v_scrollbar.set)
+        self.tree.configure(yscrollcommand=lambda first, last: self.on_tree_scroll(v_scrollbar, first, last))
         
         h_scrollbar = ctk.CTkScrollbar(
             tree_container,
@@ -617,6 +956,10 @@ class ImageAnalyzerUI:
         self.tree.heading("Renamed", text="📝 Renamed As", anchor="center")
         self.tree.heading("Category", text="Category", anchor="center")
         self.tree.heading("Tags", text="Tags", anchor="center")
+        self.heading_texts = {column: self.tree.heading(column)["text"] for column in SORTABLE_HEADINGS}
+        for column, sort_key in SORTABLE_HEADINGS.items():
+            self.tree.heading(column, command=lambda sort_key=sort_key: self.sort_by(sort_key))
+        self.update_sort_headings()
 
         self.tree.column("ID", width=60, anchor="center", minwidth=50)
         self.tree.column("Amount", width=120, anchor="e", minwidth=100)
@@ -758,38 +1101,169 @@ class ImageAnalyzerUI:
         else:
             self.settings_win = SettingsWindow(self)
 
+    def open_reports_window(self):
+        db_path = self.db_path_var.get()
+        if not os.path.exists(db_path):
+            messagebox.showerror("Error", "Database not found. Please run an analysis first.")
+            return
+        if hasattr(self, 'reports_win') and self.reports_win.winfo_exists():
+            self.reports_win.focus()
+        else:
+            self.reports_win = ReportsWindow(self)
+
+    def open_bulk_edit_window(self):
+        """Bulk-edit the selected records or, with nothing selected, all records matching the filters."""
+        if not os.path.exists(self.db_path_var.get()):
+            messagebox.showerror("Error", "Database not found. Please run an analysis first.")
+            return
+        selected_items = self.tree.selection()
+        if selected_items:
+            record_ids = list(selected_items)
+            scope_text = f"{len(record_ids)} selected record{'s' if len(record_ids) != 1 else ''}"
+        else:
+            category, tag = self.current_filters()
+            if category is None and tag is None and not messagebox.askyesno(
+                    "Edit All Records", "No records are selected and no filter is set. Edit every record?"):
+                return
+            record_ids = None
+            filters = ", ".join(value for value in (category, tag) if value is not None)
+            scope_text = f"all records matching {filters}" if filters else "all records"
+        BulkEditWindow(self, record_ids, scope_text)
+
+    def apply_bulk_edit(self, record_ids, category, add_tags, remove_tags, shift_days):
+        """
+        Apply a bulk edit in one transaction and patch the affected rows of the table
+        in place; rows that no longer match the filters are removed from it.
+
+        Returns:
+            bool: Whether the edit was applied.
+        """
+        db_path = self.db_path_var.get()
+        filter_category, filter_tag = self.current_filters()
+        try:
+            rows = bulk_edit_records(db_path, record_ids, filter_category, filter_tag, category=category,
+                                     add_tags=add_tags, remove_tags=remove_tags, shift_days=shift_days)
+        except Exception as e:
+            self.logger.error(f"Bulk edit failed: {e}")
+            messagebox.showerror("Update Failed", f"Could not update the database:\n{e}")
+            return False
+
+        removed = []
+        for row in rows:
+            if not self.tree.exists(row[0]):
+                continue
+            if self.matches_filters(row[5], row[6]):
+                self.tree.item(row[0], values=row)
+            else:
+                removed.append(row[0])
+        if removed:
+            self.tree.delete(*removed)
+        self.update_stats()
+        if category is not None or add_tags or remove_tags:
+            self.refresh_filter_choices(db_path)
+        self.logger.info(f"Bulk-edited {len(rows)} record{'s' if len(rows) != 1 else ''}")
+        messagebox.showinfo("Success", f"Successfully updated {len(rows)} record{'s' if len(rows) != 1 else ''}.")
+        return True
+
+    def current_snapshot(self, db_path):
+        """
+        The columnar snapshot of db_path, brought up to date, or None when the
+        cache is turned off or the database does not exist.
+        """
+        if not self.columnar_cache or not os.path.exists(db_path):
+            return None
+        if self.snapshot is None or self.snapshot.db_path != db_path:
+            self.snapshot = ColumnarSnapshot(db_path)
+        self.snapshot.refresh()
+        return self.snapshot
+
     def update_stats(self):
-        """Update the statistics panel with current data."""
+        """Recompute the statistics panel for the records matching the current filters."""
         try:
             db_path = self.db_path_var.get() if hasattr(self, 'db_path_var') else self.db_path
             if not os.path.exists(db_path):
-                self.total_records_label.configure(text="Total Records: 0")
-                self.total_amount_label.configure(text="Total Amount: ₹0.00")
-                self.date_range_label.configure(text="Date Range: N/A")
+                self.reset_stats()
                 return
+            category, tag = self.current_filters()
+            snapshot = self.current_snapshot(db_path)
+            if snapshot is not None:
+                self.stats = snapshot.summary(snapshot.mask(category, tag))
+                self.render_stats()
+                return
+            where, params = record_filter(category, tag)
             with sqlite3.connect(db_path) as conn:
                 cursor = conn.cursor()
-                # Total records
-                cursor.execute("SELECT COUNT(*) FROM ImageData")
-                total_records = cursor.fetchone()[0] or 0
-                self.total_records_label.configure(text=f"Total Records: {total_records:,}")
-                # Total amount
-                cursor.execute("SELECT SUM(CAST(amount AS FLOAT)) FROM ImageData")
-                total_amount = cursor.fetchone()[0] or 0.0
-                self.total_amount_label.configure(text=f"Total Amount: ₹{total_amount:,.2f}")
-                # Date range
-                cursor.execute("SELECT MIN(date), MAX(date) FROM ImageData")
-                min_date, max_date = cursor.fetchone()
-                if min_date and max_date:
-                    self.date_range_label.configure(text=f"Date Range: {min_date} to {max_date}")
-                else:
-                    self.date_range_label.configure(text="Date Range: N/A")
+                ensure_schema(cursor)
+                cursor.execute(f"SELECT COUNT(*), SUM({AMOUNT_EXPR}), MIN(date), MAX(date) FROM ImageData{where}", params)
+                total_records, total_amount, min_date, max_date = cursor.fetchone()
+            self.stats = {
+                "count": total_records or 0,
+                "total": total_amount or 0.0,
+                "min_date": min_date,
+                "max_date": max_date,
+            }
+            self.render_stats()
         except Exception as e:
             self.logger.error(f"Error updating statistics: {e}")
-            self.total_records_label.configure(text="Total Records: 0")
-            self.total_amount_label.configure(text="Total Amount: ₹0.00")
+            self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the statistics panel to its empty state."""
+        self.stats = {"count": 0, "total": 0.0, "min_date": None, "max_date": None}
+        self.render_stats()
+
+    def render_stats(self):
+        """Render the cached statistics into the dashboard labels."""
+        self.total_records_label.configure(text=f"Total Records: {self.stats['count']:,}")
+        self.total_amount_label.configure(text=f"Total Amount: ₹{self.stats['total']:,.2f}")
+        if self.stats["min_date"] and self.stats["max_date"]:
+            self.date_range_label.configure(text=f"Date Range: {self.stats['min_date']} to {self.stats['max_date']}")
+        else:
             self.date_range_label.configure(text="Date Range: N/A")
 
+    @staticmethod
+    def amount_of(raw_amount):
+        """Numeric amount of a displayed row, matching the SQL used for the totals."""
+        amount_value, _ = normalize_amount(raw_amount)
+        return amount_value if amount_value is not None else cast_amount(raw_amount)
+
+    def adjust_stats_after_delete(self, db_path, removed_rows):
+        """
+        Adjust the cached statistics for removed rows instead of rescanning the table.
+
+        Count and total are updated arithmetically; the date range is only re-queried
+        (an index-friendly MIN/MAX) when a removed row sat on one of its boundaries.
+        """
+        if not hasattr(self, 'stats') or self.columnar_cache:
+            # The snapshot catches up on just the deleted rows.
+            self.update_stats()
+            return
+        self.stats["count"] = max(self.stats["count"] - len(removed_rows), 0)
+        self.stats["total"] -= sum(self.amount_of(values[1]) for values in removed_rows)
+        removed_dates = {str(values[2]) for values in removed_rows}
+        if self.stats["count"] == 0:
+            self.stats.update({"total": 0.0, "min_date": None, "max_date": None})
+        elif self.stats["min_date"] in removed_dates or self.stats["max_date"] in removed_dates:
+            # The panel covers the records matching the current filters, as in update_stats.
+            where, params = record_filter(*self.current_filters())
+            try:
+                with sqlite3.connect(db_path) as conn:
+                    min_date, max_date = conn.execute(f"SELECT MIN(date), MAX(date) FROM ImageData{where}", params).fetchone()
+                self.stats.update({"min_date": min_date, "max_date": max_date})
+            except Exception as e:
+                self.logger.error(f"Error refreshing date range: {e}")
+        self.render_stats()
+
+    def content_hash_for(self, record_id):
+        """Content hash of a record, or None for rows ingested before hashes were kept."""
+        try:
+            with sqlite3.connect(self.db_path_var.get()) as conn:
+                row = conn.execute("SELECT content_hash FROM ImageData WHERE id = ?", (record_id,)).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            self.logger.error(f"Could not look up the content hash of {record_id}: {e}")
+            return None
+
     def on_tree_select(self, event):
         """Handle row selection to show image preview."""
         selected_item = self.tree.focus()
@@ -797,9 +1271,11 @@ class ImageAnalyzerUI:
             return
 
         item_data = self.tree.item(selected_item, "values")
-        file_path = item_data[3]  # Original Path
+        file_path = item_data[3]  # Original Path, "<archive>!<member>" for archive members
+        digest = self.content_hash_for(item_data[0])
+        stored = digest in self.blob_store
 
-        if not os.path.exists(file_path):
+        if not stored and not path_exists(file_path):
             self.preview_label.configure(
                 image=None, 
                 text="❌ File Not Found\n\nThe selected file could not be located at the specified path."
@@ -813,7 +1289,9 @@ class ImageAnalyzerUI:
             if ext.lower() == '.pdf':
                 # Convert first page of PDF to image
                 try:
-                    pages = convert_from_path(file_path, first_page=1, last_page=1)
+                    source = self.blob_store.local_file(digest, ext) if stored else local_file(file_path)
+                    with source as local_path:
+                        pages = convert_from_path(local_path, first_page=1, last_page=1)
                     if pages:
                         img = pages[0]
                     else:
@@ -825,6 +1303,10 @@ class ImageAnalyzerUI:
                         text=f"⚠️ PDF Preview Error\n\n{e}"
                     )
                     return
+            elif stored:
+                img = Image.open(io.BytesIO(self.blob_store.read(digest)))
+            elif is_member_path(file_path):
+                img = Image.open(io.BytesIO(read_bytes(file_path)))
             else:
                 img = Image.open(file_path)
 
@@ -870,24 +1352,15 @@ class ImageAnalyzerUI:
             self.logger.error(f"Could not load preview for {file_path}: {e}")
 
     def setup_logger(self):
-        """Set up the logger with queue handler."""
-        self.logger = logging.getLogger('ExpenseTracker')
-        self.logger.setLevel(logging.INFO)
-        
-        for handler in self.logger.handlers[:]:
-            self.logger.removeHandler(handler)
+        """Set up the UI logger; its records also feed the log view."""
+        self.logger = get_logger('ExpenseTracker')
         
         queue_handler = QueueHandler(self.log_queue)
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s',
                                    datefmt='%Y-%m-%d %H:%M:%S')
         queue_handler.setFormatter(formatter)
-        self.logger.addHandler(queue_handler)
-        
-        log_dir = os.path.join("outputs", "logs")
-        os.makedirs(log_dir, exist_ok=True)
-        file_handler = logging.FileHandler(os.path.join(log_dir, "app.log"))
-        file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+        queue_handler.addFilter(logging.Filter('ExpenseTracker'))
+        add_log_sink(queue_handler)
         
         self.logger.info("Enhanced UI initialized successfully")
 
@@ -940,96 +1413,311 @@ class ImageAnalyzerUI:
             messagebox.showerror("Error", "Please select a valid source directory.")
             return
 
+        resume = False
+        try:
+            if os.path.exists(db_path):
+                job_queue = JobQueue(db_path, source_path)
+                if job_queue.has_unfinished():
+                    counts = job_queue.counts()
+                    remaining = counts["pending"] + counts["in_flight"]
+                    answer = messagebox.askyesnocancel(
+                        "Resume Analysis",
+                        f"A previous analysis of this folder was interrupted with {remaining:,} files left "
+                        f"({counts['done']:,} already done).\n\nResume it? Choose No to start over."
+                    )
+                    if answer is None:
+                        return
+                    resume = answer
+        except Exception as e:
+            self.logger.error(f"Could not check for an interrupted analysis: {e}")
+
         self.start_button.configure(state="disabled", text="🔄 Analyzing...")
+        self.stop_button.configure(state="normal", text="⏹️ Stop Analysis")
         self.progress_bar.set(0)
-
-        threading.Thread(target=self.process_images, args=(source_path, db_path), daemon=True).start()
+        if not resume:
+            # A fresh run clears the database; its rows stream in as they are extracted.
+            for item in self.tree.get_children():
+                self.tree.delete(item)
+            self.pages_exhausted = True
+
+        self.cancel_token = CancellationToken()
+        self.live_run = {
+            "summary": RunSummary(),
+            "meter": ThroughputMeter(),
+            "progress": (0, 0),
+            "api_baseline": metrics.REGISTRY.histogram("api_request_seconds"),
+            # Rows extracted by the analysis thread, waiting to be shown in the tree.
+            "rows": queue.Queue(),
+        }
+        threading.Thread(target=self.process_images, args=(source_path, db_path, resume, self.cancel_token), daemon=True).start()
+        self.refresh_live_stats()
 
     def stop_analysis(self):
-        self.stop_requested = True
-        self.start_button.configure(state="normal")
-        logger.info("Image analysis has been stopped.")
-
+        """Ask the running analysis to stop; it finishes the requests already in flight first."""
+        if self.cancel_token is None or self.cancel_token.cancelled:
+            return
+        self.cancel_token.cancel()
+        self.stop_button.configure(state="disabled", text="⏳ Stopping...")
+        self.logger.info("Stop requested; waiting for in-flight requests to finish.")
 
-    def process_images(self, source_path, db_path):
+    def process_images(self, source_path, db_path, resume=False, cancel_token=None):
         """Process all images in the source path and update the UI."""
+        live_run = self.live_run
+        summary = live_run["summary"]
         try:
-            self.logger.info(f"Starting analysis of folder: {source_path}")
-            
-            for processed_count, total_files in get_image_data(source_path, db_path):
-                if total_files > 0:
-                    progress = processed_count / total_files
-                    self.root.after(0, self.progress_bar.set, progress)
-
-            self.logger.info("Analysis complete.")
-
-            self.stop_analysis()
-            
-            self.root.after(0, self.start_button.configure, {"state": "normal", "text": "▶️ Start Analysis"})
+            self.logger.info(f"{'Resuming' if resume else 'Starting'} analysis of folder: {source_path}")
             
+            # Progress is only recorded here; refresh_live_stats redraws it at a fixed rate
+            # so a fast run does not flood the Tk event loop.
+            for processed_count, total_files in get_image_data(source_path, db_path, resume=resume,
+                                                               cancel_token=cancel_token, summary=summary,
+                                                               workers=self.worker_processes,
+                                                               dispatch_order=self.dispatch_order,
+                                                               on_record=live_run["rows"].put,
+                                                               blob_store=self.blob_store if self.store_receipts else None):
+                live_run["progress"] = (processed_count, total_files)
+                live_run["meter"].update(processed_count)
+
+            if summary.cancelled:
+                self.logger.info(f"Analysis stopped. {summary.remaining:,} files left to resume.")
+                self.root.after(0, messagebox.showinfo, "Analysis Stopped", summary.format())
+            else:
+                self.logger.info("Analysis complete.")
 
         except Exception as e:
             self.logger.error(f"A critical error occurred during analysis: {e}")
         finally:
+            live_run["finished"] = True
             self.root.after(0, self.load_data_from_db, db_path)
-            self.root.after(0, self.start_button.configure, {"state": "normal", "text": "▶️ Start Analysis"})
+            self.root.after(0, lambda: self.start_button.configure(state="normal", text="▶️ Start Analysis"))
+            self.root.after(0, lambda: self.stop_button.configure(state="disabled", text="⏹️ Stop Analysis"))
+
+    def refresh_live_stats(self):
+        """Redraw the progress bar and live metrics strip; reschedules itself until the run ends."""
+        live_run = self.live_run
+        if live_run is None:
+            return
+        processed, total = live_run["progress"]
+        summary = live_run["summary"]
+        meter = live_run["meter"]
+        if total > 0:
+            self.progress_bar.set(processed / total)
+        self.show_streamed_rows(live_run["rows"])
+
+        rate = meter.rate()
+        api_latency = metrics.REGISTRY.histogram("api_request_seconds").minus(live_run["api_baseline"])
+        p50, p95 = api_latency.quantile(0.5), api_latency.quantile(0.95)
+        latency = f"{p50 * 1000:.0f} / {p95 * 1000:.0f} ms" if p50 is not None else "--"
+        self.live_stats_label.configure(text=(
+            f"⚡ {rate:.1f} files/s   ⏱️ ETA {format_duration(meter.eta(total - processed))}   "
+            f"{processed:,}/{total:,}\n"
+            f"🌐 API p50/p95 {latency}   🔄 {summary.in_flight} in flight\n"
+            f"🔁 {summary.retried} retries   ❌ {summary.failed} failed   ♻️ {summary.duplicates} duplicates"
+        ))
+
+        if live_run.get("finished"):
+            self.live_run = None
+            return
+        self.root.after(LIVE_STATS_INTERVAL_MS, self.refresh_live_stats)
+
+    def show_streamed_rows(self, rows):
+        """Append the rows extracted since the last tick to the tree, in one batch."""
+        records = []
+        try:
+            while True:
+                records.append(rows.get_nowait())
+        except queue.Empty:
+            pass
+        if not records:
+            return
+        records = [record for record in records if self.matches_filters(record[5], record[6])]
+        count = len(self.tree.get_children())
+        for i, record in enumerate(records, start=count):
+            record_id, amount, date, original_path, rename_name, category, tags = record[:7]
+            if self.tree.exists(record_id):
+                continue
+            if isinstance(date, datetime):
+                date = date.strftime('%Y-%m-%d')
+            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
+            self.tree.insert("", "end", iid=record_id, values=(record_id, amount, date, original_path, rename_name, category, tags), tags=(tag,))
+
+    def start_normalization_backfill(self, db_path):
+        """Normalize amounts and dates of older rows and index their categories and tags
+        in the background, then refresh stats and filter choices."""
+        if not os.path.exists(db_path):
+            return
+
+        def backfill():
+            try:
+                if backfill_normalized_columns(db_path, only_missing=True):
+                    self.root.after(0, self.update_stats)
+            except Exception as e:
+                self.logger.error(f"Failed to normalize existing records: {e}")
+            try:
+                if backfill_tag_index(db_path):
+                    self.root.after(0, self.refresh_filter_choices, db_path)
+            except Exception as e:
+                self.logger.error(f"Failed to index categories and tags: {e}")
+
+        threading.Thread(target=backfill, daemon=True).start()
+
+    def current_filters(self):
+        """(category, tag) chosen in the data panel; None where no filter is set."""
+        category = self.category_filter.get()
+        tag = self.tag_filter.get().strip()
+        return (None if category == ALL_CATEGORIES_LABEL else category,
+                None if tag in ("", ALL_TAGS_LABEL) else tag)
+
+    def matches_filters(self, category, tags):
+        """Whether a row not read through record_filter (e.g. a streamed one) passes the filters."""
+        wanted_category, wanted_tag = self.current_filters()
+        if wanted_category is not None and category_name(category).lower() != wanted_category.lower():
+            return False
+        if wanted_tag is not None and wanted_tag.lower() not in (tag.lower() for tag in parse_tags(tags)):
+            return False
+        return True
+
+    def apply_filters(self, _=None):
+        self.load_data_from_db(self.db_path_var.get())
+
+    def refresh_filter_choices(self, db_path):
+        """Offer the categories and tags currently in use in the filter controls."""
+        try:
+            categories, tags = filter_choices(db_path)
+        except Exception as e:
+            self.logger.error(f"Failed to load filter choices: {e}")
+            return
+        self.category_filter.configure(values=[ALL_CATEGORIES_LABEL] + categories)
+        self.tag_filter.configure(values=[ALL_TAGS_LABEL] + tags)
+
+    def sort_by(self, sort_key):
+        """Header click: sort by the column, toggling the direction on a repeated click."""
+        if sort_key == self.sort_key:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_key, self.sort_descending = sort_key, False
+        self.update_sort_headings()
+        self.load_data_from_db(self.db_path_var.get())
+
+    def update_sort_headings(self):
+        arrow = " ▼" if self.sort_descending else " ▲"
+        for column, sort_key in SORTABLE_HEADINGS.items():
+            text = self.heading_texts[column] + (arrow if sort_key == self.sort_key else "")
+            self.tree.heading(column, text=text)
+
+    def on_tree_scroll(self, scrollbar, first, last):
+        """Tracks the view in the scrollbar and queues the next page near the bottom."""
+        scrollbar.set(first, last)
+        if not self.pages_exhausted and not self.page_pending and float(last) >= PAGE_PREFETCH_FRACTION:
+            self.page_pending = True
+            self.root.after_idle(self.load_next_page, self.db_path_var.get())
+
+    def load_next_page(self, db_path):
+        """
+        Appends the next page of records in the current sort order. SQLite walks the
+        sort column's index from the last loaded row, so a page costs the same at any
+        depth and nothing is sorted on the Tk thread.
+        """
+        self.page_pending = False
+        if self.pages_exhausted:
+            return 0
+        category, tag_name = self.current_filters()
+        try:
+            with sqlite3.connect(db_path) as conn:
+                rows = fetch_records_page(conn.cursor(), self.sort_key, self.sort_descending, self.page_after,
+                                          category, tag_name)
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to load records from DB: {e}")
+            self.pages_exhausted = True
+            return 0
+        self.pages_exhausted = len(rows) < DEFAULT_PAGE_SIZE
+        if rows:
+            self.page_after = (rows[-1][-1], rows[-1][0])
+        count = len(self.tree.get_children())
+        for row in rows:
+            if self.tree.exists(row[0]):
+                # Already shown, streamed in during an analysis.
+                continue
+            tag = 'evenrow' if count % 2 == 0 else 'oddrow'
+            self.tree.insert("", "end", iid=row[0], values=row[:-1], tags=(tag,))
+            count += 1
+        return len(rows)
 
     def load_data_from_db(self, db_path):
         try:
             for item in self.tree.get_children():
                 self.tree.delete(item)
+            self.page_after = None
+            self.pages_exhausted = True
             if not os.path.exists(db_path):
                 self.update_stats()
                 return
             with sqlite3.connect(db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, amount, date, original_path, rename_name, category, tags FROM ImageData ORDER BY id")
-                rows = cursor.fetchall()
-                self.logger.info(f"Loaded {len(rows)} records from database")
-                for i, row in enumerate(rows):
-                    tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-                    self.tree.insert("", "end", values=row, tags=(tag,))
+                ensure_schema(conn.cursor())
+            self.pages_exhausted = False
+            loaded = self.load_next_page(db_path)
+            category, tag_name = self.current_filters()
+            filters = ", ".join(value for value in (category, tag_name) if value is not None)
+            direction = "descending" if self.sort_descending else "ascending"
+            self.logger.info(f"Loaded the first {loaded} records from database by {self.sort_key} {direction}"
+                             + (f" (filtered by {filters})" if filters else ""))
+            self.refresh_filter_choices(db_path)
             self.update_stats()
         except Exception as e:
             self.logger.error(f"Failed to load data from DB: {e}")
             self.update_stats()
             
     def consume_logs(self):
+        """Append queued log lines in one insert per tick and drop the oldest beyond the cap."""
+        lines = []
         try:
-            while True:
-                log = self.log_queue.get_nowait()
-                self.log_text.insert(tk.END, log + "\n")
-                self.log_text.see(tk.END)
+            while len(lines) < LOG_VIEW_MAX_BATCH:
+                lines.append(self.log_queue.get_nowait())
         except queue.Empty:
             pass
+        try:
+            if lines:
+                self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+                line_count = int(self.log_text.index("end-1c").split(".")[0]) - 1
+                if line_count > LOG_VIEW_MAX_LINES:
+                    self.log_text.delete("1.0", f"{line_count - LOG_VIEW_MAX_LINES + 1}.0")
+                self.log_text.see(tk.END)
         finally:
-            self.root.after(100, self.consume_logs)
+            # Come back sooner while a backlog is left.
+            self.root.after(0 if len(lines) == LOG_VIEW_MAX_BATCH else LOG_VIEW_INTERVAL_MS, self.consume_logs)
 
     def export_to_csv(self):
-        """Export the data from the database to a CSV file."""
+        """Export the data from the database to a CSV, XLSX or Parquet file."""
         db_path = self.db_path_var.get()
         if not os.path.exists(db_path):
             messagebox.showerror("Error", "Database not found. Please run an analysis first.")
             return
 
+        filetypes = [("CSV files", "*.csv"), ("Excel files", "*.xlsx")]
+        if "parquet" in available_formats():
+            filetypes.append(("Parquet files", "*.parquet"))
         save_path = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+            filetypes=filetypes + [("All files", "*.*")]
         )
 
         if not save_path:
             return
 
+        self.export_button.configure(state="disabled", text="📊 Exporting...")
+        threading.Thread(target=self.run_data_export, args=(db_path, save_path), daemon=True).start()
+
+    def run_data_export(self, db_path, save_path):
+        """Stream the database into the export file on a worker thread."""
         try:
-            with sqlite3.connect(db_path) as conn:
-                df = pd.read_sql_query("SELECT id, amount, date, original_path, rename_name FROM ImageData", conn)
-            
-            df.to_csv(save_path, index=False)
+            row_count = export_records(db_path, save_path)
             self.logger.info(f"Data successfully exported to {save_path}")
-            messagebox.showinfo("Success", f"Data exported to {save_path}")
+            self.root.after(0, messagebox.showinfo, "Success", f"{row_count:,} records exported to {save_path}")
         except Exception as e:
-            self.logger.error(f"Failed to export data to CSV: {e}")
-            messagebox.showerror("Export Failed", f"An error occurred while exporting:\n{e}")
+            self.logger.error(f"Failed to export data: {e}")
+            self.root.after(0, messagebox.showerror, "Export Failed", f"An error occurred while exporting:\n{e}")
+        finally:
+            self.root.after(0, lambda: self.export_button.configure(state="normal", text="📊 Export Data"))
 
     def export_files(self):
         """Export analyzed files with their new names to a dated output folder."""
@@ -1038,58 +1726,70 @@ class ImageAnalyzerUI:
             messagebox.showerror("Error", "No database found. Please run analysis first.")
             return
 
-        current_date = datetime.now().strftime("%Y%m%d_%H%M%S")
-        export_dir = os.path.join("outputs", f"export_files_{current_date}")
-        os.makedirs(export_dir, exist_ok=True)
+        export_dir = find_resumable_export("outputs")
+        if export_dir and not messagebox.askyesno(
+                "Resume Export", f"An interrupted export was found in:\n{export_dir}\n\nResume it?"):
+            export_dir = None
+        if export_dir is None:
+            export_dir = new_export_dir("outputs")
 
         try:
+            # Built from the current records on a resume too; the exporter skips what is already done.
+            jobs = []
             with sqlite3.connect(db_path) as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT original_path, rename_name FROM ImageData ORDER BY date ASC")
+                cursor.execute("SELECT original_path, rename_name, content_hash FROM ImageData ORDER BY date ASC, id ASC")
                 files = cursor.fetchall()
 
-                if not files:
-                    messagebox.showinfo("Info", "No files found in database to export.")
-                    return
-
-                success_count = 0
-                failed_files = []
-
-                for index, (original_path, rename_name) in enumerate(files, start=1):
-                    try:
-                        if os.path.exists(original_path):
-                            _, ext = os.path.splitext(original_path)
-                            new_filename = f"{str(index).zfill(2)}_{rename_name}{ext}"
-                            new_path = os.path.join(export_dir, new_filename)
-                            
-                            shutil.copy2(original_path, new_path)
-                            success_count += 1
-                            self.logger.info(f"Exported: {new_filename}")
-                        else:
-                            failed_files.append(original_path)
-                            self.logger.warning(f"File not found: {original_path}")
-                    except Exception as e:
-                        failed_files.append(original_path)
-                        self.logger.error(f"Error exporting {original_path}: {str(e)}")
-
-                message = f"Successfully exported {success_count} files to:\n{export_dir}"
-                if failed_files:
-                    message += f"\n\nFailed to export {len(failed_files)} files."
-                    self.logger.warning(f"Failed to export {len(failed_files)} files")
-                
-                messagebox.showinfo("Export Complete", message)
-                
-                if success_count > 0:
-                    if sys.platform == "win32":
-                        os.startfile(export_dir)
-                    elif sys.platform == "darwin":
-                        subprocess.run(["open", export_dir])
-                    else:
-                        subprocess.run(["xdg-open", export_dir])
+            if not files:
+                messagebox.showinfo("Info", "No files found in database to export.")
+                return
 
+            for index, (original_path, rename_name, content_hash) in enumerate(files, start=1):
+                _, ext = os.path.splitext(original_path)
+                jobs.append((original_path, f"{str(index).zfill(2)}_{rename_name}{ext}", content_hash))
         except Exception as e:
             self.logger.error(f"Error during file export: {str(e)}")
             messagebox.showerror("Export Error", f"An error occurred during export:\n{str(e)}")
+            return
+
+        self.export_files_button.configure(state="disabled", text="📁 Exporting...")
+        self.progress_bar.set(0)
+        threading.Thread(target=self.run_file_export, args=(export_dir, jobs), daemon=True).start()
+
+    def run_file_export(self, export_dir, jobs):
+        """Run the file export on a worker thread and report back to the UI."""
+        def report_progress(done, total):
+            if total and (done == total or done % 50 == 0):
+                self.root.after(0, self.progress_bar.set, done / total)
+
+        try:
+            exporter = FileExporter(export_dir, progress_callback=report_progress, blob_store=self.blob_store)
+            summary = exporter.export(jobs)
+            self.root.after(0, self.finish_file_export, export_dir, summary)
+        except Exception as e:
+            self.logger.error(f"Error during file export: {str(e)}")
+            self.root.after(0, messagebox.showerror, "Export Error", f"An error occurred during export:\n{str(e)}")
+        finally:
+            self.root.after(0, lambda: self.export_files_button.configure(state="normal", text="📁 Export Files"))
+
+    def finish_file_export(self, export_dir, summary):
+        """Show the export summary and open the export folder."""
+        success_count = summary["linked"] + summary["copied"] + summary["skipped"]
+        message = f"Successfully exported {success_count} files to:\n{export_dir}"
+        if summary["failed"]:
+            message += f"\n\nFailed to export {summary['failed']} files. Run the export again to resume."
+            self.logger.warning(f"Failed to export {summary['failed']} files")
+
+        messagebox.showinfo("Export Complete", message)
+
+        if success_count > 0:
+            if sys.platform == "win32":
+                os.startfile(export_dir)
+            elif sys.platform == "darwin":
+                subprocess.run(["open", export_dir])
+            else:
+                subprocess.run(["xdg-open", export_dir])
 
     def delete_selected(self):
         """Delete selected record(s) from the database and update the display."""
@@ -1104,25 +1804,16 @@ class ImageAnalyzerUI:
             return
 
         db_path = self.db_path_var.get()
-        deleted_count = 0
 
         try:
-            with sqlite3.connect(db_path) as conn:
-                cursor = conn.cursor()
-                for item in selected_items:
-                    try:
-                        record_id = self.tree.item(item)['values'][0]
-                        cursor.execute("DELETE FROM ImageData WHERE id = ?", (record_id,))
-                        self.tree.delete(item)
-                        deleted_count += 1
-                        self.logger.info(f"Deleted record ID: {record_id}")
-                    except Exception as e:
-                        self.logger.error(f"Error deleting record {record_id}: {str(e)}")
-
-            conn.commit()
-            messagebox.showinfo("Success", f"Successfully deleted {deleted_count} record{'s' if deleted_count > 1 else ''}.")
-            self.load_data_from_db(db_path)
-            self.update_stats()
+            removed_rows = [self.tree.item(item, "values") for item in selected_items]
+            deleted_count = delete_records(db_path, (values[0] for values in removed_rows))
+
+            # Remove only the affected rows; Treeview.delete accepts many items at once.
+            self.tree.delete(*selected_items)
+            self.adjust_stats_after_delete(db_path, removed_rows)
+            self.logger.info(f"Deleted {deleted_count} selected record{'s' if deleted_count != 1 else ''}")
+            messagebox.showinfo("Success", f"Successfully deleted {deleted_count} record{'s' if deleted_count != 1 else ''}.")
 
         except Exception as e:
             self.logger.error(f"Error during deletion: {str(e)}")
@@ -1159,18 +1850,29 @@ class ImageAnalyzerUI:
         item_values = list(self.tree.item(item_id, "values"))
         record_id = item_values[0]
 
-        column_names = ["id", "amount", "date", "original_path", "rename_name"]
-        column_to_update = column_names[col_index]
+        column_to_update = RECORD_COLUMNS[col_index]
+
+        assignments = {column_to_update: new_value}
+        if column_to_update == "amount":
+            # Keep the normalized columns in step with the edited raw amount.
+            assignments["amount_value"], assignments["currency"] = normalize_amount(new_value)
+        elif column_to_update == "date":
+            parsed_date = parse_date(new_value)
+            if parsed_date is None:
+                messagebox.showerror("Update Failed", f"Unrecognized date: {new_value}")
+                return
+            new_value = assignments["date"] = parsed_date.strftime('%Y-%m-%d')
+        elif column_to_update == "category":
+            new_value = assignments["category"] = category_name(new_value)
+        elif column_to_update == "tags":
+            # Stored as a JSON list, like the tags written by an analysis.
+            new_value = assignments["tags"] = json.dumps(parse_tags(new_value))
 
         try:
-            with sqlite3.connect(db_path) as conn:
-                cursor = conn.cursor()
-                query = f"UPDATE ImageData SET {column_to_update} = ? WHERE id = ?"
-                cursor.execute(query, (new_value, record_id))
-                conn.commit()
-            
+            update_record(db_path, record_id, assignments)
             item_values[col_index] = new_value
             self.tree.item(item_id, values=item_values)
+            self.update_stats()
             self.logger.info(f"Record {record_id} updated. Set {column_to_update} to {new_value}.")
         except Exception as e:
             self.logger.error(f"Failed to update record {record_id}: {e}")
@@ -1182,17 +1884,22 @@ class ImageAnalyzerUI:
         if not selected_item:
             return
 
-        self.tree.selection_set(selected_item)
+        if selected_item not in self.tree.selection():
+            self.tree.selection_set(selected_item)
         item_data = self.tree.item(selected_item, "values")
         file_path = item_data[3]
 
         context_menu = tk.Menu(self.root, tearoff=0)
         context_menu.add_command(label="Show in Folder", command=lambda: self.show_in_folder(file_path))
+        context_menu.add_command(label="Bulk Edit Selected...", command=self.open_bulk_edit_window)
         
         context_menu.tk_popup(event.x_root, event.y_root)
 
     def show_in_folder(self, path):
-        """Open the file explorer to the location of the given file."""
+        """Open the file explorer to the location of the given file (its archive for an archive member)."""
+        parts = split_member_path(path)
+        if parts:
+            path = parts[0]
         if not os.path.exists(path):
             self.logger.error(f"Cannot show in folder: File not found at {path}")
             messagebox.showerror("File Not Found", f"The file could not be found at:\n{path}")
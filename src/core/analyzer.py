@@ -8,15 +8,21 @@ from pathlib import Path
 from dotenv import load_dotenv
 from typing import Optional, Dict
 from utils.logger import setup_logger
+from utils import metrics
+from core.model_router import DEFAULT_ROUTING, ROUTINGS, ModelRouter
+from utils.archives import read_bytes, size_and_mtime
 import google.generativeai as genai
 
 logger = setup_logger()
 load_dotenv()
 
+DEFAULT_REQUEST_TIMEOUT = 60
+
 class GeminiImageAnalyzer:
     def __init__(self):
         self.api_key = None
         self.base_url = "https://generativelanguage.googleapis.com/v1beta/models"
+        self.router = ModelRouter(self.load_routing())
         self.load_api_key()
 
     def load_api_key(self):
@@ -50,37 +56,58 @@ class GeminiImageAnalyzer:
             logger.error(f"Error during API key validation: {str(e)}")
             raise e
 
+    def load_routing(self):
+        """
+        Returns the model tiers named by GEMINI_ROUTING ("default" or "economy",
+        which sends small images to a cheaper model first).
+        """
+        routing = os.getenv("GEMINI_ROUTING", DEFAULT_ROUTING).strip().lower()
+        if routing not in ROUTINGS:
+            logger.warning(f"Unknown GEMINI_ROUTING '{routing}'; using '{DEFAULT_ROUTING}'.")
+            routing = DEFAULT_ROUTING
+        return ROUTINGS[routing]
+
     def encode_file_to_base64(self, file_path: str) -> str:
         """
         Encodes a file to base64 format.
 
         Args:
-            file_path (str): Path to the file.
+            file_path (str): Path to the file, or to a member inside an archive.
 
         Returns:
             str: Base64 encoded file data.
         """
         try:
-            with open(file_path, "rb") as file:
-                return base64.b64encode(file.read()).decode("utf-8")
+            return base64.b64encode(read_bytes(file_path)).decode("utf-8")
         except Exception as e:
             logger.error(f"Error encoding file to base64: {str(e)}")
             return None
 
-    def get_file_analysis(self, question: str, file_path: str):
+    def get_file_analysis(self, question: str, file_path: str, timeout: float = DEFAULT_REQUEST_TIMEOUT):
         """
         Sends a request to the Gemini API and returns the response for a file.
+
+        The model is picked by the router from the file's type, size and recent
+        latencies; a request outliving the model's p95 is hedged with a duplicate.
+
+        Args:
+            question (str): Question to ask about the file.
+            file_path (str): Path to the image or PDF.
+            timeout (float): Seconds after which the request is abandoned, hedges included.
+
+        Raises:
+            TimeoutError: If no answer arrived within the deadline; the file can be retried.
         """
         try:
             mime_type, _ = mimetypes.guess_type(file_path)
             if not mime_type:
                 return "Error: Could not determine MIME type."
 
-            file_data = self.encode_file_to_base64(file_path)
+            with metrics.timer("pipeline_stage_seconds", stage="encode"):
+                file_data = self.encode_file_to_base64(file_path)
             if not file_data:
                 return f"Error: Failed to encode {mime_type.split('/')[1]}."
 
-            model = genai.GenerativeModel("gemini-2.0-flash")
             prompt = (
                 f"{question} From the {mime_type.split('/')[1]}, extract the most relevant date, the total amount, "
                 "a suggested category (like Food, Travel, Office, Shopping, Medical, Other), and a comma-separated list of tags. "
@@ -88,13 +115,28 @@ class GeminiImageAnalyzer:
                 "Return only a JSON object with keys 'date', 'amount', 'category', and 'tags'. "
                 "If a field is not found, set it to null."
             )
-            response = model.generate_content([
-                question,
-                {"mime_type": mime_type, "data": file_data},
-                prompt
-            ])
-            return response.text
+            tier = self.router.route(mime_type, size_and_mtime(file_path)[0])
+
+            def send(model_name: str, attempt_timeout: float) -> str:
+                metrics.inc("api_bytes_uploaded_total", len(file_data))
+                model = genai.GenerativeModel(model_name)
+                response = model.generate_content([
+                    question,
+                    {"mime_type": mime_type, "data": file_data},
+                    prompt
+                ], request_options={"timeout": attempt_timeout})
+                return response.text
+
+            with metrics.timer("pipeline_stage_seconds", stage="api"):
+                text = self.router.call(tier, send, timeout)
+            metrics.inc("api_requests_total", outcome="ok")
+            return text
+        except TimeoutError as e:
+            metrics.inc("api_requests_total", outcome="deadline")
+            logger.warning(f"Gemini API request for {file_path} missed its deadline: {e}")
+            raise
         except Exception as e:
+            metrics.inc("api_requests_total", outcome="error")
             logger.error(f"Error during Gemini API request: {str(e)}")
             return f"Error: {str(e)}"
 
@@ -0,0 +1,51 @@
+import threading
+from typing import Callable, List
+
+
+class OperationCancelledError(Exception):
+    """Raised by CancellationToken.raise_if_cancelled once cancellation was requested."""
+
+
+class CancellationToken:
+    """
+    A thread-safe flag the UI sets to ask a running pipeline to stop.
+
+    The pipeline checks it before dispatching new work, and code that can abort
+    early registers a callback with on_cancel. Pass a multiprocessing Event to
+    share the flag with worker processes; callbacks stay local to each process.
+    """
+
+    def __init__(self, event=None):
+        self._event = event if event is not None else threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Requests cancellation and runs the registered callbacks once."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Registers a callback; it runs immediately if cancellation was already requested."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise OperationCancelledError("Operation cancelled.")
+
+    def wait(self, timeout: float) -> bool:
+        """Sleeps up to timeout seconds, returning early (True) if cancelled."""
+        return self._event.wait(timeout)
@@ -0,0 +1,148 @@
+from utils.logger import setup_logger
+from typing import Generator, List, Optional, Sequence, Tuple
+import csv
+import importlib.util
+import os
+import sqlite3
+
+logger = setup_logger()
+
+EXPORT_COLUMNS = ("id", "amount", "date", "original_path", "rename_name", "category", "tags")
+EXPORT_FORMATS = ("csv", "xlsx", "parquet")
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def available_formats() -> Tuple[str, ...]:
+    """EXPORT_FORMATS whose optional writer library is installed."""
+    return tuple(fmt for fmt in EXPORT_FORMATS
+                 if fmt != "parquet" or importlib.util.find_spec("pyarrow") is not None)
+
+
+def build_export_query(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                       category: Optional[str] = None) -> Tuple[str, List[str]]:
+    """
+    Builds the SELECT used for exporting, with the filters pushed down into SQL.
+
+    Args:
+        start_date (Optional[str]): Inclusive lower bound in YYYY-MM-DD format.
+        end_date (Optional[str]): Inclusive upper bound in YYYY-MM-DD format.
+        category (Optional[str]): Exact category to export.
+
+    Returns:
+        Tuple[str, List[str]]: The query and its parameters.
+    """
+    conditions, params = [], []
+    if start_date:
+        conditions.append("date >= ?")
+        params.append(start_date)
+    if end_date:
+        conditions.append("date <= ?")
+        params.append(end_date)
+    if category:
+        conditions.append("category = ?")
+        params.append(category)
+
+    query = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM ImageData"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY date ASC"
+    return query, params
+
+
+def iter_record_chunks(db_path: str, query: str, params: Sequence,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> Generator[List[tuple], None, None]:
+    """
+    Streams query results from the database in fixed-size chunks.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+def export_records(db_path: str, output_path: str, fmt: Optional[str] = None,
+                   start_date: Optional[str] = None, end_date: Optional[str] = None,
+                   category: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Exports ImageData rows to CSV, XLSX or Parquet without loading the table into memory.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        output_path (str): Destination file.
+        fmt (Optional[str]): One of EXPORT_FORMATS; inferred from the extension when omitted.
+        start_date, end_date, category: Optional filters, applied in SQL.
+        chunk_size (int): Number of rows fetched and written per batch.
+
+    Returns:
+        int: Number of rows written.
+    """
+    fmt = (fmt or os.path.splitext(output_path)[1].lstrip(".") or "csv").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    query, params = build_export_query(start_date, end_date, category)
+    chunks = iter_record_chunks(db_path, query, params, chunk_size)
+
+    writers = {"csv": _write_csv, "xlsx": _write_xlsx, "parquet": _write_parquet}
+    row_count = writers[fmt](chunks, output_path)
+    logger.info(f"Exported {row_count} records to {output_path} as {fmt.upper()}")
+    return row_count
+
+
+def _write_csv(chunks, output_path: str) -> int:
+    row_count = 0
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        for rows in chunks:
+            writer.writerows(rows)
+            row_count += len(rows)
+    return row_count
+
+
+def _write_xlsx(chunks, output_path: str) -> int:
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError("The openpyxl module is required to export data to XLSX. Please install it using 'pip install openpyxl'.")
+
+    # Write-only workbooks stream rows to disk instead of keeping cells in memory.
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("ImageData")
+    sheet.append(EXPORT_COLUMNS)
+    row_count = 0
+    for rows in chunks:
+        for row in rows:
+            sheet.append(row)
+        row_count += len(rows)
+    workbook.save(output_path)
+    return row_count
+
+
+def _write_parquet(chunks, output_path: str) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("The pyarrow module is required to export data to Parquet. Please install it using 'pip install pyarrow'.")
+
+    schema = pa.schema([(column, pa.string()) for column in EXPORT_COLUMNS])
+    row_count = 0
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            batch = pa.record_batch(
+                [pa.array([None if value is None else str(value) for value in column], type=pa.string())
+                 for column in columns],
+                schema=schema
+            )
+            writer.write_batch(batch)
+            row_count += len(rows)
+    return row_count
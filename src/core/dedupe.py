@@ -0,0 +1,197 @@
+from utils.logger import setup_logger
+from utils.db_manager import DatabaseManager, ensure_schema
+from utils.archives import is_member_path, local_file, read_bytes
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import io
+import os
+import numpy as np
+from PIL import Image
+
+logger = setup_logger()
+
+# A 16x16 difference hash (256 bits): 8x8 is too coarse for receipts, where screenshots
+# from the same payment app differ only in a few characters of text.
+HASH_SIZE = 16
+HASH_BITS = HASH_SIZE * HASH_SIZE
+# Maximum Hamming distance at which two receipts look alike. Receipts from the same
+# payment app can be this close even when they record different payments (e.g. the
+# two R700 receipts in inputs/ are 4 apart), so a close hash alone never drops a file.
+DEFAULT_MAX_DISTANCE = 10
+# Tag added to a receipt that looks like an already recorded one, so it can be reviewed.
+REVIEW_TAG = "possible duplicate"
+PDF_RENDER_DPI = 40
+
+
+def dhash(image: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """
+    Computes a difference hash: each bit says whether a pixel is brighter than its right neighbour.
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = np.asarray(small)
+    bits = (pixels[:, :-1] > pixels[:, 1:]).ravel()
+    # Row-major, first pixel as the most significant bit; packbits pads the last byte with zeros.
+    return int.from_bytes(np.packbits(bits).tobytes(), "big") >> (-bits.size % 8)
+
+
+def compute_perceptual_hash(file_path: str) -> Optional[int]:
+    """
+    Computes the dHash of an image file or of the first page of a PDF.
+
+    Returns:
+        Optional[int]: 256-bit hash, or None if the file could not be rendered.
+    """
+    try:
+        if file_path.lower().endswith(".pdf"):
+            from pdf2image import convert_from_path
+            with local_file(file_path) as local_path:
+                pages = convert_from_path(local_path, dpi=PDF_RENDER_DPI, first_page=1, last_page=1)
+            if not pages:
+                return None
+            return dhash(pages[0])
+        with Image.open(io.BytesIO(read_bytes(file_path)) if is_member_path(file_path) else file_path) as img:
+            # draft() lets JPEG decode at reduced size, which is all a 17x16 hash needs.
+            img.draft("L", (64, 64))
+            return dhash(img)
+    except Exception as e:
+        logger.warning(f"Could not compute perceptual hash for {file_path}: {e}")
+        return None
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def format_hash(value: int) -> str:
+    return f"{value:0{HASH_BITS // 4}x}"
+
+
+def receipt_key(amount_value: Optional[float], date) -> Optional[Tuple[float, str]]:
+    """
+    The amount and day a receipt records, or None if either is unknown. Two alike
+    receipts only count as the same payment when their keys are equal.
+    """
+    if amount_value is None or date is None:
+        return None
+    day = date.strftime("%Y-%m-%d") if isinstance(date, datetime) else str(date)[:10]
+    return round(float(amount_value), 2), day
+
+
+class MultiIndexHash:
+    """
+    Multi-index hashing for Hamming-radius lookups.
+
+    The hash is split into max_distance + 1 chunks, each with its own exact-match
+    table. By the pigeonhole principle any hash within max_distance agrees with the
+    query on at least one chunk, so a lookup only verifies the few candidates found
+    in those tables instead of scanning every stored hash.
+    """
+
+    def __init__(self, max_distance: int, bits: int = HASH_BITS):
+        self.max_distance = max_distance
+        chunk_count = max_distance + 1
+        base, extra = divmod(bits, chunk_count)
+        self.chunks = []
+        offset = 0
+        for i in range(chunk_count):
+            width = base + (1 if i < extra else 0)
+            self.chunks.append((offset, (1 << width) - 1))
+            offset += width
+        self.tables: List[Dict[int, List[int]]] = [{} for _ in self.chunks]
+        self.values: List[int] = []
+        self.items: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def add(self, value: int, item: str) -> None:
+        position = len(self.values)
+        self.values.append(value)
+        self.items.append(item)
+        for table, (offset, mask) in zip(self.tables, self.chunks):
+            table.setdefault((value >> offset) & mask, []).append(position)
+
+    def search(self, value: int) -> List[Tuple[int, str]]:
+        """
+        Returns (distance, item) pairs within max_distance of value, closest first.
+        """
+        seen = set()
+        matches = []
+        for table, (offset, mask) in zip(self.tables, self.chunks):
+            for position in table.get((value >> offset) & mask, ()):
+                if position in seen:
+                    continue
+                seen.add(position)
+                distance = hamming_distance(value, self.values[position])
+                if distance <= self.max_distance:
+                    matches.append((distance, self.items[position]))
+        matches.sort()
+        return matches
+
+
+class PerceptualIndex:
+    """
+    Index of perceptual hashes of already recorded receipts, each with its receipt_key,
+    used to find receipts that look like a new one and those that also record the
+    same amount and day.
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.table = MultiIndexHash(max_distance)
+        self.keys: Dict[str, Optional[Tuple[float, str]]] = {}
+
+    @classmethod
+    def from_db(cls, db_path: str, max_distance: int = DEFAULT_MAX_DISTANCE) -> "PerceptualIndex":
+        """
+        Builds an index from the phash column of ImageData.
+        """
+        index = cls(max_distance)
+        if not os.path.exists(db_path):
+            return index
+        try:
+            with DatabaseManager(db_path) as cursor:
+                ensure_schema(cursor)
+                cursor.execute("SELECT phash, original_path, amount_value, date FROM ImageData WHERE phash IS NOT NULL")
+                for phash, original_path, amount_value, date in cursor.fetchall():
+                    index.add(int(phash, 16), original_path, receipt_key(amount_value, date))
+            logger.info(f"Loaded {len(index.table)} perceptual hashes from database.")
+        except Exception as e:
+            logger.error(f"Error loading perceptual hashes: {str(e)}")
+        return index
+
+    def add(self, value: Optional[int], item: str, key: Optional[Tuple[float, str]] = None) -> None:
+        if value is not None:
+            self.table.add(value, item)
+            self.keys[item] = key
+
+    def find_similar(self, value: Optional[int]) -> Optional[str]:
+        """
+        Returns the closest already indexed item within max_distance, if any.
+        """
+        if value is None:
+            return None
+        matches = self.table.search(value)
+        return matches[0][1] if matches else None
+
+    def find_duplicate(self, value: Optional[int], key: Optional[Tuple[float, str]]) -> Optional[str]:
+        """
+        Returns the closest already indexed item within max_distance that also has
+        the given receipt_key, if any.
+        """
+        if value is None or key is None:
+            return None
+        return next((item for _, item in self.table.search(value) if self.keys.get(item) == key), None)
+
+
+def compute_hashes(file_paths: List[str], max_workers: int = 8, executor=None) -> Dict[str, Optional[int]]:
+    """
+    Computes perceptual hashes for many files in a thread pool, or in the given
+    executor (e.g. a process pool, since rasterizing and resizing are CPU-bound).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if executor is not None:
+        return dict(zip(file_paths, executor.map(compute_perceptual_hash, file_paths)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(file_paths, executor.map(compute_perceptual_hash, file_paths)))
@@ -0,0 +1,287 @@
+from utils.logger import setup_logger
+from utils.hashing import hash_file
+from utils.archives import copy_to, is_member_path, path_exists, size_and_mtime
+from utils.blob_store import COMPRESSED_SUFFIX, BlobStore
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import json
+import os
+import shutil
+import sys
+import threading
+
+logger = setup_logger()
+
+MANIFEST_NAME = ".export_manifest.json"
+EXPORT_DIR_PREFIX = "export_files_"
+PART_SUFFIX = ".part"
+MANIFEST_SAVE_INTERVAL = 200
+# Modification times closer than this count as equal (file systems round them differently).
+MTIME_TOLERANCE_SECONDS = 0.001
+
+# ioctl request number for FICLONE (Linux reflink on btrfs/xfs/...).
+FICLONE = 0x40049409
+
+
+def file_digest(path: str) -> str:
+    """
+    Computes a BLAKE2b digest of a file (see utils.hashing.hash_file).
+    """
+    return hash_file(path)
+
+
+def find_resumable_export(base_dir: str) -> Optional[str]:
+    """
+    Returns the most recent export directory whose manifest is not complete.
+
+    Args:
+        base_dir (str): Directory holding the export_files_<timestamp> folders.
+
+    Returns:
+        Optional[str]: Path of the interrupted export, or None if there is none.
+    """
+    if not os.path.isdir(base_dir):
+        return None
+    candidates = sorted(
+        (name for name in os.listdir(base_dir) if name.startswith(EXPORT_DIR_PREFIX)),
+        reverse=True
+    )
+    for name in candidates:
+        manifest_path = os.path.join(base_dir, name, MANIFEST_NAME)
+        try:
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+        if manifest.get("status") != "complete":
+            return os.path.join(base_dir, name)
+    return None
+
+
+def new_export_dir(base_dir: str) -> str:
+    """Returns a fresh, timestamped export directory path under base_dir."""
+    current_date = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(base_dir, f"{EXPORT_DIR_PREFIX}{current_date}")
+
+
+class FileExporter:
+    """
+    Copies files into an export directory using a thread pool.
+
+    Files are cloned (reflink, copy-on-write) whenever source and destination share
+    a filesystem that supports it, otherwise copied in-kernel with copy_file_range.
+    With use_hardlinks, a hard link is tried before copying; the export then shares
+    the file with the source, so editing one edits the other. Destinations that
+    already exist with the source's size and modification time (and digest, if
+    verify_hash is set) are skipped, and a manifest in the export directory lets an
+    interrupted export be resumed.
+
+    With a blob_store, jobs that carry a content hash are exported from the
+    stored blob rather than the original path, so moved source folders do not
+    matter. Blobs are cloned or copied but never hard-linked, so editing an
+    exported file cannot change the store.
+    """
+
+    def __init__(self, export_dir: str, max_workers: int = 8, use_hardlinks: bool = False,
+                 verify_hash: bool = False,
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 blob_store: Optional[BlobStore] = None):
+        self.export_dir = export_dir
+        self.max_workers = max_workers
+        self.use_hardlinks = use_hardlinks
+        self.verify_hash = verify_hash
+        self.progress_callback = progress_callback
+        self.blob_store = blob_store
+        self.manifest_path = os.path.join(export_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+
+    def load_manifest(self) -> Dict:
+        """Loads the manifest of this export directory, or an empty one."""
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"status": "new", "jobs": [], "done": []}
+
+    def save_manifest(self, manifest: Dict) -> None:
+        """Atomically writes the manifest so a crash never leaves it half-written."""
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def export(self, jobs: List[Tuple]) -> Dict[str, object]:
+        """
+        Exports the given files.
+
+        Args:
+            jobs (List[Tuple]): (source path, destination file name) pairs, optionally
+                with the content hash of the file as a third item. When resuming, pass
+                the current selection again: files the manifest records as done for
+                the same job are not checked again, everything else is exported.
+
+        Returns:
+            Dict[str, object]: Counts per outcome plus the list of failed sources.
+        """
+        os.makedirs(self.export_dir, exist_ok=True)
+        manifest = self.load_manifest()
+        # A file only counts as done if it was done for the same source and content hash.
+        previous_jobs = {job[1]: list(job) for job in manifest.get("jobs", [])}
+        current_jobs = {job[1]: list(job) for job in jobs}
+        done = {
+            dest_name for dest_name in manifest.get("done", [])
+            if dest_name in current_jobs and previous_jobs.get(dest_name) == current_jobs[dest_name]
+        }
+        if manifest.get("jobs"):
+            logger.info(f"Resuming export in {self.export_dir} ({len(done)} of {len(jobs)} files already done)")
+        manifest = {"status": "in_progress", "jobs": [list(job) for job in jobs], "done": sorted(done)}
+        self.save_manifest(manifest)
+
+        summary = {"linked": 0, "copied": 0, "skipped": 0, "failed": 0, "failed_files": []}
+        total = len(jobs)
+        completed = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._export_one, source, dest_name, dest_name in done, *digest): (source, dest_name)
+                for source, dest_name, *digest in jobs
+            }
+            for future in as_completed(futures):
+                source, dest_name = futures[future]
+                try:
+                    outcome = future.result()
+                    summary[outcome] += 1
+                    done.add(dest_name)
+                except Exception as e:
+                    summary["failed"] += 1
+                    summary["failed_files"].append(source)
+                    logger.error(f"Error exporting {source}: {str(e)}")
+
+                completed += 1
+                if completed % MANIFEST_SAVE_INTERVAL == 0:
+                    manifest["done"] = sorted(done)
+                    self.save_manifest(manifest)
+                if self.progress_callback:
+                    self.progress_callback(completed, total)
+
+        manifest["done"] = sorted(done)
+        manifest["status"] = "complete" if not summary["failed"] else "in_progress"
+        self.save_manifest(manifest)
+        logger.info(
+            f"Export finished: {summary['linked']} linked, {summary['copied']} copied, "
+            f"{summary['skipped']} skipped, {summary['failed']} failed"
+        )
+        return summary
+
+    def _export_one(self, source: str, dest_name: str, recorded_done: bool, digest: Optional[str] = None) -> str:
+        """Exports a single file and returns 'linked', 'copied' or 'skipped'."""
+        blob_path = self.blob_store.blob_path(digest) if self.blob_store is not None else None
+        if blob_path is not None and blob_path.endswith(COMPRESSED_SUFFIX):
+            return self._export_compressed_blob(digest, os.path.join(self.export_dir, dest_name), recorded_done)
+        if blob_path is not None:
+            source = blob_path
+        may_link = self.use_hardlinks and blob_path is None
+        if not path_exists(source):
+            raise FileNotFoundError(f"File not found: {source}")
+        # Archive members are always copied out of their archive.
+        member = is_member_path(source)
+
+        dest = os.path.join(self.export_dir, dest_name)
+        if self._is_up_to_date(source, dest, recorded_done, may_link):
+            return "skipped"
+
+        if os.path.exists(dest):
+            os.remove(dest)
+
+        if not member and os.stat(source).st_dev == os.stat(self.export_dir).st_dev:
+            if self._try_reflink(source, dest):
+                return "linked"
+            if may_link:
+                try:
+                    os.link(source, dest)
+                    return "linked"
+                except OSError:
+                    pass
+
+        # Copy to a .part file first so an interrupted copy never looks complete.
+        part_path = dest + PART_SUFFIX
+        if member:
+            copy_to(source, part_path)
+            # Stamp it with the archive's modification time, which _is_up_to_date compares.
+            mtime = size_and_mtime(source)[1]
+            os.utime(part_path, (mtime, mtime))
+        else:
+            self._copy_file(source, part_path)
+            shutil.copystat(source, part_path)
+        os.replace(part_path, dest)
+        return "copied"
+
+    def _export_compressed_blob(self, digest: str, dest: str, recorded_done: bool) -> str:
+        """Writes the decompressed content of a stored blob to dest."""
+        if os.path.exists(dest):
+            # The blob's name is the content hash, so one hash of dest tells if it matches.
+            if recorded_done or file_digest(dest) == digest:
+                return "skipped"
+            os.remove(dest)
+        part_path = dest + PART_SUFFIX
+        with open(part_path, "wb") as f:
+            f.write(self.blob_store.read(digest))
+        os.replace(part_path, dest)
+        return "copied"
+
+    def _is_up_to_date(self, source: str, dest: str, recorded_done: bool, may_link: bool = False) -> bool:
+        """
+        Checks whether dest already holds the same content as source. A dest that
+        is a hard link to source only counts if it may be one.
+        """
+        try:
+            dest_stat = os.stat(dest)
+        except FileNotFoundError:
+            return False
+        if is_member_path(source):
+            source_size, source_mtime = size_and_mtime(source)
+        else:
+            source_stat = os.stat(source)
+            if (dest_stat.st_dev, dest_stat.st_ino) == (source_stat.st_dev, source_stat.st_ino):
+                return may_link
+            source_size, source_mtime = source_stat.st_size, source_stat.st_mtime
+        # Exports carry the source's modification time, so a differing one means
+        # either side changed since, even if the size did not.
+        if dest_stat.st_size != source_size or abs(dest_stat.st_mtime - source_mtime) > MTIME_TOLERANCE_SECONDS:
+            return False
+        if self.verify_hash and not recorded_done:
+            return file_digest(source) == file_digest(dest)
+        return True
+
+    def _try_reflink(self, source: str, dest: str) -> bool:
+        """Attempts a copy-on-write clone; returns False where unsupported."""
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            import fcntl
+            with open(source, "rb") as src, open(dest, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            shutil.copystat(source, dest)
+            return True
+        except (ImportError, OSError):
+            if os.path.exists(dest):
+                os.remove(dest)
+            return False
+
+    def _copy_file(self, source: str, dest: str) -> None:
+        """Copies file data in-kernel where possible, falling back to shutil."""
+        if hasattr(os, "copy_file_range"):
+            try:
+                with open(source, "rb") as src, open(dest, "wb") as dst:
+                    remaining = os.fstat(src.fileno()).st_size
+                    while remaining > 0:
+                        copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                        if copied == 0:
+                            break
+                        remaining -= copied
+                if remaining == 0:
+                    return
+            except OSError:
+                pass
+        shutil.copyfile(source, dest)
@@ -0,0 +1,126 @@
+from utils.logger import setup_logger
+from datetime import datetime
+from typing import Dict, List, Optional
+import json
+import os
+import random
+import re
+
+logger = setup_logger()
+
+RULES_CONFIG_PATH = os.path.join("config", "filename_rules.json")
+DEFAULT_MIN_CONFIDENCE = 0.9
+DEFAULT_VERIFY_SAMPLE_RATE = 0.0
+
+# Each pattern is matched against the file name without extension and must provide
+# the named groups day, month, year and amount.
+DEFAULT_RULES = [
+    {
+        # 02_18042025_R800 -> sequence number, DDMMYYYY, amount
+        "name": "index_ddmmyyyy_amount",
+        "pattern": r"^\d+_(?P<day>\d{2})(?P<month>\d{2})(?P<year>\d{4})_RS?(?P<amount>\d+(?:\.\d+)?)$",
+        "confidence": 0.95,
+    },
+    {
+        # s1_20_01_2025_RS82 or an exported 01_20_01_2025_RS82 -> prefix, DD_MM_YYYY, amount
+        "name": "prefix_dd_mm_yyyy_amount",
+        "pattern": r"^(?:[A-Za-z]*\d*_)?(?P<day>\d{1,2})_(?P<month>\d{1,2})_(?P<year>\d{4})_RS?(?P<amount>\d+(?:\.\d+)?)$",
+        "confidence": 0.95,
+    },
+]
+
+
+class FilenameRuleExtractor:
+    """
+    Extracts date and amount from file names that already encode them, so such
+    receipts can be recorded without a model call.
+
+    Rules are read from config/filename_rules.json when present:
+
+        {
+            "enabled": true,
+            "min_confidence": 0.9,
+            "verify_sample_rate": 0.05,
+            "rules": [{"name": "...", "pattern": "...", "confidence": 0.95,
+                       "category": "Travel", "tags": ["scanner"]}]
+        }
+    """
+
+    def __init__(self, config_path: str = RULES_CONFIG_PATH):
+        self.enabled = True
+        self.min_confidence = DEFAULT_MIN_CONFIDENCE
+        self.verify_sample_rate = DEFAULT_VERIFY_SAMPLE_RATE
+        rules = DEFAULT_RULES
+        try:
+            with open(config_path, "r") as f:
+                config = json.load(f)
+            self.enabled = config.get("enabled", True)
+            self.min_confidence = config.get("min_confidence", DEFAULT_MIN_CONFIDENCE)
+            self.verify_sample_rate = config.get("verify_sample_rate", DEFAULT_VERIFY_SAMPLE_RATE)
+            rules = config.get("rules", DEFAULT_RULES)
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError as e:
+            logger.error(f"Invalid filename rules config {config_path}: {e}. Using default rules.")
+
+        self.rules = []
+        for rule in rules:
+            try:
+                self.rules.append({**rule, "regex": re.compile(rule["pattern"], re.IGNORECASE)})
+            except (KeyError, re.error) as e:
+                logger.error(f"Skipping invalid filename rule {rule.get('name', rule)}: {e}")
+
+    def extract(self, file_path: str) -> Optional[Dict[str, object]]:
+        """
+        Matches the file name against the rules.
+
+        Returns:
+            Optional[Dict[str, object]]: A record shaped like the model's JSON answer
+            (date, amount, category, tags) plus 'rule' and 'confidence', or None if no
+            rule matched with at least min_confidence.
+        """
+        if not self.enabled:
+            return None
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        for rule in self.rules:
+            confidence = rule.get("confidence", DEFAULT_MIN_CONFIDENCE)
+            if confidence < self.min_confidence:
+                continue
+            match = rule["regex"].match(stem)
+            if not match:
+                continue
+            try:
+                date = datetime(int(match.group("year")), int(match.group("month")), int(match.group("day")))
+                amount = float(match.group("amount"))
+            except (IndexError, ValueError):
+                continue
+            if amount <= 0:
+                continue
+            return {
+                "date": date.strftime("%d_%m_%Y"),
+                "amount": match.group("amount"),
+                "category": rule.get("category"),
+                "tags": rule.get("tags"),
+                "rule": rule.get("name", rule["pattern"]),
+                "confidence": confidence,
+            }
+        return None
+
+    def should_verify(self) -> bool:
+        """Whether a rule hit should also be sent to the model as a spot check."""
+        return self.verify_sample_rate > 0 and random.random() < self.verify_sample_rate
+
+
+def rule_matches_model(rule_data: Dict[str, object], model_data: Dict[str, object]) -> bool:
+    """
+    Compares a rule result with the model's answer for the same file.
+    """
+    from core.normalizer import normalize_amount, parse_date
+
+    rule_amount, _ = normalize_amount(rule_data.get("amount"))
+    model_amount, _ = normalize_amount(model_data.get("amount"))
+    return (
+        rule_amount is not None and model_amount is not None
+        and abs(rule_amount - model_amount) < 0.01
+        and parse_date(rule_data.get("date")) == parse_date(model_data.get("date"))
+    )
@@ -0,0 +1,202 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+from utils.logger import setup_logger
+from utils import metrics
+
+logger = setup_logger()
+
+T = TypeVar("T")
+
+# Recent request latencies kept per model for the routing and hedging decisions.
+LATENCY_WINDOW = 200
+# Quantiles are only trusted once a model has this many samples.
+MIN_LATENCY_SAMPLES = 20
+# A request still running after the model's observed p95 gets one duplicate.
+HEDGE_QUANTILE = 0.95
+# At most this fraction of requests may be hedged, so a slow model is not flooded.
+HEDGE_BUDGET = 0.1
+HEDGE_MAX_WORKERS = 32
+# A running request cannot be cancelled, so an attempt that lost its race or missed
+# its deadline keeps running (and is billed) until its own timeout. No hedge is sent
+# while this many such attempts are still running.
+MAX_ABANDONED_ATTEMPTS = 4
+
+
+class ModelTier:
+    """
+    A model the router can send a file to.
+
+    Args:
+        name (str): Gemini model name.
+        deadline (float): Seconds a request may take, hedges included.
+        max_bytes (Optional[int]): Largest file the tier is picked for; None for any size.
+        images_only (bool): Whether PDFs skip this tier.
+    """
+
+    def __init__(self, name: str, deadline: float, max_bytes: Optional[int] = None, images_only: bool = False):
+        self.name = name
+        self.deadline = deadline
+        self.max_bytes = max_bytes
+        self.images_only = images_only
+
+    def accepts(self, mime_type: str, size: int) -> bool:
+        if self.images_only and not mime_type.startswith("image/"):
+            return False
+        return self.max_bytes is None or size <= self.max_bytes
+
+    def __repr__(self):
+        return f"ModelTier({self.name!r})"
+
+
+# Tier lists in order of preference; the last tier must accept every file. By
+# default every file goes to the model the app has always used; the economy
+# routing sends small images to the cheaper flash-lite model first.
+MODEL_TIERS = (
+    ModelTier("gemini-2.0-flash", deadline=60.0),
+)
+ECONOMY_MODEL_TIERS = (
+    ModelTier("gemini-2.0-flash-lite", deadline=20.0, max_bytes=1024 * 1024, images_only=True),
+) + MODEL_TIERS
+ROUTINGS = {"default": MODEL_TIERS, "economy": ECONOMY_MODEL_TIERS}
+DEFAULT_ROUTING = "default"
+
+
+class ModelRouter:
+    """
+    Picks a model tier per file and runs requests against it with a deadline and
+    hedging.
+
+    A file goes to the first tier that accepts it unless that tier's recent p95
+    latency has drifted past its deadline, in which case the next healthy tier is
+    used. A request still running after the tier's observed p95 is duplicated once
+    and whichever answer arrives first wins, so a batch finishes close to the
+    median latency instead of waiting on its slowest request. Hedges are limited
+    to hedge_budget of all requests and are not sent while MAX_ABANDONED_ATTEMPTS
+    losing or late attempts are still running.
+    """
+
+    def __init__(self, tiers: Tuple[ModelTier, ...] = MODEL_TIERS, hedge_budget: float = HEDGE_BUDGET):
+        self.tiers = tiers
+        self.hedge_budget = hedge_budget
+        self.latencies: Dict[str, deque] = {tier.name: deque(maxlen=LATENCY_WINDOW) for tier in tiers}
+        self.requests = 0
+        self.hedges = 0
+        # Attempts still running after call() gave up on them.
+        self.abandoned = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="model")
+
+    def route(self, mime_type: str, size: int) -> ModelTier:
+        """
+        Returns the tier for a file of the given MIME type and size in bytes.
+        """
+        candidates = [tier for tier in self.tiers if tier.accepts(mime_type, size)] or [self.tiers[-1]]
+        for tier in candidates:
+            p95 = self.quantile(tier.name, HEDGE_QUANTILE)
+            if p95 is None or p95 < tier.deadline:
+                return tier
+        # Every candidate is degraded; take the one with the best median.
+        return min(candidates, key=lambda tier: self.quantile(tier.name, 0.5) or 0.0)
+
+    def record(self, model: str, seconds: float) -> None:
+        with self._lock:
+            self.latencies.setdefault(model, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+        metrics.observe("api_request_seconds", seconds, model=model)
+
+    def quantile(self, model: str, q: float) -> Optional[float]:
+        """
+        Returns the q-quantile of the model's recent latencies, or None while there
+        are fewer than MIN_LATENCY_SAMPLES.
+        """
+        with self._lock:
+            samples = sorted(self.latencies.get(model, ()))
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.hedge_budget * self.requests or self.abandoned >= MAX_ABANDONED_ATTEMPTS:
+                return False
+            self.hedges += 1
+            return True
+
+    def _abandon(self, attempts) -> None:
+        """Cancels attempts that have not started and counts the ones left running."""
+        for attempt in attempts:
+            if attempt.cancel():
+                continue
+            with self._lock:
+                self.abandoned += 1
+            metrics.inc("api_abandoned_attempts_total")
+            attempt.add_done_callback(self._finish_abandoned)
+
+    def _finish_abandoned(self, _attempt) -> None:
+        with self._lock:
+            self.abandoned -= 1
+
+    def _attempt(self, tier: ModelTier, send: Callable[[str, float], T], timeout: float) -> T:
+        started = time.monotonic()
+        try:
+            result = send(tier.name, timeout)
+        except Exception:
+            elapsed = time.monotonic() - started
+            # A timed-out request is a latency sample too; a fast error is not.
+            if elapsed >= timeout:
+                self.record(tier.name, elapsed)
+            raise
+        self.record(tier.name, time.monotonic() - started)
+        return result
+
+    def call(self, tier: ModelTier, send: Callable[[str, float], T], timeout: Optional[float] = None) -> T:
+        """
+        Runs send(model_name, timeout_seconds) for the tier within its deadline,
+        hedging it once if it outlives the tier's observed p95.
+
+        Raises:
+            TimeoutError: If no attempt succeeded before the deadline.
+            Exception: The first attempt's error if every attempt failed.
+        """
+        deadline = min(tier.deadline, timeout) if timeout else tier.deadline
+        started = time.monotonic()
+        expires = started + deadline
+        with self._lock:
+            self.requests += 1
+        hedge_after = self.quantile(tier.name, HEDGE_QUANTILE)
+        if hedge_after is not None and hedge_after >= deadline:
+            hedge_after = None
+
+        # future -> whether it is the hedge
+        attempts = {self._executor.submit(self._attempt, tier, send, deadline): False}
+        hedged = False
+        first_error = None
+        while attempts:
+            now = time.monotonic()
+            if now >= expires:
+                break
+            wait_for = expires - now
+            if hedge_after is not None:
+                wait_for = min(wait_for, max(0.0, started + hedge_after - now))
+            done, _ = wait(attempts, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for attempt in done:
+                is_hedge = attempts.pop(attempt)
+                if attempt.exception() is None:
+                    if hedged:
+                        metrics.inc("api_hedges_total", winner="hedge" if is_hedge else "primary")
+                    self._abandon(attempts)
+                    return attempt.result()
+                first_error = first_error or attempt.exception()
+            if not done and hedge_after is not None and time.monotonic() < expires:
+                if self._take_hedge():
+                    hedged = True
+                    logger.info(f"{tier.name} request slower than its p95 ({hedge_after:.1f} s); sending a hedge.")
+                    attempts[self._executor.submit(self._attempt, tier, send, expires - time.monotonic())] = True
+                hedge_after = None
+        if first_error is not None and not attempts:
+            raise first_error
+        # The abandoned attempts finish in the background, bounded by their own timeout.
+        self._abandon(attempts)
+        raise TimeoutError(f"No response from {tier.name} within {deadline:g} s.")
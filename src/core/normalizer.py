@@ -0,0 +1,211 @@
+from utils.logger import setup_logger
+from utils.db_manager import DatabaseManager, bump_data_version, ensure_schema, log_changed_rowids
+from datetime import datetime
+from typing import Optional, Tuple
+import re
+import time
+import numpy as np
+import pandas as pd
+
+logger = setup_logger()
+
+DEFAULT_CURRENCY = "INR"
+# Stored as the currency of a row whose amount was normalized but held no number,
+# so the backfill does not pick the row up again; NULL means not normalized yet.
+UNPARSED_CURRENCY = ""
+BACKFILL_CHUNK_SIZE = 100000
+
+# Currency markers in the order they are tried; the first match wins.
+CURRENCY_PATTERNS = (
+    (r"₹|\bINR\b|\bRS\.?|\bRs\.?|\bRe\.?|^R(?=\s*\d)", "INR"),
+    (r"\$|\bUSD\b|\bUS\$", "USD"),
+    (r"€|\bEUR\b", "EUR"),
+    (r"£|\bGBP\b", "GBP"),
+)
+CURRENCY_REGEXES = tuple((re.compile(pattern, re.IGNORECASE), code) for pattern, code in CURRENCY_PATTERNS)
+AMOUNT_NUMBER_PATTERN = r"([-+]?\d[\d,\s]*(?:\.\d+)?)"
+AMOUNT_NUMBER_REGEX = re.compile(AMOUNT_NUMBER_PATTERN)
+
+# Date formats the model and manual edits commonly produce, most common first.
+DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%d_%m_%Y",
+    "%d-%m-%Y",
+    "%d/%m/%Y",
+    "%d.%m.%Y",
+    "%Y/%m/%d",
+    "%Y_%m_%d",
+    "%d%m%Y",
+    "%Y%m%d",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%b %d, %Y",
+    "%B %d, %Y",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+)
+DB_DATE_FORMAT = "%Y-%m-%d"
+
+
+def normalize_amount(value) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Parses one raw amount such as "RS82", "₹1,200.50" or "$ 12" into (value, currency).
+
+    Returns:
+        Tuple[Optional[float], Optional[str]]: The numeric value (None if no number was
+        found) and the ISO currency code (None if no number was found).
+    """
+    if value is None:
+        return None, None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value), DEFAULT_CURRENCY
+    text = str(value).strip()
+    match = AMOUNT_NUMBER_REGEX.search(text)
+    if not match:
+        return None, None
+    try:
+        amount = float(re.sub(r"[,\s]", "", match.group(1)))
+    except ValueError:
+        return None, None
+    currency = next((code for regex, code in CURRENCY_REGEXES if regex.search(text)), DEFAULT_CURRENCY)
+    return amount, currency
+
+
+def parse_date(value) -> Optional[datetime]:
+    """
+    Parses one date string by trying DATE_FORMATS in order.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    text = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _on_distinct_values(values: pd.Series, normalize):
+    """
+    Applies a vectorized normalizer to the distinct values of a column only and maps
+    the result back; receipts repeat amounts and dates heavily, so this saves most work.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    result = normalize(pd.Series(uniques, dtype=object))
+    # Append one all-NA row so the -1 code of missing values maps onto it.
+    result = pd.concat([result, result.iloc[:0].reindex([len(result)])])
+    taken = result.iloc[codes]
+    taken.index = values.index
+    return taken
+
+
+def normalize_amounts(values: pd.Series) -> pd.DataFrame:
+    """
+    Vectorized version of normalize_amount over a whole column.
+
+    Returns:
+        pd.DataFrame: Columns 'amount_value' (float, NaN if unparsable) and 'currency'.
+    """
+    return _on_distinct_values(values, _normalize_distinct_amounts)
+
+
+def normalize_dates(values: pd.Series) -> pd.Series:
+    """
+    Vectorized version of parse_date: each format is applied to all still-unparsed rows at once.
+
+    Returns:
+        pd.Series: Dates as YYYY-MM-DD strings, <NA> where no format matched.
+    """
+    return _on_distinct_values(values, _normalize_distinct_dates)
+
+
+def _normalize_distinct_amounts(values: pd.Series) -> pd.DataFrame:
+    text = values.astype("string").str.strip()
+    number = text.str.extract(AMOUNT_NUMBER_PATTERN, expand=False)
+    amount_value = pd.to_numeric(number.str.replace(r"[,\s]", "", regex=True), errors="coerce")
+
+    currency = pd.Series(pd.NA, index=values.index, dtype="string")
+    for regex, code in CURRENCY_REGEXES:
+        unmatched = currency.isna()
+        if not unmatched.any():
+            break
+        matched = text[unmatched].str.contains(regex, na=False)
+        currency[matched.index[matched.to_numpy(dtype=bool)]] = code
+    currency = currency.fillna(DEFAULT_CURRENCY).where(amount_value.notna(), pd.NA)
+
+    return pd.DataFrame({"amount_value": amount_value.astype("float64"), "currency": currency})
+
+
+def _normalize_distinct_dates(values: pd.Series) -> pd.Series:
+    text = values.astype("string").str.strip()
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        remaining = parsed.isna() & text.notna()
+        if not remaining.any():
+            break
+        parsed[remaining] = pd.to_datetime(text[remaining], format=fmt, errors="coerce")
+    return parsed.dt.strftime(DB_DATE_FORMAT).astype("string")
+
+
+def backfill_normalized_columns(db_path: str, only_missing: bool = True,
+                                chunk_size: int = BACKFILL_CHUNK_SIZE) -> int:
+    """
+    Fills amount_value/currency and rewrites dates to YYYY-MM-DD for existing rows.
+
+    Rows are read in rowid order chunk by chunk, normalized with vectorized string
+    operations, and written back with executemany in a single transaction.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        only_missing (bool): Only touch rows whose amount has not been normalized yet.
+        chunk_size (int): Rows normalized per batch.
+
+    Returns:
+        int: Number of rows updated.
+    """
+    start = time.perf_counter()
+    select_query = "SELECT rowid, amount, date FROM ImageData WHERE rowid > ?"
+    if only_missing:
+        select_query += " AND amount_value IS NULL AND currency IS NULL AND amount IS NOT NULL"
+    select_query += " ORDER BY rowid LIMIT ?"
+    update_query = "UPDATE ImageData SET amount_value = ?, currency = ?, date = COALESCE(?, date) WHERE rowid = ?"
+
+    updated = 0
+    try:
+        with DatabaseManager(db_path) as cursor:
+            ensure_schema(cursor)
+            last_rowid = 0
+            while True:
+                cursor.execute(select_query, (last_rowid, chunk_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                frame = pd.DataFrame(rows, columns=["rowid", "amount", "date"])
+                amounts = normalize_amounts(frame["amount"])
+                dates = normalize_dates(frame["date"])
+
+                amount_values = amounts["amount_value"].to_numpy(dtype=object)
+                amount_values[np.isnan(amounts["amount_value"].to_numpy())] = None
+                currencies = amounts["currency"].astype(object).where(amounts["currency"].notna(), None)
+                currencies[currencies.isna() & frame["amount"].notna()] = UNPARSED_CURRENCY
+                normalized_dates = dates.astype(object).where(dates.notna(), None)
+
+                cursor.executemany(update_query, zip(
+                    amount_values.tolist(),
+                    currencies.tolist(),
+                    normalized_dates.tolist(),
+                    frame["rowid"].tolist()
+                ))
+                log_changed_rowids(cursor, frame["rowid"].tolist())
+                updated += len(rows)
+                last_rowid = int(frame["rowid"].iloc[-1])
+            if updated:
+                bump_data_version(cursor)
+        logger.info(f"Normalized {updated} rows in {time.perf_counter() - start:.2f}s.")
+    except Exception as e:
+        logger.error(f"Error in backfill_normalized_columns function during execution: {str(e)}")
+        raise
+    return updated
@@ -0,0 +1,140 @@
+from utils.logger import setup_logger
+from utils.archives import is_member_path, local_file, read_bytes
+from typing import Dict, List, Optional, Tuple
+import io
+import re
+import shutil
+
+logger = setup_logger()
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+DEFAULT_MIN_CONFIDENCE = 0.8
+DEFAULT_TIMEOUT = 60
+PDF_OCR_DPI = 200
+
+# The amount after a total label must carry a currency marker or look like money
+# (paise/cents or digit grouping), so counts such as "Total items 3" are not taken for it.
+TOTAL_LINE_REGEX = re.compile(
+    r"(grand\s*total|net\s*amount|amount\s*paid|total\s*amount|balance\s*due|total|paid)\D{0,20}?"
+    r"(?P<amount>(?:₹|rs\.?|inr|\$|€|£)\s*\d[\d,]*(?:\.\d{1,2})?|\d{1,3}(?:,\d{2,3})+(?:\.\d{1,2})?|\d+\.\d{2})(?![\d.])",
+    re.IGNORECASE
+)
+CURRENCY_AMOUNT_REGEX = re.compile(r"(?:₹|rs\.?|inr)\s*(?P<amount>\d[\d,]*(?:\.\d{1,2})?)", re.IGNORECASE)
+DATE_CANDIDATE_REGEX = re.compile(
+    r"\b(\d{1,2}[/\-._]\d{1,2}[/\-._]\d{4}|\d{4}[/\-._]\d{1,2}[/\-._]\d{1,2}|"
+    r"\d{1,2}\s+[A-Za-z]{3,9}\s+\d{4}|[A-Za-z]{3,9}\s+\d{1,2},\s*\d{4})\b"
+)
+
+
+def tesseract_available() -> bool:
+    """Whether pytesseract and the tesseract binary are both installed."""
+    return pytesseract is not None and shutil.which(getattr(pytesseract.pytesseract, "tesseract_cmd", "tesseract")) is not None
+
+
+def _load_pages(file_path: str) -> List:
+    if file_path.lower().endswith(".pdf"):
+        from pdf2image import convert_from_path
+        with local_file(file_path) as local_path:
+            return convert_from_path(local_path, dpi=PDF_OCR_DPI, first_page=1, last_page=1)
+    from PIL import Image
+    with Image.open(io.BytesIO(read_bytes(file_path)) if is_member_path(file_path) else file_path) as img:
+        return [img.convert("L")]
+
+
+def parse_receipt_text(text: str) -> Tuple[Optional[str], Optional[str], float]:
+    """
+    Finds the total and the date in OCR text.
+
+    Returns:
+        Tuple[Optional[str], Optional[str], float]: amount, date and a 0-1 score of how
+        unambiguous the matches were.
+    """
+    from core.normalizer import normalize_amount, parse_date
+
+    score = 1.0
+    amount = None
+    total_matches = [match.group("amount").strip() for match in TOTAL_LINE_REGEX.finditer(text)]
+    if total_matches:
+        # Receipts list subtotals before the grand total, so the last total line wins.
+        amount = total_matches[-1]
+    else:
+        currency_matches = [match.group("amount") for match in CURRENCY_AMOUNT_REGEX.finditer(text)]
+        if currency_matches:
+            amount = max(currency_matches, key=lambda value: normalize_amount(value)[0] or 0.0)
+            score *= 0.85
+    if amount is None or normalize_amount(amount)[0] is None:
+        return None, None, 0.0
+
+    date = None
+    for candidate in DATE_CANDIDATE_REGEX.findall(text):
+        parsed = parse_date(re.sub(r"[/.\-]", "_", candidate)) or parse_date(candidate)
+        if parsed:
+            date = parsed.strftime("%d_%m_%Y")
+            break
+    if date is None:
+        return amount, None, 0.0
+    return amount, date, score
+
+
+def ocr_extract(file_path: str, timeout: float = DEFAULT_TIMEOUT) -> Dict[str, object]:
+    """
+    Runs Tesseract on a receipt and extracts its date and total.
+
+    Returns:
+        Dict[str, object]: 'date', 'amount' and 'confidence' (0-1), where confidence combines
+        Tesseract's mean word confidence with how unambiguous the regex matches were.
+    """
+    pages = _load_pages(file_path)
+    if not pages:
+        return {"date": None, "amount": None, "confidence": 0.0}
+
+    data = pytesseract.image_to_data(pages[0], output_type=pytesseract.Output.DICT, timeout=timeout)
+    words = [(word, float(conf)) for word, conf in zip(data["text"], data["conf"]) if word.strip() and float(conf) >= 0]
+    if not words:
+        return {"date": None, "amount": None, "confidence": 0.0}
+
+    # Rebuild lines so "Total ... 1,200.00" stays on one line for the regexes.
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    for i, word in enumerate(data["text"]):
+        if word.strip():
+            lines.setdefault((data["block_num"][i], data["par_num"][i], data["line_num"][i]), []).append(word)
+    text = "\n".join(" ".join(line) for line in lines.values())
+
+    amount, date, match_score = parse_receipt_text(text)
+    text_confidence = sum(conf for _, conf in words) / len(words) / 100.0
+    return {"date": date, "amount": amount, "confidence": round(text_confidence * match_score, 3)}
+
+
+class LocalOCRExtractor:
+    """
+    Local Tesseract OCR tier. pytesseract runs the tesseract binary as a child
+    process, so OCR does not hold the GIL and runs in the caller's thread; files
+    are OCRed in parallel by the pipeline's extraction threads or worker processes.
+    """
+
+    def __init__(self, min_confidence: float = DEFAULT_MIN_CONFIDENCE, timeout: float = DEFAULT_TIMEOUT):
+        self.min_confidence = min_confidence
+        self.timeout = timeout
+        self.available = tesseract_available()
+        if not self.available:
+            logger.info("Tesseract is not installed; the local OCR tier is disabled.")
+
+    def extract(self, file_path: str) -> Optional[Dict[str, object]]:
+        """
+        OCRs a file and returns its record if confident enough, else None.
+        """
+        if not self.available:
+            return None
+        try:
+            result = ocr_extract(file_path, self.timeout)
+        except Exception as e:
+            logger.warning(f"Local OCR failed for {file_path}: {e}")
+            return None
+        if result["date"] and result["amount"] and result["confidence"] >= self.min_confidence:
+            return result
+        logger.debug(f"Local OCR not confident for {file_path} ({result['confidence']:.2f}); escalating.")
+        return None
@@ -1,15 +1,47 @@
-from utils.logger import setup_logger
+from utils.logger import setup_logger, worker_log_queue
 from core.analyzer import GeminiImageAnalyzer
 from core.renamer import FileOrganizer
+from core.normalizer import normalize_amount, parse_date
+from core.dedupe import REVIEW_TAG, PerceptualIndex, compute_hashes, format_hash, receipt_key
+from core.filename_rules import FilenameRuleExtractor, rule_matches_model
+from core.ocr import LocalOCRExtractor
+from core.reports import UNCATEGORIZED
+from core.cancellation import CancellationToken, OperationCancelledError
+from utils.job_queue import JobQueue, DONE, FAILED, IN_FLIGHT, PENDING
+from utils.db_manager import DatabaseManager, ensure_schema, insert_records, parse_tags
+from utils import metrics
+from utils.hashing import ContentHasher
+from utils.single_flight import SingleFlight
+from utils.archives import copy_to, is_member_path
+from utils.blob_store import BlobStore
+from core.sharding import describe_shard, extract_in_worker, init_worker, shard_of, shard_source_key
+from core.scheduling import DEFAULT_DISPATCH_ORDER, ExtractionTimings, dispatch_priorities, timed_call
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from collections import Counter
+import multiprocessing
 import json
 from datetime import datetime
 import shutil
 import os
-from typing import Optional, Dict, Generator, Tuple
+import threading
+from typing import Callable, Optional, Dict, Generator, List, Tuple
+import time
 import uuid
 
 logger = setup_logger()
 
+CLAIM_BATCH_SIZE = 8
+DEFAULT_CONCURRENCY = 4
+FLUSH_BATCH_SIZE = 50
+FLUSH_INTERVAL_SECONDS = 2.0
+# How often the dispatch loop wakes up to check for cancellation while requests run.
+POLL_INTERVAL_SECONDS = 0.25
+# How often an otherwise finished run checks whether jobs leased by another worker came free.
+LEASE_POLL_SECONDS = 1.0
+
+class AnalyzerUnavailableError(RuntimeError):
+    """Raised when the remote analyzer cannot be created; aborts the whole run."""
+
 def extract_json_data(response: str) -> Optional[Dict[str, str]]:
     """
     Extracts JSON data from the response string.
@@ -29,83 +61,568 @@ def extract_json_data(response: str) -> Optional[Dict[str, str]]:
         logger.error(f"Error in extract_json_data function during execution: {str(e)}")
         return None
 
-def get_image_data(source_path: str, db_path: str) -> Generator[Tuple[int, int], None, None]:
+class TieredExtractor:
     """
-    Processes image files and extracts data to save into the database.
+    Extracts receipt data by trying the cheapest tier first and escalating:
+    file name rules, then local OCR, then the remote Gemini model.
+
+    Per-tier attempts, hits and time spent are kept in self.stats so a run can
+    report how much remote traffic the local tiers absorbed. The local tiers cannot
+    categorise a receipt, so their records are filed under UNCATEGORIZED unless a
+    filename rule names a category.
     """
-    try:
-        file_organized = FileOrganizer(source_path)
-        image_files = file_organized.file_list
-        logger.info(f"Found {len(image_files)} image files.")
+    TIERS = ("filename", "ocr", "remote")
+
+    def __init__(self, analyzer_factory=None, use_ocr: bool = True,
+                 cancel_token: Optional[CancellationToken] = None):
+        self.analyzer_factory = analyzer_factory or GeminiImageAnalyzer
+        # The analyzer validates the API key over the network, so it is only created
+        # once a file actually needs the model.
+        self.image_analyzer = None
+        self.rule_extractor = FilenameRuleExtractor()
+        self.ocr_extractor = LocalOCRExtractor() if use_ocr else None
+        self.cancel_token = cancel_token
+        self.stats = {tier: {"attempts": 0, "hits": 0, "seconds": 0.0} for tier in self.TIERS}
+        # extract() runs on several worker threads at once.
+        self._lock = threading.Lock()
+
+    def _record(self, tier: str, started: float, hit: bool) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.stats[tier]["attempts"] += 1
+            self.stats[tier]["hits"] += int(hit)
+            self.stats[tier]["seconds"] += elapsed
+
+    def extract(self, file_path: str) -> Tuple[Dict[str, object], str]:
+        """
+        Extracts date, amount, category and tags for one file.
+
+        Returns:
+            Tuple[Dict[str, object], str]: The extracted data and the tier that produced it.
+
+        Raises:
+            ValueError: If the remote model returns an error or unparsable output.
+            AnalyzerUnavailableError: If the remote analyzer cannot be created.
+            OperationCancelledError: If the run was cancelled before the model was called.
+        """
+        started = time.perf_counter()
+        rule_data = self.rule_extractor.extract(file_path)
+        verify_rule = rule_data is not None and self.rule_extractor.should_verify()
+        self._record("filename", started, rule_data is not None and not verify_rule)
+        if rule_data and not verify_rule:
+            logger.info(f"Extracted {file_path} from its file name (rule {rule_data['rule']}), skipping model call.")
+            return self._categorized(rule_data), "filename"
+
+        if self.ocr_extractor and self.ocr_extractor.available and not verify_rule:
+            started = time.perf_counter()
+            ocr_data = self.ocr_extractor.extract(file_path)
+            self._record("ocr", started, ocr_data is not None)
+            if ocr_data:
+                logger.info(f"Extracted {file_path} with local OCR (confidence {ocr_data['confidence']:.2f}), skipping model call.")
+                return self._categorized(ocr_data), "ocr"
+
+        # Never start a paid request once the user asked to stop.
+        if self.cancel_token:
+            self.cancel_token.raise_if_cancelled()
+
+        started = time.perf_counter()
+        model_data = None
+        try:
+            model_data = self._extract_remote(file_path)
+        finally:
+            self._record("remote", started, model_data is not None)
+
+        if verify_rule and not rule_matches_model(rule_data, model_data):
+            logger.warning(
+                f"Filename rule {rule_data['rule']} disagrees with the model for {file_path}: "
+                f"rule={rule_data['date']}/{rule_data['amount']}, "
+                f"model={model_data.get('date')}/{model_data.get('amount')}. Using the model result."
+            )
+        return model_data, "remote"
+
+    @staticmethod
+    def _categorized(data: Dict[str, object]) -> Dict[str, object]:
+        return data if data.get("category") else {**data, "category": UNCATEGORIZED}
+
+    def _extract_remote(self, file_path: str) -> Dict[str, object]:
+        with self._lock:
+            if self.image_analyzer is None:
+                try:
+                    self.image_analyzer = self.analyzer_factory()
+                except Exception as e:
+                    raise AnalyzerUnavailableError(str(e)) from e
+        response = self.image_analyzer.get_file_analysis("Find the amount and Date", file_path)
+
+        if not response or response.startswith("Error:"):
+            raise ValueError(f"API Error: {response}")
+
+        with metrics.timer("pipeline_stage_seconds", stage="parse"):
+            json_data = extract_json_data(response)
+        if not json_data:
+            metrics.inc("parse_failures_total")
+            raise ValueError("Failed to extract JSON data.")
+        return json_data
+
+    def summary(self) -> str:
+        """One line per tier with attempts, hit rate and mean latency."""
+        lines = []
+        for tier in self.TIERS:
+            stats = self.stats[tier]
+            if not stats["attempts"]:
+                continue
+            hit_rate = 100.0 * stats["hits"] / stats["attempts"]
+            mean_ms = 1000.0 * stats["seconds"] / stats["attempts"]
+            lines.append(f"{tier}: {stats['attempts']} attempts, {stats['hits']} hits ({hit_rate:.0f}%), {mean_ms:.1f} ms avg")
+        return "; ".join(lines)
+
+def record_id_for(file_path: str) -> str:
+    """
+    Deterministic record id for a file, so a job re-run after a crash cannot insert it twice.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, os.path.abspath(file_path)))
+
+class RecordBuffer:
+    """
+    Buffers extracted records and writes them in one transaction together with
+    the completion of their jobs, so a file is never marked done without its row.
+
+    The buffer flushes once it holds max_size entries or max_age seconds passed
+    since the last flush; call flush() when the run ends or is cancelled.
+    """
+
+    def __init__(self, db_path: str, job_queue: JobQueue, max_size: int = FLUSH_BATCH_SIZE,
+                 max_age: float = FLUSH_INTERVAL_SECONDS):
+        self.db_path = db_path
+        self.job_queue = job_queue
+        self.max_size = max_size
+        self.max_age = max_age
+        self.records: List[tuple] = []
+        self.completed: List[str] = []
+        self.last_flush = time.monotonic()
+        with DatabaseManager(db_path) as cursor:
+            ensure_schema(cursor)
+
+    def __len__(self) -> int:
+        return len(self.completed)
+
+    def add(self, record: tuple, file_path: str) -> None:
+        """Queues a record (see insert_records) and the completion of its job."""
+        self.records.append(record)
+        self.complete(file_path)
+
+    def complete(self, file_path: str) -> None:
+        """Queues the completion of a job that produced no record, e.g. a duplicate."""
+        self.completed.append(file_path)
+        self.flush_if_due()
+
+    def flush_if_due(self) -> None:
+        if len(self.completed) >= self.max_size or (self.completed and time.monotonic() - self.last_flush >= self.max_age):
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Writes the buffered records and job completions.
+
+        Returns:
+            int: Number of records inserted.
+        """
+        self.last_flush = time.monotonic()
+        if not self.completed:
+            return 0
+        with metrics.timer("pipeline_stage_seconds", stage="db_commit"), DatabaseManager(self.db_path) as cursor:
+            inserted = insert_records(cursor, self.records)
+            for file_path in self.completed:
+                self.job_queue.complete(file_path, cursor)
+        logger.debug(f"Flushed {inserted} records and {len(self.completed)} completed jobs.")
+        self.records.clear()
+        self.completed.clear()
+        return inserted
+
+class RunSummary:
+    """
+    Outcome of one get_image_data run, filled in as the run progresses; useful
+    mainly after a cancelled or failed run to show how far it got.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.duplicates = 0
+        # Files that reused the extraction of an identical file from this run.
+        self.coalesced = 0
+        # Saved receipts that look like an earlier one and were tagged for review.
+        self.flagged = 0
+        self.in_flight = 0
+        self.remaining = 0
+        self.cancelled = False
+        self.error: Optional[str] = None
+        self.tiers = ""
+        # Per-stage timer and counter table for this run, see utils.metrics.
+        self.metrics = ""
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed + self.duplicates
+
+    def format(self) -> str:
+        status = "cancelled" if self.cancelled else "failed" if self.error else "completed"
+        lines = [
+            f"Analysis {status} after {self.elapsed:.1f} s.",
+            f"Processed this run: {self.processed:,} (saved {self.succeeded:,}, failed {self.failed:,}, "
+            f"duplicates {self.duplicates:,}, will retry {self.retried:,})",
+            f"Remaining in queue: {self.remaining:,} of {self.total:,}",
+        ]
+        if self.coalesced:
+            lines.append(f"Identical copies sharing one extraction: {self.coalesced:,}")
+        if self.flagged:
+            lines.append(f"Look-alike receipts tagged '{REVIEW_TAG}': {self.flagged:,}")
+        if self.tiers:
+            lines.append(f"Extraction tiers: {self.tiers}")
+        if self.error:
+            lines.append(f"Error: {self.error}")
+        return "\n".join(lines)
+
+def build_record(file_path: str, json_data: Dict[str, object], phash: Optional[int],
+                 content_hash: Optional[str] = None) -> tuple:
+    """
+    Turns extracted JSON into an ImageData row for insert_records.
+
+    The rename name is DD_MM_YYYY_RS<amount>, built from the parsed date and amount
+    rather than the raw strings, so a date the model wrote as e.g. 2024-01-15 or
+    15/01/2024 still gives the DD_MM_YYYY name it was asked for, and the amount is
+    written without currency symbols or digit grouping (1,200.50 -> 1200.5).
+
+    Raises:
+        ValueError: If the date cannot be parsed.
+    """
+    date = parse_date(json_data['date'])
+    if date is None:
+        raise ValueError(f"Unrecognized date: {json_data['date']}")
+    amount_value, currency = normalize_amount(json_data['amount'])
+
+    amount_label = f"{amount_value:.2f}".rstrip("0").rstrip(".") if amount_value is not None else json_data['amount']
+    rename_name = f"{date.strftime('%d_%m_%Y')}_RS{amount_label}"
+
+    # Use AI-suggested category/tags, fallback to empty string if missing
+    category = json_data.get('category') or ''
+    tags = json_data.get('tags') or ''
+    if isinstance(tags, list):
+        tags = json.dumps(tags)
+
+    return (
+        record_id_for(file_path), json_data['amount'], date, file_path, rename_name,
+        category, tags, amount_value, currency,
+        format_hash(phash) if phash is not None else None, content_hash
+    )
+
+def tag_for_review(record: tuple) -> tuple:
+    """Returns an ImageData row (see build_record) with REVIEW_TAG added to its tags."""
+    tags = parse_tags(record[6])
+    if REVIEW_TAG not in tags:
+        tags.append(REVIEW_TAG)
+    return record[:6] + (json.dumps(tags),) + record[7:]
+
+def get_image_data(source_path: str, db_path: str, resume: bool = True,
+                   cancel_token: Optional[CancellationToken] = None,
+                   concurrency: int = DEFAULT_CONCURRENCY,
+                   summary: Optional[RunSummary] = None,
+                   workers: int = 0,
+                   shard: Tuple[int, int] = (0, 1),
+                   metrics_file: Optional[str] = metrics.DEFAULT_METRICS_FILE,
+                   analyzer_factory=None,
+                   use_ocr: bool = True,
+                   dispatch_order: str = DEFAULT_DISPATCH_ORDER,
+                   on_record: Optional[Callable[[tuple], None]] = None,
+                   blob_store: Optional[BlobStore] = None,
+                   skip_near_duplicates: bool = False) -> Generator[Tuple[int, int], None, None]:
+    """
+    Processes image files and extracts data to save into the database.
+
+    Files are pulled from the persistent job queue. With resume=True, unfinished jobs
+    left by an earlier run of the same source are continued instead of clearing the
+    database and starting over.
 
-        image_analyzer = GeminiImageAnalyzer()
+    Up to `concurrency` files are extracted at once. Once cancel_token is cancelled no
+    new files are dispatched, queued extractions are dropped, the requests already
+    running are allowed to finish (each is bounded by the request timeout), buffered
+    rows are written and the unfinished jobs go back to the queue for a later resume.
+    The optional summary is filled in with the outcome of the run. Stage timings and
+    counters go to utils.metrics and are written to metrics_file when the run ends.
 
+    With workers > 0, hashing and extraction run in that many worker processes so
+    the CPU-bound stages (PDF rasterization, resizing, hashing, OCR) use every core;
+    this process stays the single coordinator that writes to ImageData. shard=(i, n)
+    limits the run to the i-th of n hash partitions of the file list, so n hosts
+    sharing the input folder can each take one.
+
+    A fresh run queues the files in dispatch_order (see core.scheduling), by default
+    shortest expected extraction first so the first results arrive quickly even when
+    a few large PDFs come first on disk. on_record, if given, is called from this
+    generator with each ImageData row (see build_record) as soon as it is extracted,
+    before it is written, so a UI can show results while the run goes on.
+
+    Files with identical content are extracted once: copies claimed while the first
+    one is in flight (or after it succeeded) share its outcome and each get their own
+    row from it, so a folder of copies costs one model call per unique receipt.
+    A receipt that merely looks like a recorded one (close perceptual hash) is saved
+    and tagged REVIEW_TAG, since different payments in the same app look alike; with
+    skip_near_duplicates it is skipped instead when it also records the same amount
+    and day.
+
+    Every row records the file's content hash; with a blob_store, each extracted
+    receipt is also copied into it once (see utils.blob_store), so previews and
+    exports no longer depend on the source folder.
+
+    analyzer_factory replaces the Gemini analyzer (e.g. with a local stub for
+    benchmarks) and use_ocr=False skips the local OCR tier.
+    """
+    cancel_token = cancel_token or CancellationToken()
+    summary = summary if summary is not None else RunSummary()
+    extractor = None
+    job_queue = None
+    buffer = None
+    executor = None
+    timings = None
+    tier_counts = Counter()
+    metrics_baseline = metrics.REGISTRY.snapshot()
+    try:
         db_dir = os.path.dirname(db_path)
         failed_dir = os.path.join("outputs", "failed")
         os.makedirs(db_dir, exist_ok=True)
         os.makedirs(failed_dir, exist_ok=True)
 
-        from utils.db_manager import clear_db_data, save_to_sqlite_db
-        clear_db_data(db_path)
+        from utils.db_manager import clear_db_data, delete_records
+        with DatabaseManager(db_path) as cursor:
+            ensure_schema(cursor)
+        shard_index, shard_count = shard
+        timings = ExtractionTimings(db_path)
+        job_queue = JobQueue(db_path, shard_source_key(source_path, shard))
+        if resume and job_queue.has_unfinished():
+            counts = job_queue.counts()
+            logger.info(
+                f"Resuming previous run of {source_path} ({describe_shard(shard)}): {counts[DONE]} done, "
+                f"{counts[FAILED]} failed, {counts[PENDING] + counts[IN_FLIGHT]} left."
+            )
+        else:
+            with metrics.timer("pipeline_stage_seconds", stage="discovery"):
+                file_organized = FileOrganizer(source_path)
+            file_list = file_organized.file_list
+            if shard_count > 1:
+                file_list = [path for path in file_list if shard_of(path, source_path, shard_count) == shard_index]
+                # Other shards may share this database, so only this shard's rows are replaced.
+                delete_records(db_path, [record_id_for(path) for path in file_list])
+            else:
+                clear_db_data(db_path)
+            logger.info(f"Found {len(file_list)} image files ({describe_shard(shard)}).")
+            job_queue.reset(file_list, dispatch_priorities(file_list, dispatch_order, timings))
 
-        processed_files = []
-        for i, file_path in enumerate(image_files):
-            try:
-                logger.info(f"Processing image file: {file_path}")
-                response = image_analyzer.get_file_analysis("Find the amount and Date", file_path)
-                
-                if not response or response.startswith("Error:"):
-                    raise ValueError(f"API Error: {response}")
+        counts = job_queue.counts()
+        total_files = sum(counts.values())
+        summary.total = total_files
+        processed_count = counts[DONE] + counts[FAILED]
+        duplicate_index = PerceptualIndex.from_db(db_path)
+        buffer = RecordBuffer(db_path, job_queue)
+        if workers > 0:
+            # Worker processes see cancellation through a shared event.
+            cancel_event = multiprocessing.Event()
+            cancel_token.on_cancel(cancel_event.set)
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                           initargs=(cancel_event, use_ocr, analyzer_factory, worker_log_queue()))
+            hash_executor = executor
+            extract = extract_in_worker
+            concurrency = workers
+        else:
+            extractor = TieredExtractor(analyzer_factory=analyzer_factory, use_ocr=use_ocr, cancel_token=cancel_token)
+            executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="extract")
+            hash_executor = None
+            extract = extractor.extract
+        content_hasher = ContentHasher(db_path)
+        flights = SingleFlight()
+        # Content hash -> the file whose extraction identical copies share.
+        leaders: Dict[str, str] = {}
+        # future -> [(file_path, phash, content_hash, copy_of)]; copy_of is None for the file the
+        # extraction was started for and the leader's path for identical copies.
+        in_flight: Dict = {}
+        queue_exhausted = False
+        waiting_on_leases = False
 
-                json_data = extract_json_data(response)
-                if not json_data:
-                    raise ValueError("Failed to extract JSON data.")
+        while True:
+            # Top the pipeline up to one claim batch beyond the number of workers.
+            if not cancel_token.cancelled and not queue_exhausted and len(in_flight) < concurrency:
+                batch = job_queue.claim(CLAIM_BATCH_SIZE)
+                queue_exhausted = not batch
+                with metrics.timer("pipeline_stage_seconds", stage="hash"):
+                    perceptual_hashes = compute_hashes(batch, executor=hash_executor) if batch else {}
+                content_hashes = content_hasher.hash_files(batch)
+                for file_path in batch:
+                    phash = perceptual_hashes.get(file_path)
+                    content_hash = content_hashes.get(file_path)
+                    shared = flights.join(content_hash) if content_hash else None
+                    if shared is not None:
+                        # Wait for the identical file's outcome instead of extracting it again.
+                        logger.info(f"{file_path} is identical to {leaders[content_hash]}; sharing its result.")
+                        in_flight.setdefault(shared, []).append((file_path, phash, content_hash, leaders[content_hash]))
+                        continue
+                    logger.info(f"Processing image file: {file_path}")
+                    if content_hash:
+                        leaders[content_hash] = file_path
+                        future, _ = flights.submit(content_hash, lambda path=file_path: executor.submit(timed_call, extract, path))
+                    else:
+                        future = executor.submit(timed_call, extract, file_path)
+                    in_flight[future] = [(file_path, phash, content_hash, None)]
 
-                json_data.update({"file_path": file_path})
-                rename_name = f"{json_data['date']}_RS{json_data['amount']}"
-                json_data.update({"rename_name": rename_name})
-                
+            summary.in_flight = len(in_flight)
+            if not in_flight:
+                if cancel_token.cancelled:
+                    break
+                if queue_exhausted:
+                    # Jobs still leased by another worker, e.g. a run killed moments ago on
+                    # another host, are claimed once their leases expire.
+                    leased_for = job_queue.leased_elsewhere()
+                    if leased_for is None:
+                        break
+                    if not waiting_on_leases:
+                        logger.info(f"Waiting up to {leased_for:.0f} s for files leased by another worker.")
+                        waiting_on_leases = True
+                    cancel_token.wait(min(leased_for, LEASE_POLL_SECONDS))
+                    queue_exhausted = False
+                continue
 
+            done, _ = wait(in_flight, timeout=POLL_INTERVAL_SECONDS, return_when=FIRST_COMPLETED)
+            if cancel_token.cancelled:
+                # Drop extractions that have not started; their jobs are released below.
+                for future in list(in_flight):
+                    if future.cancel():
+                        in_flight.pop(future)
 
-                date_str = json_data['date']
-                try:
-                    date = datetime.strptime(date_str, '%Y-%m-%d')
-                except ValueError:
-                    date = datetime.strptime(date_str, '%d_%m_%Y')
-
-                # Use AI-suggested category/tags, fallback to empty string if missing
-                category = json_data.get('category') or ''
-                tags = json_data.get('tags') or ''
-
-                if isinstance(tags, list):
-                    tags = json.dumps(tags)
-
-                save_to_sqlite_db(
-                    unique_id=str(uuid.uuid4()),
-                    amount=json_data['amount'],
-                    date=date,
-                    original_path=file_path,
-                    rename_name=json_data['rename_name'],
-                    db_path=db_path,
-                    category=category,
-                    tags=tags
-                )
-                processed_files.append((i + 1, len(image_files)))
-                logger.info("Image data extracted and saved to database successfully.")
-
-            except (ValueError, FileNotFoundError) as e:
-                logger.warning(f"Failed to process file {file_path}: {e}")
-                try:
-                    shutil.move(file_path, os.path.join(failed_dir, os.path.basename(file_path)))
-                    logger.info(f"Moved failed file to {failed_dir}")
-                except Exception as move_error:
-                    logger.error(f"Could not move file {file_path} to failed directory: {move_error}")
-            except Exception as e:
-                logger.error(f"An unexpected error occurred while processing {file_path}: {e}")
+            for future in done:
+                for file_path, phash, content_hash, copy_of in in_flight.pop(future):
+                    try:
+                        result, seconds = future.result()
+                        json_data = result[0]
+                        if copy_of is not None:
+                            # Reuses the leader's extraction but gets its own row, and fails the
+                            # same way the leader's did, e.g. on an unparsable date.
+                            logger.info(f"Using the extraction of {copy_of} for identical {file_path}")
+                            summary.coalesced += 1
+                        else:
+                            tier = result[1]
+                            if len(result) > 2:
+                                # Metrics recorded in a worker process since its last file.
+                                metrics.REGISTRY.merge(result[2])
+                            tier_counts[tier] += 1
+                            metrics.inc("extraction_tier_total", tier=tier)
+                            timings.record(file_path, seconds)
+                        record = build_record(file_path, json_data, phash, content_hash)
+                        # Files are only indexed once their row is written, so this also catches
+                        # a look-alike that was extracted alongside and finished first.
+                        key = receipt_key(record[7], record[2])
+                        duplicate_of = duplicate_index.find_duplicate(phash, key) if skip_near_duplicates else None
+                        similar_to = duplicate_of or duplicate_index.find_similar(phash)
+                        metrics.inc("dedupe_checks_total", result="hit" if duplicate_of else "similar" if similar_to else "miss")
+                        if duplicate_of:
+                            metrics.inc("jobs_total", outcome="duplicate")
+                            logger.info(f"Skipping {file_path}: near-duplicate of {duplicate_of}")
+                            buffer.complete(file_path)
+                            summary.duplicates += 1
+                        else:
+                            if similar_to:
+                                logger.warning(f"{file_path} looks like {similar_to}; saved and tagged '{REVIEW_TAG}'.")
+                                record = tag_for_review(record)
+                                summary.flagged += 1
+                            if blob_store is not None and content_hash:
+                                try:
+                                    blob_store.put(file_path, content_hash)
+                                except OSError as e:
+                                    # The row still points at the original file.
+                                    logger.error(f"Could not add {file_path} to the receipt store: {e}")
+                            buffer.add(record, file_path)
+                            duplicate_index.add(phash, file_path, key)
+                            if on_record:
+                                on_record(record)
+                            summary.succeeded += 1
+                            metrics.inc("jobs_total", outcome="succeeded")
+                            logger.info("Image data extracted successfully.")
+                        processed_count += 1
+
+                    except AnalyzerUnavailableError:
+                        raise
+                    except OperationCancelledError:
+                        # Cancelled before its model call; the job is released below.
+                        continue
+                    except (ValueError, FileNotFoundError) as e:
+                        logger.warning(f"Failed to process file {file_path}: {e}")
+                        job_queue.fail(file_path, str(e), permanent=True)
+                        summary.failed += 1
+                        metrics.inc("jobs_total", outcome="failed")
+                        processed_count += 1
+                        try:
+                            failed_path = os.path.join(failed_dir, os.path.basename(file_path))
+                            if is_member_path(file_path):
+                                # Archive members stay in their archive; keep a copy with the other failures.
+                                copy_to(file_path, failed_path)
+                                logger.info(f"Copied failed archive member to {failed_dir}")
+                            else:
+                                shutil.move(file_path, failed_path)
+                                logger.info(f"Moved failed file to {failed_dir}")
+                        except Exception as move_error:
+                            logger.error(f"Could not move file {file_path} to failed directory: {move_error}")
+                    except Exception as e:
+                        logger.error(f"An unexpected error occurred while processing {file_path}: {e}")
+                        job_queue.fail(file_path, str(e))
+                        summary.retried += 1
+                        metrics.inc("jobs_total", outcome="retried")
+
+                    # Return progress information
+                    yield (min(processed_count, total_files), total_files)
 
-            # Return progress information
-            yield (i + 1, len(image_files))
+            buffer.flush_if_due()
+            # Keep the leases of the claimed files alive while we work through them.
+            job_queue.renew()
+
+        if summary.duplicates:
+            logger.info(f"Skipped {summary.duplicates} duplicate files.")
+        if cancel_token.cancelled:
+            logger.info("Analysis cancelled; unfinished files stay queued for a resume.")
 
     except Exception as e:
         logger.error(f"Error in get_image_data function during execution: {str(e)}")
-        yield (0, 0)  # Indicate error through progress 
\ No newline at end of file
+        summary.error = str(e)
+        yield (0, 0)  # Indicate error through progress
+    finally:
+        summary.cancelled = cancel_token.cancelled
+        summary.in_flight = 0
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if buffer:
+            try:
+                buffer.flush()
+            except Exception as e:
+                logger.error(f"Could not write buffered records: {e}")
+        if timings:
+            try:
+                timings.save()
+            except Exception as e:
+                logger.error(f"Could not save extraction timings: {e}")
+        if job_queue:
+            job_queue.release()
+            counts = job_queue.counts()
+            summary.remaining = counts[PENDING] + counts[IN_FLIGHT]
+        if extractor:
+            summary.tiers = extractor.summary()
+        elif workers > 0 and tier_counts:
+            summary.tiers = "; ".join(f"{tier}: {tier_counts[tier]} files" for tier in TieredExtractor.TIERS if tier_counts[tier])
+        if summary.tiers:
+            logger.info(f"Extraction tiers: {summary.tiers}")
+        summary.metrics = metrics.REGISTRY.summary_table(metrics_baseline)
+        logger.info(f"Pipeline metrics:\n{summary.metrics}")
+        if metrics_file:
+            try:
+                metrics.REGISTRY.write_prometheus_file(metrics_file)
+            except OSError as e:
+                logger.error(f"Could not write metrics to {metrics_file}: {e}")
+        summary.elapsed = time.monotonic() - summary.started
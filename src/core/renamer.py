@@ -1,27 +1,37 @@
 import os
 from pathlib import Path
 from utils.logger import setup_logger
+from utils.archives import is_container, iter_member_paths
 
 logger = setup_logger()
 
 IMAGE_PDF_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.pdf')
 
 class FileOrganizer:
-    def __init__(self, directory="inputs"):
+    def __init__(self, directory="inputs", compute_hashes=False, expand_archives=True):
         """
         Initialize the FileOrganizer with a directory to scan.
 
         Args:
             directory (str): Directory to search for files (default: 'inputs').
+            compute_hashes (bool): Also compute perceptual hashes of the found files.
+            expand_archives (bool): Also list the receipts inside ZIP/TAR archives and
+                the attachments of .mbox/.eml files, as "<archive>!<member>" paths.
         """
+        self.expand_archives = expand_archives
         self.file_list = []
+        self.perceptual_hashes = {}
+        self.content_hashes = {}
         self.directory = directory
         logger.info(f"Initializing FileOrganizer with directory: {self.directory} folder")
         self.file_organize_list()  # Call the method to populate lists on init
+        if compute_hashes:
+            self.compute_perceptual_hashes()
 
     def file_organize_list(self):
         """
-        Find all image and PDF files in the specified directory.
+        Find all image and PDF files in the specified directory, including those
+        inside archives and mail exports (read in place, nothing is extracted).
 
         Returns:
             tuple: Tuple containing list of image file paths and list of PDF file paths.
@@ -39,8 +49,37 @@ class FileOrganizer:
                     logger.debug(f"Found file: {file_path}")
                     if file.lower().endswith(IMAGE_PDF_EXTENSIONS):
                         self.file_list.append(file_path)
+                    elif self.expand_archives and is_container(file):
+                        self.file_list.extend(iter_member_paths(file_path, IMAGE_PDF_EXTENSIONS))
             
             logger.info(f"Found {len(self.file_list)} files in the directory.")
 
         except Exception as e:
             logger.error(f"Error during file organization: {str(e)}")
+
+    def compute_content_hashes(self, db_path):
+        """
+        Compute content hashes for all found files, reusing the ones cached in the
+        database for files that did not change since they were last hashed.
+
+        Returns:
+            dict: Mapping of file path to content hash (None where the file could not be read).
+        """
+        from utils.hashing import ContentHasher
+
+        self.content_hashes = ContentHasher(db_path).hash_files(self.file_list)
+        return self.content_hashes
+
+    def compute_perceptual_hashes(self):
+        """
+        Compute perceptual hashes for all found files, used to spot near-duplicate receipts.
+
+        Returns:
+            dict: Mapping of file path to perceptual hash (None where the file could not be rendered).
+        """
+        from core.dedupe import compute_hashes
+
+        self.perceptual_hashes = compute_hashes(self.file_list)
+        hashed = sum(1 for value in self.perceptual_hashes.values() if value is not None)
+        logger.info(f"Computed perceptual hashes for {hashed} of {len(self.file_list)} files.")
+        return self.perceptual_hashes
@@ -0,0 +1,156 @@
+from utils.logger import setup_logger
+from utils.db_manager import DatabaseManager, ensure_schema, get_data_version, parse_tags, SELECT_VERSION_QUERY
+from utils import metrics
+from typing import Dict, List, Tuple
+import os
+import threading
+
+logger = setup_logger()
+
+REPORT_TYPES = ("monthly", "category", "tag")
+UNCATEGORIZED = "Uncategorized"
+UNTAGGED = "(untagged)"
+
+AMOUNT_EXPR = "COALESCE(amount_value, CAST(amount AS FLOAT))"
+
+MONTHLY_REPORT_QUERY = f"""
+SELECT month, records, total,
+       SUM(total) OVER (ORDER BY month) AS running_total,
+       total - LAG(total) OVER (ORDER BY month) AS change
+FROM (
+    SELECT substr(date, 1, 7) AS month, COUNT(*) AS records, SUM({AMOUNT_EXPR}) AS total
+    FROM ImageData
+    WHERE date IS NOT NULL
+    GROUP BY month
+)
+ORDER BY month
+"""
+
+CATEGORY_REPORT_QUERY = f"""
+SELECT category, records, total,
+       100.0 * total / NULLIF(SUM(total) OVER (), 0) AS share
+FROM (
+    SELECT COALESCE(NULLIF(TRIM(category), ''), '{UNCATEGORIZED}') AS category,
+           COUNT(*) AS records, SUM({AMOUNT_EXPR}) AS total
+    FROM ImageData
+    GROUP BY 1
+)
+ORDER BY total DESC
+"""
+
+# Tags are stored as a JSON list or comma string per row, so aggregate per distinct
+# tags value in SQL (few distinct values) and split those in Python afterwards.
+TAG_SOURCE_QUERY = f"""
+SELECT tags, COUNT(*) AS records, SUM({AMOUNT_EXPR}) AS total
+FROM ImageData
+GROUP BY tags
+"""
+
+REPORT_COLUMNS = {
+    "monthly": ("month", "records", "total", "running_total", "change"),
+    "category": ("category", "records", "total", "share"),
+    "tag": ("tag", "records", "total"),
+}
+
+# Cached results keyed by (database path, report type) -> (data version, rows).
+_REPORT_CACHE: Dict[Tuple[str, str], Tuple[int, List[Dict]]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+class ReportEngine:
+    """
+    Computes monthly, category and tag spend rollups for an ImageData database.
+
+    Results are cached per database and reused until the DataVersion counter
+    bumped by the db_manager write helpers changes.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def get_report(self, report_type: str) -> List[Dict]:
+        """
+        Returns the rows of a report, computing them only if the data changed.
+
+        Args:
+            report_type (str): One of REPORT_TYPES.
+
+        Returns:
+            List[Dict]: One dict per report row, keyed by REPORT_COLUMNS[report_type].
+        """
+        if report_type not in REPORT_TYPES:
+            raise ValueError(f"Unknown report type: {report_type}")
+
+        cache_key = (os.path.abspath(self.db_path), report_type)
+        version = get_data_version(self.db_path)
+        with _CACHE_LOCK:
+            cached = _REPORT_CACHE.get(cache_key)
+        if cached and version >= 0 and cached[0] == version:
+            metrics.inc("report_cache_total", result="hit")
+            logger.debug(f"Serving cached {report_type} report (data version {version})")
+            return cached[1]
+
+        metrics.inc("report_cache_total", result="miss")
+        with DatabaseManager(self.db_path) as cursor:
+            ensure_schema(cursor)
+            # Read the version inside the same transaction as the report itself.
+            cursor.execute(SELECT_VERSION_QUERY)
+            version = cursor.fetchone()[0]
+            rows = getattr(self, f"_compute_{report_type}")(cursor)
+
+        with _CACHE_LOCK:
+            _REPORT_CACHE[cache_key] = (version, rows)
+        logger.info(f"Computed {report_type} report with {len(rows)} rows (data version {version})")
+        return rows
+
+    def _compute_monthly(self, cursor) -> List[Dict]:
+        cursor.execute(MONTHLY_REPORT_QUERY)
+        return [dict(zip(REPORT_COLUMNS["monthly"], row)) for row in cursor.fetchall()]
+
+    def _compute_category(self, cursor) -> List[Dict]:
+        cursor.execute(CATEGORY_REPORT_QUERY)
+        return [dict(zip(REPORT_COLUMNS["category"], row)) for row in cursor.fetchall()]
+
+    def _compute_tag(self, cursor) -> List[Dict]:
+        cursor.execute(TAG_SOURCE_QUERY)
+        totals: Dict[str, List[float]] = {}
+        for tags, records, total in cursor.fetchall():
+            for tag in parse_tags(tags) or [UNTAGGED]:
+                entry = totals.setdefault(tag, [0, 0.0])
+                entry[0] += records
+                entry[1] += total or 0.0
+        rows = [{"tag": tag, "records": records, "total": total} for tag, (records, total) in totals.items()]
+        rows.sort(key=lambda row: row["total"], reverse=True)
+        return rows
+
+
+def format_report(rows: List[Dict], report_type: str) -> str:
+    """
+    Renders report rows as a fixed-width text table for the UI and the CLI.
+    """
+    columns = REPORT_COLUMNS[report_type]
+    if not rows:
+        return "No data available."
+
+    def format_value(column, value):
+        if value is None:
+            return "-"
+        if column == "share":
+            return f"{value:.1f}%"
+        if isinstance(value, float):
+            return f"{value:,.2f}"
+        if isinstance(value, int):
+            return f"{value:,}"
+        return str(value)
+
+    cells = [[format_value(column, row.get(column)) for column in columns] for row in rows]
+    headers = [column.replace("_", " ").title() for column in columns]
+    widths = [max(len(headers[i]), *(len(line[i]) for line in cells)) for i in range(len(columns))]
+
+    lines = ["  ".join(header.ljust(widths[i]) if i == 0 else header.rjust(widths[i])
+                       for i, header in enumerate(headers))]
+    lines.append("  ".join("-" * width for width in widths))
+    for line in cells:
+        lines.append("  ".join(value.ljust(widths[i]) if i == 0 else value.rjust(widths[i])
+                               for i, value in enumerate(line)))
+    return "\n".join(lines)
@@ -0,0 +1,138 @@
+from utils.logger import setup_logger
+from utils.db_manager import DatabaseManager
+from utils.archives import size_and_mtime
+from typing import Callable, Dict, List, Optional, Tuple
+import os
+import time
+
+logger = setup_logger()
+
+# Dispatch orders for the job queue:
+#   walk     - the order the files were found in
+#   smallest - smallest files first
+#   newest   - most recently modified files first
+#   fastest  - shortest expected extraction time first, learned from past runs
+DISPATCH_ORDERS = ("walk", "smallest", "newest", "fastest")
+DEFAULT_DISPATCH_ORDER = "fastest"
+
+# Weight of a new sample in the running mean of a file kind's extraction time.
+TIMING_SMOOTHING = 0.2
+# Guess for file kinds never timed before: a fixed cost plus a cost per MB.
+FALLBACK_BASE_SECONDS = 2.0
+FALLBACK_SECONDS_PER_MB = 1.0
+
+CREATE_TIMING_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS ExtractionTiming (
+    kind TEXT PRIMARY KEY,
+    samples INTEGER NOT NULL,
+    mean_seconds REAL NOT NULL,
+    updated_at REAL
+)
+"""
+SELECT_TIMINGS_QUERY = "SELECT kind, samples, mean_seconds FROM ExtractionTiming"
+UPSERT_TIMING_QUERY = """
+INSERT INTO ExtractionTiming (kind, samples, mean_seconds, updated_at) VALUES (?, ?, ?, ?)
+ON CONFLICT(kind) DO UPDATE SET
+    samples = excluded.samples, mean_seconds = excluded.mean_seconds, updated_at = excluded.updated_at
+"""
+
+
+def fallback_estimate(size: int) -> float:
+    """Guessed extraction seconds for a file of a kind never timed before."""
+    return FALLBACK_BASE_SECONDS + FALLBACK_SECONDS_PER_MB * size / (1024 * 1024)
+
+
+def file_kind(file_path: str, size: int) -> str:
+    """
+    Groups files whose extraction should take about as long: same extension and
+    same power-of-two size bucket, e.g. ".pdf:20" for a 0.5-1 MB PDF.
+    """
+    return f"{os.path.splitext(file_path)[1].lower()}:{size.bit_length()}"
+
+
+class ExtractionTimings:
+    """
+    Running mean extraction time per file kind, kept in the ExtractionTiming table
+    so the "fastest" dispatch order improves from run to run.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.means: Dict[str, Tuple[int, float]] = {}
+        self._changed = set()
+        with DatabaseManager(db_path) as cursor:
+            cursor.execute(CREATE_TIMING_TABLE_QUERY)
+            cursor.execute(SELECT_TIMINGS_QUERY)
+            self.means = {kind: (samples, mean) for kind, samples, mean in cursor.fetchall()}
+
+    def record(self, file_path: str, seconds: float) -> None:
+        try:
+            kind = file_kind(file_path, size_and_mtime(file_path)[0])
+        except OSError:
+            return
+        samples, mean = self.means.get(kind, (0, seconds))
+        self.means[kind] = (samples + 1, mean + TIMING_SMOOTHING * (seconds - mean) if samples else seconds)
+        self._changed.add(kind)
+
+    def estimate(self, file_path: str, size: int) -> float:
+        """Expected extraction seconds for a file of this path and size."""
+        kind = file_kind(file_path, size)
+        if kind in self.means:
+            return self.means[kind][1]
+        # Nearest timed size bucket of the same extension.
+        extension, bucket = kind.rsplit(":", 1)
+        nearby = [
+            (abs(int(other.rsplit(":", 1)[1]) - int(bucket)), mean)
+            for other, (_, mean) in self.means.items() if other.rsplit(":", 1)[0] == extension
+        ]
+        if nearby:
+            return min(nearby)[1]
+        return fallback_estimate(size)
+
+    def save(self) -> None:
+        if not self._changed:
+            return
+        now = time.time()
+        with DatabaseManager(self.db_path) as cursor:
+            cursor.executemany(UPSERT_TIMING_QUERY, (
+                (kind, *self.means[kind], now) for kind in self._changed
+            ))
+        self._changed.clear()
+
+
+def dispatch_priorities(file_paths: List[str], order: str,
+                        timings: Optional[ExtractionTimings] = None) -> List[float]:
+    """
+    Returns one priority per path for the job queue; lower values are claimed first.
+
+    Raises:
+        ValueError: If order is not one of DISPATCH_ORDERS.
+    """
+    if order not in DISPATCH_ORDERS:
+        raise ValueError(f"Unknown dispatch order {order!r}; expected one of {', '.join(DISPATCH_ORDERS)}.")
+    if order == "walk":
+        return [float(i) for i in range(len(file_paths))]
+
+    stats = []
+    for file_path in file_paths:
+        try:
+            stats.append(size_and_mtime(file_path))
+        except OSError:
+            stats.append(None)
+    # Files that cannot be read go last; they will fail quickly either way.
+    if order == "smallest":
+        return [float(stat[0]) if stat else float("inf") for stat in stats]
+    if order == "newest":
+        return [-stat[1] if stat else float("inf") for stat in stats]
+    estimate: Callable[[str, int], float] = timings.estimate if timings else lambda _, size: fallback_estimate(size)
+    return [estimate(path, stat[0]) if stat else float("inf") for path, stat in zip(file_paths, stats)]
+
+
+def timed_call(function: Callable, file_path: str):
+    """
+    Runs function(file_path) and returns (result, seconds). Module level so it can
+    wrap the extraction function of a process pool too.
+    """
+    started = time.perf_counter()
+    result = function(file_path)
+    return result, time.perf_counter() - started
@@ -0,0 +1,102 @@
+from utils.logger import forward_to_parent, setup_logger
+from core.cancellation import CancellationToken
+from utils import metrics
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import os
+import re
+
+logger = setup_logger()
+
+SHARD_SPEC_REGEX = re.compile(r"^(\d+)/(\d+)$")
+
+# Set in each worker process by init_worker.
+_worker_extractor = None
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parses a shard spec "i/n" (1-based, e.g. "2/4") into a 0-based (index, count).
+
+    Raises:
+        ValueError: If the spec is malformed or out of range.
+    """
+    match = SHARD_SPEC_REGEX.match(spec.strip())
+    if not match:
+        raise ValueError(f"Invalid shard '{spec}': expected i/n, e.g. 1/2.")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{spec}': i must be between 1 and n.")
+    return index - 1, count
+
+
+def shard_of(file_path: str, source_path: str, shard_count: int) -> int:
+    """
+    Assigns a file to a shard by hashing its path relative to the source folder,
+    so hosts that mount the shared input folder at different places agree.
+    """
+    relative = os.path.relpath(os.path.abspath(file_path), os.path.abspath(source_path)).replace(os.sep, "/")
+    digest = hashlib.blake2b(relative.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+
+def partition_files(file_paths: List[str], source_path: str, shard_count: int) -> Dict[int, List[str]]:
+    """Splits a file list into shard_count hash partitions."""
+    shards: Dict[int, List[str]] = {index: [] for index in range(shard_count)}
+    for file_path in file_paths:
+        shards[shard_of(file_path, source_path, shard_count)].append(file_path)
+    return shards
+
+
+def shard_source_key(source_path: str, shard: Tuple[int, int]) -> str:
+    """
+    Job queue source key for one shard, so hosts sharing a database keep separate queues.
+    """
+    index, count = shard
+    source_path = os.path.abspath(source_path)
+    return source_path if count == 1 else f"{source_path}#shard{index + 1}of{count}"
+
+
+def init_worker(cancel_event=None, use_ocr: bool = True, analyzer_factory=None, log_queue=None) -> None:
+    """
+    Process pool initializer: builds this worker's extractor once. The analyzer is
+    still created lazily, on the first file that needs the model. With log_queue
+    (see utils.logger.worker_log_queue), log records go to the main process.
+    """
+    global _worker_extractor
+    if log_queue is not None:
+        forward_to_parent(log_queue)
+    from core.processor import TieredExtractor
+
+    # A forked worker inherits the coordinator's metrics; start from zero so they are not merged back twice.
+    metrics.REGISTRY.drain()
+
+    _worker_extractor = TieredExtractor(
+        analyzer_factory=analyzer_factory,
+        use_ocr=use_ocr,
+        cancel_token=CancellationToken(cancel_event) if cancel_event is not None else None
+    )
+
+
+def extract_in_worker(file_path: str) -> Tuple[Dict[str, object], str, tuple]:
+    """
+    Runs TieredExtractor.extract in a worker process set up by init_worker.
+
+    Returns:
+        Tuple: The extracted data, the tier, and the metrics this worker recorded
+        since its previous file, for the coordinator to merge.
+    """
+    if _worker_extractor is None:
+        init_worker()
+    json_data, tier = _worker_extractor.extract(file_path)
+    return json_data, tier, metrics.REGISTRY.drain()
+
+
+def default_worker_count() -> int:
+    return os.cpu_count() or 1
+
+
+def describe_shard(shard: Optional[Tuple[int, int]]) -> str:
+    if not shard or shard[1] == 1:
+        return "all files"
+    return f"shard {shard[0] + 1} of {shard[1]}"
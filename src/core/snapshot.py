@@ -0,0 +1,288 @@
+from utils.logger import setup_logger
+from utils.db_manager import DatabaseManager, category_name, ensure_schema, parse_tags
+from utils import metrics
+from core.reports import AMOUNT_EXPR, REPORT_COLUMNS, REPORT_TYPES, UNCATEGORIZED, UNTAGGED
+from core.normalizer import DB_DATE_FORMAT
+from typing import Dict, List, Optional, Tuple
+import time
+import numpy as np
+import pandas as pd
+
+logger = setup_logger()
+
+LOAD_CHUNK_SIZE = 100000
+# Past this share of the table changed, one full reload is cheaper than patching.
+FULL_RELOAD_FRACTION = 0.25
+
+# The range of ChangeLog entries, and whether the oldest is clear_db_data's reset entry.
+SELECT_CHANGE_RANGE_QUERY = """
+SELECT MIN(seq), MAX(seq), (SELECT row IS NULL FROM ChangeLog ORDER BY seq LIMIT 1) FROM ChangeLog
+"""
+SELECT_ROWS_QUERY = f"SELECT rowid, {AMOUNT_EXPR}, date, category, tags FROM ImageData"
+SELECT_ALL_ROWS_QUERY = SELECT_ROWS_QUERY + " ORDER BY rowid"
+SELECT_CHANGED_ROWIDS_QUERY = "SELECT DISTINCT row FROM ChangeLog WHERE seq > ? AND seq <= ? ORDER BY row"
+SELECT_CHANGED_ROWS_QUERY = SELECT_ROWS_QUERY + """
+WHERE rowid IN (SELECT row FROM ChangeLog WHERE seq > ? AND seq <= ?)
+ORDER BY rowid
+"""
+
+Columns = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def _category_key(value) -> str:
+    return category_name(value) if isinstance(value, str) else ''
+
+
+def _tags_key(value) -> str:
+    return value if isinstance(value, str) else ''
+
+
+def _to_days(values) -> np.ndarray:
+    """Parses YYYY-MM-DD strings to datetime64[D], NaT where missing or unparsable."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format=DB_DATE_FORMAT, errors="coerce")
+    # Append NaT so the -1 code of missing values maps onto it.
+    days = np.append(parsed.to_numpy(dtype="datetime64[D]"), np.datetime64("NaT", "D"))
+    return days[codes]
+
+
+class ColumnarSnapshot:
+    """
+    In-memory, columnar copy of the ImageData columns the dashboard aggregates.
+
+    Rows are kept in rowid order as NumPy arrays: amount (float64, NaN if unknown),
+    date (datetime64[D], NaT if unknown) and category and tags dictionary-encoded as
+    int32 codes into lists of their distinct values, about 32 bytes per row. Filters,
+    totals and group-bys are then vectorized and never touch the database.
+
+    refresh() catches up from the ChangeLog table, re-reading only the rows changed
+    since the previous refresh. Not thread-safe; use it from one thread.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # Last ChangeLog entry applied; None until the first load.
+        self.seq: Optional[int] = None
+        self.rowids = np.empty(0, dtype=np.int64)
+        self.amounts = np.empty(0, dtype=np.float64)
+        self.dates = np.empty(0, dtype="datetime64[D]")
+        self.category_codes = np.empty(0, dtype=np.int32)
+        self.tag_codes = np.empty(0, dtype=np.int32)
+        self._reset_dictionaries()
+
+    def _reset_dictionaries(self) -> None:
+        # Distinct category names (trimmed) and distinct raw tags values, by code.
+        self.categories: List[str] = []
+        self.tag_values: List[str] = []
+        self._category_index: Dict[str, int] = {}
+        self._tag_index: Dict[str, int] = {}
+        # parse_tags of tag_values, filled in lazily.
+        self._tag_names: List[List[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.rowids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self._columns())
+
+    def _columns(self) -> Columns:
+        return self.rowids, self.amounts, self.dates, self.category_codes, self.tag_codes
+
+    def _set_columns(self, columns) -> None:
+        self.rowids, self.amounts, self.dates, self.category_codes, self.tag_codes = columns
+
+    @staticmethod
+    def _encode(values, index: Dict[str, int], distinct: List[str], key) -> np.ndarray:
+        """Dictionary-encodes values, adding unseen keys to the dictionary."""
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+        mapping = np.empty(len(uniques) + 1, dtype=np.int32)
+        for i, value in enumerate(list(uniques) + [None]):
+            name = key(value)
+            code = index.get(name)
+            if code is None:
+                code = index[name] = len(distinct)
+                distinct.append(name)
+            mapping[i] = code
+        return mapping[codes]
+
+    def _to_columns(self, rows: List[tuple]) -> Columns:
+        if not rows:
+            return tuple(column[:0] for column in self._columns())
+        rowids, amounts, dates, categories, tags = zip(*rows)
+        return (
+            np.array(rowids, dtype=np.int64),
+            np.array(amounts, dtype=np.float64),
+            _to_days(dates),
+            self._encode(categories, self._category_index, self.categories, _category_key),
+            self._encode(tags, self._tag_index, self.tag_values, _tags_key),
+        )
+
+    def refresh(self) -> int:
+        """
+        Brings the snapshot up to date with the database.
+
+        Returns:
+            int: Rows read, 0 if nothing changed.
+        """
+        started = time.perf_counter()
+        with DatabaseManager(self.db_path) as cursor:
+            if self.seq is None:
+                ensure_schema(cursor)
+                cursor.connection.commit()
+            # One read transaction, so the change range and the rows agree.
+            cursor.execute("BEGIN")
+            cursor.execute(SELECT_CHANGE_RANGE_QUERY)
+            first, last, first_is_reset = cursor.fetchone()
+            last = last or 0
+            if self.seq == last:
+                return 0
+            fell_behind = (
+                self.seq is None or last < self.seq
+                or (first is not None and (first > self.seq + 1 or (first > self.seq and first_is_reset)))
+            )
+            if fell_behind or last - self.seq > FULL_RELOAD_FRACTION * max(len(self), 1):
+                read = self._load(cursor)
+                mode = "full"
+            else:
+                read = self._apply_changes(cursor, self.seq, last)
+                mode = "incremental"
+        self.seq = last
+        metrics.inc("snapshot_refresh_total", mode=mode)
+        logger.debug(f"Snapshot {mode} refresh read {read} rows in {(time.perf_counter() - started) * 1000:.1f} ms "
+                     f"({len(self)} rows, {self.nbytes / (1024 * 1024):.1f} MB).")
+        return read
+
+    def _load(self, cursor) -> int:
+        self._reset_dictionaries()
+        cursor.execute(SELECT_ALL_ROWS_QUERY)
+        chunks = []
+        while True:
+            rows = cursor.fetchmany(LOAD_CHUNK_SIZE)
+            if not rows:
+                break
+            chunks.append(self._to_columns(rows))
+        if chunks:
+            self._set_columns(tuple(np.concatenate(parts) for parts in zip(*chunks)))
+        else:
+            self._set_columns(self._to_columns([]))
+        return len(self)
+
+    def _apply_changes(self, cursor, after_seq: int, last_seq: int) -> int:
+        cursor.execute(SELECT_CHANGED_ROWIDS_QUERY, (after_seq, last_seq))
+        changed = np.array([row[0] for row in cursor.fetchall()], dtype=np.int64)
+        cursor.execute(SELECT_CHANGED_ROWS_QUERY, (after_seq, last_seq))
+        fetched = self._to_columns(cursor.fetchall())
+
+        # Changed rows that are no longer in the table were deleted.
+        gone = np.setdiff1d(changed, fetched[0], assume_unique=True)
+        if gone.size:
+            keep = ~np.isin(self.rowids, gone)
+            self._set_columns(tuple(column[keep] for column in self._columns()))
+
+        if fetched[0].size:
+            positions = np.searchsorted(self.rowids, fetched[0])
+            found = positions < len(self.rowids)
+            found[found] = self.rowids[positions[found]] == fetched[0][found]
+            for column, values in zip(self._columns(), fetched):
+                column[positions[found]] = values[found]
+            if not found.all():
+                # Fetched rows are in rowid order, so one insert keeps the columns sorted.
+                self._set_columns(tuple(
+                    np.insert(column, positions[~found], values[~found])
+                    for column, values in zip(self._columns(), fetched)
+                ))
+        return len(fetched[0])
+
+    def _tag_lists(self) -> List[List[str]]:
+        while len(self._tag_names) < len(self.tag_values):
+            self._tag_names.append(parse_tags(self.tag_values[len(self._tag_names)]))
+        return self._tag_names
+
+    def mask(self, category: Optional[str] = None, tag: Optional[str] = None) -> np.ndarray:
+        """
+        Boolean row mask for an exact category and/or tag, matched case-insensitively
+        like db_manager.record_filter.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if category is not None:
+            wanted = category_name(category).lower()
+            # Look the codes up in a per-code table; cheaper than np.isin over every row.
+            matching = np.array([name.lower() == wanted for name in self.categories], dtype=bool)
+            mask &= matching[self.category_codes]
+        if tag is not None:
+            wanted = tag.strip().lower()
+            matching = np.array([any(name.lower() == wanted for name in names) for names in self._tag_lists()], dtype=bool)
+            mask &= matching[self.tag_codes]
+        return mask
+
+    def summary(self, mask: Optional[np.ndarray] = None) -> Dict[str, object]:
+        """
+        Count, total amount and date range of the (masked) rows, as the dashboard shows them.
+        """
+        amounts = self.amounts if mask is None else self.amounts[mask]
+        dates = self.dates if mask is None else self.dates[mask]
+        dates = dates[~np.isnat(dates)]
+        return {
+            "count": int(amounts.size),
+            "total": float(np.nansum(amounts)),
+            "min_date": str(dates.min()) if dates.size else None,
+            "max_date": str(dates.max()) if dates.size else None,
+        }
+
+    def _group_totals(self, codes: np.ndarray, size: int, mask: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """(records, total amount) per code."""
+        amounts = self.amounts
+        if mask is not None:
+            codes, amounts = codes[mask], amounts[mask]
+        records = np.bincount(codes, minlength=size)
+        totals = np.bincount(codes, weights=np.nan_to_num(amounts), minlength=size)
+        return records, totals
+
+    def report(self, report_type: str, mask: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        Returns the same rows as ReportEngine.get_report, computed from the snapshot.
+        """
+        if report_type not in REPORT_TYPES:
+            raise ValueError(f"Unknown report type: {report_type}")
+        if report_type == "monthly":
+            dates, amounts = (self.dates, self.amounts) if mask is None else (self.dates[mask], self.amounts[mask])
+            known = ~np.isnat(dates)
+            months, codes = np.unique(dates[known].astype("datetime64[M]"), return_inverse=True)
+            records = np.bincount(codes, minlength=len(months))
+            totals = np.bincount(codes, weights=np.nan_to_num(amounts[known]), minlength=len(months))
+            rows, running_total, previous = [], 0.0, None
+            for month, count, total in zip(months, records.tolist(), totals.tolist()):
+                running_total += total
+                rows.append(dict(zip(REPORT_COLUMNS["monthly"], (
+                    str(month), count, total, running_total, None if previous is None else total - previous
+                ))))
+                previous = total
+            return rows
+
+        if report_type == "category":
+            records, totals = self._group_totals(self.category_codes, len(self.categories), mask)
+            merged: Dict[str, List[float]] = {}
+            for name, count, total in zip(self.categories, records.tolist(), totals.tolist()):
+                if count:
+                    entry = merged.setdefault(name or UNCATEGORIZED, [0, 0.0])
+                    entry[0] += count
+                    entry[1] += total
+            grand_total = sum(total for _, total in merged.values())
+            rows = [dict(zip(REPORT_COLUMNS["category"], (
+                name, count, total, 100.0 * total / grand_total if grand_total else None
+            ))) for name, (count, total) in merged.items()]
+            rows.sort(key=lambda row: row["total"], reverse=True)
+            return rows
+
+        records, totals = self._group_totals(self.tag_codes, len(self.tag_values), mask)
+        merged = {}
+        for names, count, total in zip(self._tag_lists(), records.tolist(), totals.tolist()):
+            if count:
+                for name in names or [UNTAGGED]:
+                    entry = merged.setdefault(name, [0, 0.0])
+                    entry[0] += count
+                    entry[1] += total
+        rows = [{"tag": name, "records": count, "total": total} for name, (count, total) in merged.items()]
+        rows.sort(key=lambda row: row["total"], reverse=True)
+        return rows
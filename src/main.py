@@ -1,28 +1,140 @@
 from utils.logger import setup_logger
-from UI.tk_UI import run_ui
+import argparse
 import os
 import logging
 
 logger = setup_logger()
 
-def main() -> None:
+DEFAULT_DB_PATH = os.path.join("outputs", "DB", "image_data.db")
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """
+    Parses command line arguments. Without a command the UI is launched.
+    """
+    from core.scheduling import DEFAULT_DISPATCH_ORDER, DISPATCH_ORDERS
+
+    parser = argparse.ArgumentParser(description="Expense Tracker AI")
+    subparsers = parser.add_subparsers(dest="command")
+
+    report_parser = subparsers.add_parser("report", help="Print a spend summary report")
+    report_parser.add_argument("report_type", choices=("monthly", "category", "tag"))
+    report_parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to the SQLite database")
+
+    normalize_parser = subparsers.add_parser("normalize", help="Backfill normalized amounts, currencies, dates and the category/tag index")
+    normalize_parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to the SQLite database")
+    normalize_parser.add_argument("--all", action="store_true", help="Re-normalize every row, not only missing ones")
+
+    ingest_parser = subparsers.add_parser("ingest", help="Analyze a folder without the UI")
+    ingest_parser.add_argument("--source", default="inputs", help="Folder with images and PDFs")
+    ingest_parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to the SQLite database")
+    ingest_parser.add_argument("--workers", type=int, default=0,
+                               help="Worker processes for hashing and extraction (0 = threads in this process)")
+    ingest_parser.add_argument("--shard", default="1/1",
+                               help="Process only shard i of n (e.g. 2/3) when several hosts share the input folder")
+    ingest_parser.add_argument("--restart", action="store_true", help="Start over instead of resuming an interrupted run")
+    ingest_parser.add_argument("--order", choices=DISPATCH_ORDERS, default=DEFAULT_DISPATCH_ORDER,
+                               help="Order in which a fresh run dispatches files (fastest = shortest expected time first)")
+    ingest_parser.add_argument("--store", action="store_true",
+                               help="Keep one copy of each receipt in the content store (outputs/store)")
+    ingest_parser.add_argument("--skip-near-duplicates", action="store_true",
+                               help="Skip receipts that look like a saved one and record the same amount and day, "
+                                    "instead of saving them tagged for review")
+    ingest_parser.add_argument("--metrics-port", type=int, default=None,
+                               help="Serve Prometheus metrics on this port while the run lasts")
+    ingest_parser.add_argument("--metrics-file", default=os.path.join("outputs", "metrics", "pipeline.prom"),
+                               help="Prometheus text file written when the run ends")
+
+    return parser.parse_args(argv)
+
+def run_report(report_type: str, db_path: str) -> None:
+    """
+    Prints a report to stdout.
+    """
+    from core.reports import ReportEngine, format_report
+
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database not found: {db_path}")
+    rows = ReportEngine(db_path).get_report(report_type)
+    print(format_report(rows, report_type))
+
+def run_normalize(db_path: str, all_rows: bool) -> None:
+    """
+    Normalizes amounts and dates of existing rows in place.
+    """
+    from core.normalizer import backfill_normalized_columns
+    from utils.db_manager import backfill_tag_index
+
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database not found: {db_path}")
+    updated = backfill_normalized_columns(db_path, only_missing=not all_rows)
+    print(f"Normalized {updated:,} records.")
+    indexed = backfill_tag_index(db_path)
+    print(f"Indexed categories and tags of {indexed:,} records.")
+
+def run_ingest(source_path: str, db_path: str, workers: int, shard_spec: str, restart: bool,
+               metrics_port: int = None, metrics_file: str = None, dispatch_order: str = None,
+               store: bool = False, skip_near_duplicates: bool = False) -> None:
+    """
+    Runs the analysis pipeline from the command line, printing progress and a summary.
+    """
+    from core.processor import RunSummary, get_image_data
+    from core.scheduling import DEFAULT_DISPATCH_ORDER
+    from core.sharding import parse_shard
+    from utils.blob_store import BlobStore
+    from utils.metrics import start_metrics_server
+
+    if not os.path.isdir(source_path):
+        raise FileNotFoundError(f"Source folder not found: {source_path}")
+    server = start_metrics_server(metrics_port) if metrics_port is not None else None
+    summary = RunSummary()
+    last_reported = 0.0
+    for processed, total in get_image_data(source_path, db_path, resume=not restart, summary=summary,
+                                           workers=workers, shard=parse_shard(shard_spec),
+                                           metrics_file=metrics_file,
+                                           dispatch_order=dispatch_order or DEFAULT_DISPATCH_ORDER,
+                                           blob_store=BlobStore() if store else None,
+                                           skip_near_duplicates=skip_near_duplicates):
+        if total and (processed == total or processed - last_reported >= total / 100):
+            last_reported = processed
+            print(f"\r{processed:,}/{total:,} files", end="", flush=True)
+    print()
+    print(summary.format())
+    print(summary.metrics)
+    if server:
+        server.shutdown()
+
+def main(argv=None) -> None:
     """
     Main function that serves as the entry point of the application.
     """
+    args = parse_args(argv)
     try:
+        if args.command == "report":
+            run_report(args.report_type, args.db)
+            return
+        if args.command == "normalize":
+            run_normalize(args.db, args.all)
+            return
+        if args.command == "ingest":
+            run_ingest(args.source, args.db, args.workers, args.shard, args.restart,
+                       args.metrics_port, args.metrics_file, args.order, args.store,
+                       args.skip_near_duplicates)
+            return
+
         logger.info("Starting the Expense Tracker AI application")
-        
+
         # Ensure required directories exist
         os.makedirs("inputs", exist_ok=True)
         os.makedirs(os.path.join("outputs", "DB"), exist_ok=True)
         os.makedirs(os.path.join("outputs", "logs"), exist_ok=True)
-        
+
         # Launch the UI
+        from UI.tk_UI import run_ui
         run_ui()
-        
+
     except Exception as e:
         logger.error(f"Error during application startup: {str(e)}")
         raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,302 @@
+import mailbox
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
+from email import message_from_binary_file
+from typing import Iterator, List, Optional, Tuple
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# A file inside an archive or mail export is addressed as "<container>!<member>",
+# e.g. "inputs/march.zip!scans/receipt_01.jpg" or "inputs/inbox.mbox!12/2/invoice.pdf"
+# (message 12, MIME part 2). Such paths are stored in original_path like any other.
+MEMBER_SEPARATOR = "!"
+ZIP_EXTENSIONS = (".zip",)
+TAR_EXTENSIONS = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+MAIL_EXTENSIONS = (".mbox", ".eml")
+CONTAINER_EXTENSIONS = ZIP_EXTENSIONS + TAR_EXTENSIONS + MAIL_EXTENSIONS
+# Raised by the readers for damaged containers; surfaced as OSError.
+CONTAINER_ERRORS = (zipfile.BadZipFile, tarfile.TarError, mailbox.Error, ValueError)
+# Open containers kept per process, so reading many members does not re-read the index.
+MAX_OPEN_CONTAINERS = 8
+
+
+def is_container(path: str) -> bool:
+    """Whether the file is an archive or mail export whose members can be ingested."""
+    return path.lower().endswith(CONTAINER_EXTENSIONS)
+
+
+def member_path(container: str, member: str) -> str:
+    return f"{container}{MEMBER_SEPARATOR}{member}"
+
+
+def split_member_path(path: str) -> Optional[Tuple[str, str]]:
+    """
+    Splits "<container>!<member>" into its parts.
+
+    Returns:
+        Optional[Tuple[str, str]]: (container path, member name), or None for a plain file.
+    """
+    start = 0
+    while True:
+        index = path.find(MEMBER_SEPARATOR, start)
+        if index < 0:
+            return None
+        if is_container(path[:index]):
+            return path[:index], path[index + 1:]
+        start = index + 1
+
+
+def is_member_path(path: str) -> bool:
+    return split_member_path(path) is not None
+
+
+def _attachments(message) -> Iterator[Tuple[int, str, object]]:
+    """Yields (part number, file name, part) for each named MIME part of a message."""
+    for number, part in enumerate(message.walk()):
+        filename = part.get_filename()
+        if filename and not part.is_multipart():
+            yield number, filename.replace("/", "_").replace(MEMBER_SEPARATOR, "_"), part
+
+
+class _Container:
+    """An open archive or mail export. Reads are serialized, members are small."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def members(self) -> List[Tuple[str, int]]:
+        """(member name, size in bytes) of every file in the container."""
+        raise NotImplementedError
+
+    def read(self, member: str) -> bytes:
+        raise NotImplementedError
+
+    def size(self, member: str) -> int:
+        return len(self.read(member))
+
+
+class _ZipContainer(_Container):
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.archive = zipfile.ZipFile(path)
+
+    def members(self):
+        return [(info.filename, info.file_size) for info in self.archive.infolist() if not info.is_dir()]
+
+    def read(self, member):
+        with self.lock:
+            return self.archive.read(member)
+
+    def size(self, member):
+        return self.archive.getinfo(member).file_size
+
+
+class _TarContainer(_Container):
+    """
+    Compressed tars are only cheap to read forwards: reading an earlier member
+    than the last one restarts the decompression, so the "walk" dispatch order
+    suits large compressed tars best.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.archive = tarfile.open(path, "r:*")
+
+    def members(self):
+        with self.lock:
+            return [(info.name, info.size) for info in self.archive.getmembers() if info.isfile()]
+
+    def read(self, member):
+        with self.lock:
+            extracted = self.archive.extractfile(self.archive.getmember(member))
+            if extracted is None:
+                raise FileNotFoundError(f"{member} is not a regular file in {self.path}")
+            return extracted.read()
+
+    def size(self, member):
+        with self.lock:
+            return self.archive.getmember(member).size
+
+
+class _MboxContainer(_Container):
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.mailbox = mailbox.mbox(path, create=False)
+
+    def members(self):
+        found = []
+        with self.lock:
+            for key, message in self.mailbox.iteritems():
+                for number, filename, part in _attachments(message):
+                    found.append((f"{key}/{number}/{filename}", len(part.get_payload(decode=True) or b"")))
+        return found
+
+    def read(self, member):
+        key, number, _ = member.split("/", 2)
+        with self.lock:
+            message = self.mailbox.get_message(int(key))
+        for part_number, _, part in _attachments(message):
+            if part_number == int(number):
+                return part.get_payload(decode=True) or b""
+        raise FileNotFoundError(f"No attachment {member} in {self.path}")
+
+
+class _EmlContainer(_Container):
+    def __init__(self, path: str):
+        super().__init__(path)
+        with open(path, "rb") as f:
+            self.message = message_from_binary_file(f)
+
+    def members(self):
+        return [(f"{number}/{filename}", len(part.get_payload(decode=True) or b""))
+                for number, filename, part in _attachments(self.message)]
+
+    def read(self, member):
+        number = int(member.split("/", 1)[0])
+        for part_number, _, part in _attachments(self.message):
+            if part_number == number:
+                return part.get_payload(decode=True) or b""
+        raise FileNotFoundError(f"No attachment {member} in {self.path}")
+
+
+_open_lock = threading.Lock()
+_open_containers: "OrderedDict[Tuple[str, int], _Container]" = OrderedDict()
+
+
+def _forget_open_containers() -> None:
+    # A forked worker must not share the parent's file offsets; it opens its own.
+    global _open_lock
+    _open_lock = threading.Lock()
+    _open_containers.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_open_containers)
+
+
+def _open_container(path: str) -> _Container:
+    """Returns an open container, reused while the file is unchanged."""
+    key = (os.path.abspath(path), os.stat(path).st_mtime_ns)
+    with _open_lock:
+        container = _open_containers.get(key)
+        if container is not None:
+            _open_containers.move_to_end(key)
+            return container
+    lower = path.lower()
+    if lower.endswith(ZIP_EXTENSIONS):
+        container = _ZipContainer(path)
+    elif lower.endswith(TAR_EXTENSIONS):
+        container = _TarContainer(path)
+    elif lower.endswith(".mbox"):
+        container = _MboxContainer(path)
+    else:
+        container = _EmlContainer(path)
+    with _open_lock:
+        _open_containers[key] = container
+        while len(_open_containers) > MAX_OPEN_CONTAINERS:
+            # Not closed here: another thread may still be reading it. It closes
+            # its file once the last reference is gone.
+            _open_containers.popitem(last=False)
+    return container
+
+
+def iter_member_paths(container: str, extensions: Tuple[str, ...]) -> Iterator[str]:
+    """
+    Yields the virtual paths of the container's members with one of the given
+    extensions, in archive order, without extracting anything.
+    """
+    try:
+        members = _open_container(container).members()
+    except (OSError,) + CONTAINER_ERRORS as e:
+        logger.warning(f"Could not read archive {container}: {e}")
+        return
+    for name, _ in members:
+        if name.lower().endswith(extensions):
+            yield member_path(container, name)
+
+
+def read_bytes(path: str) -> bytes:
+    """
+    Returns the content of a plain file or of an archive member.
+
+    Raises:
+        FileNotFoundError: If the file or member does not exist.
+        OSError: If the container cannot be read.
+    """
+    parts = split_member_path(path)
+    if parts is None:
+        with open(path, "rb") as f:
+            return f.read()
+    container, member = parts
+    try:
+        return _open_container(container).read(member)
+    except KeyError as e:
+        raise FileNotFoundError(f"No member {member} in {container}") from e
+    except CONTAINER_ERRORS as e:
+        raise OSError(f"Could not read {container}: {e}") from e
+
+
+def path_exists(path: str) -> bool:
+    """Whether the file, or for a member the container holding it, exists."""
+    parts = split_member_path(path)
+    return os.path.isfile(parts[0] if parts else path)
+
+
+def size_and_mtime(path: str) -> Tuple[int, float]:
+    """
+    Size in bytes and modification time of a file; a member reports its own size
+    and its container's modification time.
+
+    Raises:
+        OSError: If the file or container cannot be read.
+    """
+    parts = split_member_path(path)
+    if parts is None:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime
+    container, member = parts
+    mtime = os.stat(container).st_mtime
+    try:
+        return _open_container(container).size(member), mtime
+    except KeyError as e:
+        raise FileNotFoundError(f"No member {member} in {container}") from e
+    except CONTAINER_ERRORS as e:
+        raise OSError(f"Could not read {container}: {e}") from e
+
+
+@contextmanager
+def local_file(path: str) -> Iterator[str]:
+    """
+    Yields a path on disk holding the file's content: the path itself for a plain
+    file, a temporary copy of just that member (deleted afterwards) for a member,
+    for libraries that can only open paths.
+    """
+    if not is_member_path(path):
+        yield path
+        return
+    suffix = os.path.splitext(path)[1]
+    handle, temp_path = tempfile.mkstemp(suffix=suffix, prefix="member_")
+    try:
+        with os.fdopen(handle, "wb") as f:
+            f.write(read_bytes(path))
+        yield temp_path
+    finally:
+        os.remove(temp_path)
+
+
+def copy_to(path: str, dest: str) -> None:
+    """Copies a plain file or a member to dest."""
+    parts = split_member_path(path)
+    if parts is None:
+        shutil.copyfile(path, dest)
+        return
+    with open(dest, "wb") as f:
+        f.write(read_bytes(path))
@@ -0,0 +1,122 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from utils.logger import setup_logger
+from utils.archives import read_bytes
+from utils import metrics
+
+logger = setup_logger()
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_BLOB_STORE_DIR = os.path.join("outputs", "store")
+COMPRESSED_SUFFIX = ".zst"
+# Only PDFs are compressed; JPEG and PNG receipts are already compressed.
+COMPRESSIBLE_EXTENSIONS = (".pdf",)
+ZSTD_LEVEL = 10
+
+
+class BlobStore:
+    """
+    Content-addressable receipt store: each distinct file is kept once, named by
+    its content hash (see utils.hashing) under two levels of 2-character shard
+    directories, e.g. store/3f/a2/3fa2...; PDFs are zstd-compressed when the
+    zstandard package is installed.
+
+    ImageData.content_hash refers to the blob, so previews and exports keep
+    working after the source folder moved. Exports clone or copy blobs (see
+    core.exporter) and never hard-link them, since blobs are shared by every
+    record with the same content.
+    """
+
+    def __init__(self, root: str = DEFAULT_BLOB_STORE_DIR, compress: bool = True):
+        self.root = root
+        self.compress = compress and zstandard is not None
+
+    def _base_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def blob_path(self, digest: Optional[str]) -> Optional[str]:
+        """Path of the stored blob (ending in .zst if compressed), or None if it is not stored."""
+        if not digest:
+            return None
+        base = self._base_path(digest)
+        for path in (base, base + COMPRESSED_SUFFIX):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def __contains__(self, digest: str) -> bool:
+        return self.blob_path(digest) is not None
+
+    def put(self, file_path: str, digest: str) -> bool:
+        """
+        Stores a file (or archive member) under its content hash unless a blob with
+        that hash is already stored.
+
+        Returns:
+            bool: Whether the blob was newly written.
+        """
+        if digest in self:
+            metrics.inc("blob_store_total", result="deduplicated")
+            return False
+        data = read_bytes(file_path)
+        path = self._base_path(digest)
+        if self.compress and file_path.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+            data = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+            path += COMPRESSED_SUFFIX
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary name first so a crash never leaves a truncated blob.
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        metrics.inc("blob_store_total", result="stored")
+        metrics.inc("blob_store_bytes_total", len(data))
+        return True
+
+    def read(self, digest: str) -> bytes:
+        """
+        Returns the original content of a blob.
+
+        Raises:
+            FileNotFoundError: If the blob is not stored.
+            OSError: If it is compressed and zstandard is not installed.
+        """
+        path = self.blob_path(digest)
+        if path is None:
+            raise FileNotFoundError(f"Blob {digest} is not in {self.root}")
+        with open(path, "rb") as f:
+            data = f.read()
+        if path.endswith(COMPRESSED_SUFFIX):
+            if zstandard is None:
+                raise OSError(f"Blob {digest} is zstd-compressed; install zstandard to read it.")
+            data = zstandard.ZstdDecompressor().decompress(data)
+        return data
+
+    @contextmanager
+    def local_file(self, digest: str, suffix: str = "") -> Iterator[str]:
+        """
+        Yields a path holding the blob's original content: the blob itself when it
+        is stored uncompressed, otherwise a temporary copy deleted afterwards.
+        """
+        path = self.blob_path(digest)
+        if path is not None and not path.endswith(COMPRESSED_SUFFIX):
+            yield path
+            return
+        handle, temp_path = tempfile.mkstemp(suffix=suffix, prefix="blob_")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                f.write(self.read(digest))
+            yield temp_path
+        finally:
+            os.remove(temp_path)
@@ -1,6 +1,11 @@
+import json
+import os
+import re
 import sqlite3
 from utils.logger import setup_logger
+from utils import metrics
 from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
 
 logger = setup_logger()
 
@@ -12,17 +17,179 @@ CREATE TABLE IF NOT EXISTS ImageData (
     original_path TEXT,
     rename_name TEXT,
     category TEXT DEFAULT '',
-    tags TEXT DEFAULT ''
+    tags TEXT DEFAULT '',
+    amount_value REAL,
+    currency TEXT,
+    phash TEXT,
+    content_hash TEXT
 )
 """
 
+# Columns added after the original schema; older databases are migrated in ensure_schema.
+MIGRATED_COLUMNS = {
+    "amount_value": "REAL",
+    "currency": "TEXT",
+    "phash": "TEXT",
+    "content_hash": "TEXT",
+    "category_id": "INTEGER",
+}
+
+# Bumped on every schema change below; ensure_schema does nothing once a database
+# reports this version in PRAGMA user_version.
+SCHEMA_VERSION = 3
+
+# DataVersion holds a single counter that every write helper in this module bumps once
+# per transaction (see bump_data_version), so caches (reports, snapshots) can tell
+# cheaply whether the data moved. Writes made elsewhere must call bump_data_version too.
+CREATE_VERSION_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS DataVersion (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+)
+"""
+SEED_VERSION_QUERY = "INSERT OR IGNORE INTO DataVersion (id, version) VALUES (1, 0)"
+# Per-row triggers of earlier versions; they cost one write per changed row.
+DROP_VERSION_TRIGGER_QUERIES = [
+    f"DROP TRIGGER IF EXISTS imagedata_version_{event}" for event in ("insert", "update", "delete")
+]
+BUMP_VERSION_QUERY = "UPDATE DataVersion SET version = version + 1 WHERE id = 1"
+SELECT_VERSION_QUERY = "SELECT version FROM DataVersion WHERE id = 1"
+
+# ChangeLog records the rowid of every ImageData row the write helpers insert, update
+# or delete (see log_changed_rows), so in-memory snapshots (core.snapshot) catch up by
+# re-reading just those rows. clear_db_data leaves a single entry with a NULL row,
+# meaning "everything changed". The log keeps the newest CHANGE_LOG_MAX_ROWS
+# entries; a snapshot that fell further behind reloads in full.
+CHANGE_LOG_MAX_ROWS = 100000
+CREATE_CHANGE_LOG_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS ChangeLog (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    row INTEGER
+)
+"""
+# Earlier versions filled the log from per-row triggers and did not allow the NULL entry.
+DROP_CHANGE_LOG_QUERIES = [
+    "DROP TRIGGER IF EXISTS imagedata_changes_insert",
+    "DROP TRIGGER IF EXISTS imagedata_changes_update",
+    "DROP TRIGGER IF EXISTS imagedata_changes_delete",
+    "DROP TRIGGER IF EXISTS changelog_trim",
+    "DROP TABLE IF EXISTS ChangeLog",
+]
+INSERT_CHANGE_QUERY = "INSERT INTO ChangeLog (row) VALUES (?)"
+TRIM_CHANGE_LOG_QUERY = f"DELETE FROM ChangeLog WHERE seq <= (SELECT MAX(seq) FROM ChangeLog) - {CHANGE_LOG_MAX_ROWS}"
+CLEAR_CHANGE_LOG_QUERY = "DELETE FROM ChangeLog"
+
+# Categories and tags normalized out of the free-text category and tags columns,
+# so filtering by either is an index lookup instead of a LIKE scan. Names compare
+# case-insensitively; ImageData.category_id is NULL until a row has been indexed,
+# '' being the "no category" row. The helpers below keep the index in step (see
+# index_records); rows edited outside them are picked up by backfill_tag_index only
+# while their category_id is NULL.
+CREATE_CATEGORY_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS Category (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE
+)
+"""
+CREATE_TAG_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS Tag (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE
+)
+"""
+CREATE_IMAGE_TAG_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS ImageTag (
+    tag_id INTEGER NOT NULL,
+    image_id TEXT NOT NULL,
+    PRIMARY KEY (tag_id, image_id)
+) WITHOUT ROWID
+"""
+
+# Sort orders of the records table and the column each sorts by. Each order has an
+# index on (column, id) and one on (category_id, column, id) for the category
+# filter, so any page of any order is an index range scan; id breaks ties so
+# keyset pagination neither skips nor repeats rows.
+SORT_COLUMNS = {"date": "date", "amount": "amount_value", "category": "category"}
+DEFAULT_SORT = "date"
+DEFAULT_PAGE_SIZE = 500
+# A tag on at least this many rows is filtered by walking the sort index and probing
+# ImageTag (a page stops early); rarer tags are looked up first and their rows sorted.
+COMMON_TAG_ROWS = 20000
+COUNT_TAG_ROWS_QUERY = """
+SELECT COUNT(*) FROM (
+    SELECT 1 FROM ImageTag WHERE tag_id = (SELECT id FROM Tag WHERE name = ?) LIMIT ?
+)
+"""
+RECORD_COLUMNS = ("id", "amount", "date", "original_path", "rename_name", "category", "tags")
+
+INDEX_QUERIES = [
+    "CREATE INDEX IF NOT EXISTS idx_imagetag_image ON ImageTag (image_id)",
+] + [
+    f"CREATE INDEX IF NOT EXISTS idx_imagedata_sort_{key} ON ImageData ({column}, id)"
+    for key, column in SORT_COLUMNS.items()
+] + [
+    f"CREATE INDEX IF NOT EXISTS idx_imagedata_category_{key} ON ImageData (category_id, {column}, id)"
+    for key, column in SORT_COLUMNS.items()
+]
+# Superseded by the idx_imagedata_category_* indexes, which start with the same column.
+DROP_OLD_INDEX_QUERY = "DROP INDEX IF EXISTS idx_imagedata_category"
+# Per-row triggers of earlier versions; a trigger on ImageData also keeps a full
+# DELETE from using SQLite's truncate optimization.
+DROP_INDEX_TRIGGER_QUERIES = [
+    "DROP TRIGGER IF EXISTS imagedata_tags_delete",
+    "DROP TRIGGER IF EXISTS imagedata_tags_stale",
+]
+SELECT_CATEGORY_NAMES_QUERY = """
+SELECT name FROM Category
+WHERE name != '' AND EXISTS (SELECT 1 FROM ImageData WHERE category_id = Category.id)
+ORDER BY name
+"""
+SELECT_TAG_NAMES_QUERY = """
+SELECT name FROM Tag
+WHERE EXISTS (SELECT 1 FROM ImageTag WHERE tag_id = Tag.id)
+ORDER BY name
+"""
+CREATE_INDEX_IDS_QUERY = "CREATE TEMP TABLE IF NOT EXISTS index_ids (id TEXT PRIMARY KEY)"
+INSERT_INDEX_ID_QUERY = "INSERT OR IGNORE INTO index_ids (id) VALUES (?)"
+CLEAR_INDEX_IDS_QUERY = "DELETE FROM index_ids"
+SELECT_INDEX_ROWS_QUERY = "SELECT id, category, tags FROM ImageData WHERE id IN (SELECT id FROM index_ids)"
+SELECT_UNINDEXED_ROWS_QUERY = "SELECT id, category, tags FROM ImageData WHERE category_id IS NULL LIMIT ?"
+UPDATE_CATEGORY_ID_QUERY = "UPDATE ImageData SET category_id = ? WHERE id = ? AND category_id IS NOT ?"
+DELETE_IMAGE_TAGS_QUERY = "DELETE FROM ImageTag WHERE image_id = ?"
+INSERT_IMAGE_TAG_QUERY = "INSERT OR IGNORE INTO ImageTag (tag_id, image_id) VALUES (?, ?)"
+INDEX_CHUNK_SIZE = 50000
+
 DELETE_ALL_QUERY = "DELETE FROM ImageData"
+DELETE_ALL_IMAGE_TAGS_QUERY = "DELETE FROM ImageTag"
 INSERT_DATA_QUERY = """
-INSERT INTO ImageData (id, amount, date, original_path, rename_name, category, tags)
-VALUES (?, ?, ?, ?, ?, ?, ?)
+INSERT INTO ImageData (id, amount, date, original_path, rename_name, category, tags, amount_value, currency, phash, content_hash)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 """
+INSERT_OR_IGNORE_DATA_QUERY = INSERT_DATA_QUERY.replace("INSERT INTO", "INSERT OR IGNORE INTO")
+SELECT_MAX_ROWID_QUERY = "SELECT MAX(rowid) FROM ImageData"
 SELECT_ALL_QUERY = "SELECT * FROM ImageData ORDER BY id"
 
+CREATE_DELETE_IDS_QUERY = "CREATE TEMP TABLE IF NOT EXISTS delete_ids (id TEXT PRIMARY KEY)"
+INSERT_DELETE_ID_QUERY = "INSERT OR IGNORE INTO delete_ids (id) VALUES (?)"
+DELETE_BY_IDS_QUERY = "DELETE FROM ImageData WHERE id IN (SELECT id FROM delete_ids)"
+DELETE_IMAGE_TAGS_BY_IDS_QUERY = "DELETE FROM ImageTag WHERE image_id IN (SELECT id FROM delete_ids)"
+CLEAR_DELETE_IDS_QUERY = "DELETE FROM delete_ids"
+
+# Records of a bulk edit, with their new tags value (NULL when the tags are unchanged).
+CREATE_EDIT_IDS_QUERY = "CREATE TEMP TABLE IF NOT EXISTS edit_ids (id TEXT PRIMARY KEY, tags TEXT)"
+INSERT_EDIT_ID_QUERY = "INSERT OR IGNORE INTO edit_ids (id) VALUES (?)"
+SELECT_EDIT_TAGS_QUERY = "SELECT id, tags FROM ImageData WHERE id IN (SELECT id FROM edit_ids)"
+STAGE_EDIT_TAGS_QUERY = "UPDATE edit_ids SET tags = ? WHERE id = ?"
+DROP_UNCHANGED_EDIT_IDS_QUERY = "DELETE FROM edit_ids WHERE tags IS NULL"
+SELECT_EDIT_IDS_QUERY = "SELECT id FROM edit_ids"
+# Columns update_record may set: the displayed ones and the normalized amount kept beside them.
+EDITABLE_COLUMNS = RECORD_COLUMNS[1:] + ("amount_value", "currency")
+SELECT_EDITED_ROWS_QUERY = f"SELECT {', '.join(RECORD_COLUMNS)} FROM ImageData WHERE id IN (SELECT id FROM edit_ids)"
+CLEAR_EDIT_IDS_QUERY = "DELETE FROM edit_ids"
+
+# Mirrors SQLite's CAST(text AS FLOAT): the longest leading numeric prefix, else 0.
+_NUMERIC_PREFIX = re.compile(r"^\s*[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+
 
 class DatabaseManager:
     """A context manager for handling SQLite database connections."""
@@ -50,17 +217,101 @@ class DatabaseManager:
                 self.conn.rollback()
             else:
                 logger.debug("Committing transaction.")
-                self.conn.commit()
+                with metrics.timer("db_commit_seconds"):
+                    self.conn.commit()
             self.conn.close()
             logger.debug("Database connection closed.")
 
-def save_to_sqlite_db(unique_id: str, amount: str, date: datetime, original_path: str, rename_name: str, db_path: str, category: str = '', tags: str = '') -> None:
+def ensure_schema(cursor: sqlite3.Cursor) -> None:
+    """
+    Creates the ImageData table and its supporting tables and indexes if missing.
+
+    A database already at SCHEMA_VERSION costs a single PRAGMA read.
+    """
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] >= SCHEMA_VERSION:
+        return
+    cursor.execute(CREATE_TABLE_QUERY)
+    cursor.execute("PRAGMA table_info(ImageData)")
+    existing_columns = {row[1] for row in cursor.fetchall()}
+    for column, column_type in MIGRATED_COLUMNS.items():
+        if column not in existing_columns:
+            cursor.execute(f"ALTER TABLE ImageData ADD COLUMN {column} {column_type}")
+    cursor.execute(CREATE_VERSION_TABLE_QUERY)
+    cursor.execute(SEED_VERSION_QUERY)
+    for query in DROP_VERSION_TRIGGER_QUERIES:
+        cursor.execute(query)
+    for query in DROP_CHANGE_LOG_QUERIES:
+        cursor.execute(query)
+    cursor.execute(CREATE_CHANGE_LOG_TABLE_QUERY)
+    cursor.execute(CREATE_CATEGORY_TABLE_QUERY)
+    cursor.execute(CREATE_TAG_TABLE_QUERY)
+    cursor.execute(CREATE_IMAGE_TAG_TABLE_QUERY)
+    cursor.execute(DROP_OLD_INDEX_QUERY)
+    for query in INDEX_QUERIES + DROP_INDEX_TRIGGER_QUERIES:
+        cursor.execute(query)
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+def bump_data_version(cursor: sqlite3.Cursor) -> None:
+    """Marks ImageData as changed, once per write transaction."""
+    cursor.execute(BUMP_VERSION_QUERY)
+
+def log_changed_rows(cursor: sqlite3.Cursor, rowid_query: str, params: Iterable = ()) -> None:
+    """
+    Adds the ImageData rowids selected by rowid_query to the ChangeLog with one
+    INSERT ... SELECT. Deleted rows must be logged before they are deleted.
+    """
+    cursor.execute(f"INSERT INTO ChangeLog (row) {rowid_query}", tuple(params))
+    cursor.execute(TRIM_CHANGE_LOG_QUERY)
+
+def log_changed_rowids(cursor: sqlite3.Cursor, rowids: Iterable[int]) -> None:
+    """Adds the given ImageData rowids to the ChangeLog."""
+    cursor.executemany(INSERT_CHANGE_QUERY, ((rowid,) for rowid in rowids))
+    cursor.execute(TRIM_CHANGE_LOG_QUERY)
+
+def get_data_version(db_path: str) -> int:
+    """
+    Returns the current data version of the database, or -1 if it cannot be read
+    (e.g. before ensure_schema created the DataVersion table). A plain read.
+    """
+    if not os.path.exists(db_path):
+        return -1
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            row = conn.execute(SELECT_VERSION_QUERY).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else -1
+    except sqlite3.Error as e:
+        logger.debug(f"Could not read the data version of {db_path}: {e}")
+        return -1
+
+def parse_tags(tags) -> List[str]:
+    """
+    Splits a stored tags value (JSON list or comma-separated string) into clean tag names.
+    """
+    if not tags:
+        return []
+    if isinstance(tags, str):
+        try:
+            parsed = json.loads(tags)
+        except json.JSONDecodeError:
+            parsed = tags.split(",")
+        if isinstance(parsed, str):
+            parsed = parsed.split(",")
+        elif not isinstance(parsed, list):
+            parsed = [parsed]
+        tags = parsed
+    return [str(tag).strip() for tag in tags if tag is not None and str(tag).strip()]
+
+def save_to_sqlite_db(unique_id: str, amount: str, date: datetime, original_path: str, rename_name: str, db_path: str, category: str = '', tags: str = '', amount_value: Optional[float] = None, currency: Optional[str] = None, phash: Optional[str] = None, content_hash: Optional[str] = None) -> None:
     """
     Saves data to the SQLite database.
     """
     try:
         with DatabaseManager(db_path) as cursor:
-            cursor.execute(CREATE_TABLE_QUERY)
+            ensure_schema(cursor)
             cursor.execute(INSERT_DATA_QUERY, (
                 unique_id,
                 amount,
@@ -68,21 +319,224 @@ def save_to_sqlite_db(unique_id: str, amount: str, date: datetime, original_path
                 original_path,
                 rename_name,
                 category,
-                tags
+                tags,
+                amount_value,
+                currency,
+                phash,
+                content_hash
             ))
+            index_records(cursor, [unique_id])
+            log_changed_rows(cursor, "SELECT rowid FROM ImageData WHERE id = ?", (unique_id,))
+            bump_data_version(cursor)
             logger.info("Data inserted into SQLite database successfully.")
     except sqlite3.IntegrityError:
         logger.info(f"Data with ID {unique_id} already exists. Skipping insertion.")
     except Exception as e:
         logger.error(f"Error in save_to_sqlite_db function during execution: {str(e)}")
 
+def insert_records(cursor: sqlite3.Cursor, records: Iterable[tuple]) -> int:
+    """
+    Inserts many records with one executemany inside the caller's transaction.
+
+    Each record is (id, amount, date, original_path, rename_name, category, tags,
+    amount_value, currency, phash, content_hash); ids that already exist are skipped.
+    The categories and tags of the batch are indexed in the same transaction.
+
+    Returns:
+        int: Number of rows inserted.
+    """
+    rows = [
+        (record[0], record[1], record[2].strftime('%Y-%m-%d') if isinstance(record[2], datetime) else record[2], *record[3:])
+        for record in records
+    ]
+    cursor.execute(SELECT_MAX_ROWID_QUERY)
+    last_rowid = cursor.fetchone()[0] or 0
+    cursor.executemany(INSERT_OR_IGNORE_DATA_QUERY, rows)
+    inserted = cursor.rowcount
+    metrics.inc("db_rows_written_total", inserted)
+    if inserted:
+        # New rows get rowids above the previous maximum.
+        log_changed_rows(cursor, "SELECT rowid FROM ImageData WHERE rowid > ?", (last_rowid,))
+        bump_data_version(cursor)
+    index_records(cursor, [row[0] for row in rows])
+    return inserted
+
+def category_name(category) -> str:
+    """The name a category is indexed under; blank and missing categories become ''."""
+    return str(category).strip() if category is not None else ''
+
+def _dimension_ids(cursor: sqlite3.Cursor, table: str, names: Iterable[str]) -> Dict[str, int]:
+    """Ids of the given names in the Category or Tag table, adding the missing ones."""
+    names = set(names)
+    cursor.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", ((name,) for name in names))
+    ids = {}
+    for name in names:
+        cursor.execute(f"SELECT id FROM {table} WHERE name = ?", (name,))
+        ids[name] = cursor.fetchone()[0]
+    return ids
+
+def _index_rows(cursor: sqlite3.Cursor, rows: List[Tuple[str, str, str]]) -> None:
+    """Writes category_id and the ImageTag rows for (id, category, tags) rows."""
+    category_ids = _dimension_ids(cursor, "Category", (category_name(category) for _, category, _ in rows))
+    tags_by_id = {record_id: parse_tags(tags) for record_id, _, tags in rows}
+    tag_ids = _dimension_ids(cursor, "Tag", (tag for tags in tags_by_id.values() for tag in tags))
+    cursor.executemany(UPDATE_CATEGORY_ID_QUERY, (
+        (category_ids[category_name(category)], record_id, category_ids[category_name(category)])
+        for record_id, category, _ in rows
+    ))
+    cursor.executemany(DELETE_IMAGE_TAGS_QUERY, ((record_id,) for record_id in tags_by_id))
+    cursor.executemany(INSERT_IMAGE_TAG_QUERY, (
+        (tag_ids[tag], record_id) for record_id, tags in tags_by_id.items() for tag in tags
+    ))
+
+def index_records(cursor: sqlite3.Cursor, record_ids: Iterable[str]) -> int:
+    """
+    Brings category_id and the ImageTag rows of the given records in line with their
+    stored category and tags, inside the caller's transaction.
+
+    Returns:
+        int: Number of records indexed.
+    """
+    cursor.execute(CREATE_INDEX_IDS_QUERY)
+    cursor.execute(CLEAR_INDEX_IDS_QUERY)
+    cursor.executemany(INSERT_INDEX_ID_QUERY, ((str(record_id),) for record_id in record_ids))
+    cursor.execute(SELECT_INDEX_ROWS_QUERY)
+    rows = cursor.fetchall()
+    cursor.execute(CLEAR_INDEX_IDS_QUERY)
+    if rows:
+        _index_rows(cursor, rows)
+    return len(rows)
+
+def backfill_tag_index(db_path: str, chunk_size: int = INDEX_CHUNK_SIZE) -> int:
+    """
+    Indexes the categories and tags of rows written before the index tables existed,
+    or edited outside index_records, in chunks within one transaction.
+
+    Returns:
+        int: Number of records indexed.
+    """
+    indexed = 0
+    try:
+        with DatabaseManager(db_path) as cursor:
+            ensure_schema(cursor)
+            while True:
+                # Indexing a row sets its category_id, so each chunk shrinks the remaining set.
+                cursor.execute(SELECT_UNINDEXED_ROWS_QUERY, (chunk_size,))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                _index_rows(cursor, rows)
+                indexed += len(rows)
+        if indexed:
+            logger.info(f"Indexed categories and tags of {indexed} records.")
+    except Exception as e:
+        logger.error(f"Error in backfill_tag_index function during execution: {str(e)}")
+        raise
+    return indexed
+
+def record_filter(category: Optional[str] = None, tag: Optional[str] = None,
+                  probe_tag: bool = False) -> Tuple[str, List[str]]:
+    """
+    Builds the conditions selecting ImageData rows by exact category and/or tag
+    (case-insensitive) through the index tables. With probe_tag, the tag is checked
+    per row instead of collecting its rows first, which suits common tags in a
+    sorted, limited query.
+
+    Returns:
+        Tuple[str, List[str]]: " WHERE ..." (empty without filters) and its parameters.
+    """
+    conditions, params = [], []
+    if category is not None:
+        conditions.append("category_id = (SELECT id FROM Category WHERE name = ?)")
+        params.append(category_name(category))
+    if tag is not None and probe_tag:
+        conditions.append("EXISTS (SELECT 1 FROM ImageTag WHERE tag_id = (SELECT id FROM Tag WHERE name = ?) AND image_id = ImageData.id)")
+        params.append(tag.strip())
+    elif tag is not None:
+        conditions.append("id IN (SELECT image_id FROM ImageTag WHERE tag_id = (SELECT id FROM Tag WHERE name = ?))")
+        params.append(tag.strip())
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+def fetch_records_page(cursor: sqlite3.Cursor, sort: str = DEFAULT_SORT, descending: bool = False,
+                       after: Optional[Tuple[object, str]] = None, category: Optional[str] = None,
+                       tag: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> List[tuple]:
+    """
+    Fetches one page of records in the given sort order with keyset pagination.
+
+    Rows whose sort column is NULL come first in ascending and last in descending
+    order, as SQLite sorts them. They are read as a separate segment because a
+    row-value comparison against NULL matches nothing and an OR would lose the index.
+
+    Args:
+        sort (str): One of SORT_COLUMNS.
+        descending (bool): Whether to sort in descending order.
+        after (Optional[Tuple[object, str]]): (sort value, id) of the last row of the
+            previous page; None for the first page.
+        category, tag (Optional[str]): Filters, see record_filter.
+        limit (int): Maximum rows returned.
+
+    Returns:
+        List[tuple]: Rows of RECORD_COLUMNS followed by the sort value.
+
+    Raises:
+        ValueError: If sort is not one of SORT_COLUMNS.
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Unknown sort order {sort!r}; expected one of {', '.join(SORT_COLUMNS)}.")
+    column = SORT_COLUMNS[sort]
+    operator, direction = ("<", "DESC") if descending else (">", "ASC")
+    if after is None:
+        segments = [(None, [])]
+    elif after[0] is None:
+        segments = [(f"{column} IS NULL AND id {operator} ?", [after[1]])]
+        if not descending:
+            segments.append((f"{column} IS NOT NULL", []))
+    else:
+        segments = [(f"({column}, id) {operator} (?, ?)", list(after))]
+        if descending:
+            segments.append((f"{column} IS NULL", []))
+
+    probe_tag = False
+    if tag is not None:
+        cursor.execute(COUNT_TAG_ROWS_QUERY, (tag.strip(), COMMON_TAG_ROWS))
+        probe_tag = cursor.fetchone()[0] >= COMMON_TAG_ROWS
+    where, filter_params = record_filter(category, tag, probe_tag)
+    rows = []
+    for condition, params in segments:
+        query = f"SELECT {', '.join(RECORD_COLUMNS)}, {column} FROM ImageData{where}"
+        if condition:
+            query += (" AND " if where else " WHERE ") + condition
+        query += f" ORDER BY {column} {direction}, id {direction} LIMIT ?"
+        cursor.execute(query, (*filter_params, *params, limit - len(rows)))
+        rows.extend(cursor.fetchall())
+        if len(rows) >= limit:
+            break
+    return rows
+
+def filter_choices(db_path: str) -> Tuple[List[str], List[str]]:
+    """
+    Returns the category and tag names currently in use, sorted, for filter controls.
+    """
+    with DatabaseManager(db_path) as cursor:
+        ensure_schema(cursor)
+        cursor.execute(SELECT_CATEGORY_NAMES_QUERY)
+        categories = [row[0] for row in cursor.fetchall()]
+        cursor.execute(SELECT_TAG_NAMES_QUERY)
+        tags = [row[0] for row in cursor.fetchall()]
+    return categories, tags
+
 def clear_db_data(db_path: str) -> None:
     """
     Clears all existing data from the SQLite database.
     """
     try:
         with DatabaseManager(db_path) as cursor:
+            ensure_schema(cursor)
             cursor.execute(DELETE_ALL_QUERY)
+            cursor.execute(DELETE_ALL_IMAGE_TAGS_QUERY)
+            cursor.execute(CLEAR_CHANGE_LOG_QUERY)
+            cursor.execute(INSERT_CHANGE_QUERY, (None,))
+            bump_data_version(cursor)
             logger.info("All existing data cleared from SQLite database.")
     except Exception as e:
         logger.error(f"Error in clear_db_data function during execution: {str(e)}")
@@ -98,4 +552,155 @@ def browse_db_data(db_path: str) -> None:
             for row in rows:
                 logger.info(f"DB Record: {row}")
     except Exception as e:
-        logger.error(f"Error in browse_db_data function during execution: {str(e)}") 
\ No newline at end of file
+        logger.error(f"Error in browse_db_data function during execution: {str(e)}")
+
+def cast_amount(value) -> float:
+    """
+    Converts a stored amount to a float the same way SQLite's CAST(amount AS FLOAT) does,
+    so totals adjusted in Python stay consistent with totals computed in SQL.
+    """
+    match = _NUMERIC_PREFIX.match(str(value)) if value is not None else None
+    return float(match.group(0)) if match else 0.0
+
+def delete_records(db_path: str, record_ids: Iterable[str]) -> int:
+    """
+    Deletes the given records with a single set-based DELETE in one transaction.
+
+    The ids are staged in a temporary table so the statement does not hit
+    SQLite's bound-parameter limit, however many rows are selected.
+
+    Returns:
+        int: Number of rows deleted.
+    """
+    try:
+        with DatabaseManager(db_path) as cursor:
+            ensure_schema(cursor)
+            cursor.execute(CREATE_DELETE_IDS_QUERY)
+            cursor.execute(CLEAR_DELETE_IDS_QUERY)
+            cursor.executemany(INSERT_DELETE_ID_QUERY, ((str(record_id),) for record_id in record_ids))
+            log_changed_rows(cursor, "SELECT rowid FROM ImageData WHERE id IN (SELECT id FROM delete_ids)")
+            cursor.execute(DELETE_BY_IDS_QUERY)
+            deleted_count = cursor.rowcount
+            cursor.execute(DELETE_IMAGE_TAGS_BY_IDS_QUERY)
+            cursor.execute(CLEAR_DELETE_IDS_QUERY)
+            if deleted_count:
+                bump_data_version(cursor)
+            logger.info(f"Deleted {deleted_count} records from SQLite database.")
+            return deleted_count
+    except Exception as e:
+        logger.error(f"Error in delete_records function during execution: {str(e)}")
+        raise
+
+def edit_tags(tags: List[str], add_tags: Iterable[str] = (), remove_tags: Iterable[str] = ()) -> List[str]:
+    """
+    Returns tags without remove_tags and with the missing add_tags appended,
+    comparing names case-insensitively like the tag index.
+    """
+    removed = {tag.lower() for tag in remove_tags}
+    edited = [tag for tag in tags if tag.lower() not in removed]
+    present = {tag.lower() for tag in edited}
+    for tag in add_tags:
+        if tag.lower() not in present:
+            edited.append(tag)
+            present.add(tag.lower())
+    return edited
+
+def update_record(db_path: str, record_id: str, assignments: Dict[str, object]) -> int:
+    """
+    Sets columns of one record in one transaction, e.g. after an edit in the table.
+
+    assignments maps EDITABLE_COLUMNS to their new, already normalized values; the
+    tag index is refreshed when the category or tags change.
+
+    Returns:
+        int: Number of rows updated (0 when the record no longer exists).
+    """
+    unknown = set(assignments) - set(EDITABLE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Columns cannot be edited: {', '.join(sorted(unknown))}")
+    if not assignments:
+        return 0
+    try:
+        with DatabaseManager(db_path) as cursor:
+            ensure_schema(cursor)
+            set_clause = ", ".join(f"{column} = ?" for column in assignments)
+            cursor.execute(f"UPDATE ImageData SET {set_clause} WHERE id = ?", (*assignments.values(), str(record_id)))
+            updated_count = cursor.rowcount
+            if updated_count:
+                if {"category", "tags"} & assignments.keys():
+                    index_records(cursor, [str(record_id)])
+                log_changed_rows(cursor, "SELECT rowid FROM ImageData WHERE id = ?", (str(record_id),))
+                bump_data_version(cursor)
+            logger.info(f"Updated record {record_id} in SQLite database.")
+            return updated_count
+    except Exception as e:
+        logger.error(f"Error in update_record function during execution: {str(e)}")
+        raise
+
+def bulk_edit_records(db_path: str, record_ids: Optional[Iterable[str]] = None,
+                      filter_category: Optional[str] = None, filter_tag: Optional[str] = None,
+                      category: Optional[str] = None, add_tags: Iterable[str] = (),
+                      remove_tags: Iterable[str] = (), shift_days: int = 0) -> List[tuple]:
+    """
+    Edits many records with one set-based UPDATE in one transaction: sets their
+    category, adds and removes tags and/or moves their date by shift_days.
+
+    The records are the given ids or, when record_ids is None, every record
+    matching filter_category and filter_tag (see record_filter). They are staged
+    in a temporary table together with their new tags, which are computed in
+    Python since stored tags may be a JSON list or a comma-separated string.
+
+    Returns:
+        List[tuple]: The edited records as RECORD_COLUMNS, after the edit.
+    """
+    add_tags, remove_tags = list(add_tags), list(remove_tags)
+    try:
+        with DatabaseManager(db_path) as cursor:
+            ensure_schema(cursor)
+            cursor.execute(CREATE_EDIT_IDS_QUERY)
+            cursor.execute(CLEAR_EDIT_IDS_QUERY)
+            if record_ids is None:
+                where, params = record_filter(filter_category, filter_tag)
+                cursor.execute(f"INSERT INTO edit_ids (id) SELECT id FROM ImageData{where}", params)
+            else:
+                cursor.executemany(INSERT_EDIT_ID_QUERY, ((str(record_id),) for record_id in record_ids))
+
+            assignments, params = [], []
+            if category is not None:
+                assignments.append("category = ?")
+                params.append(category_name(category))
+            if shift_days:
+                # Dates are stored as YYYY-MM-DD; ones SQLite cannot read are left alone.
+                assignments.append("date = COALESCE(date(date, ?), date)")
+                params.append(f"{shift_days:+d} days")
+            if add_tags or remove_tags:
+                cursor.execute(SELECT_EDIT_TAGS_QUERY)
+                staged = []
+                for record_id, tags in cursor.fetchall():
+                    current = parse_tags(tags)
+                    edited = edit_tags(current, add_tags, remove_tags)
+                    if edited != current:
+                        staged.append((json.dumps(edited), record_id))
+                cursor.executemany(STAGE_EDIT_TAGS_QUERY, staged)
+                if not assignments:
+                    # Only the tags change, so leave the records whose tags do not.
+                    cursor.execute(DROP_UNCHANGED_EDIT_IDS_QUERY)
+                assignments.append("tags = COALESCE((SELECT tags FROM edit_ids WHERE edit_ids.id = ImageData.id), tags)")
+            if not assignments:
+                return []
+
+            cursor.execute(f"UPDATE ImageData SET {', '.join(assignments)} WHERE id IN (SELECT id FROM edit_ids)", params)
+            edited_count = cursor.rowcount
+            log_changed_rows(cursor, "SELECT rowid FROM ImageData WHERE id IN (SELECT id FROM edit_ids)")
+            bump_data_version(cursor)
+            if category is not None or add_tags or remove_tags:
+                cursor.execute(SELECT_EDIT_IDS_QUERY)
+                index_records(cursor, [row[0] for row in cursor.fetchall()])
+            cursor.execute(SELECT_EDITED_ROWS_QUERY)
+            rows = cursor.fetchall()
+            cursor.execute(CLEAR_EDIT_IDS_QUERY)
+            logger.info(f"Bulk-edited {edited_count} records in SQLite database.")
+            return rows
+    except Exception as e:
+        logger.error(f"Error in bulk_edit_records function during execution: {str(e)}")
+        raise
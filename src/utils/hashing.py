@@ -0,0 +1,161 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.logger import setup_logger
+from utils.db_manager import DatabaseManager
+from utils import metrics
+from utils.archives import read_bytes, split_member_path
+
+logger = setup_logger()
+
+DIGEST_SIZE = 32
+CHUNK_SIZE = 1024 * 1024
+# Files at least this large are hashed through mmap; smaller ones with one buffered read loop.
+MMAP_THRESHOLD = 4 * 1024 * 1024
+DEFAULT_MAX_WORKERS = 8
+
+CREATE_FILE_HASH_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS FileHash (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    hashed_at REAL
+)
+"""
+CREATE_TEMP_PATHS_QUERY = "CREATE TEMP TABLE IF NOT EXISTS HashLookup (path TEXT PRIMARY KEY)"
+INSERT_TEMP_PATH_QUERY = "INSERT OR IGNORE INTO HashLookup (path) VALUES (?)"
+SELECT_CACHED_HASHES_QUERY = """
+SELECT f.path, f.size, f.mtime_ns, f.inode, f.digest
+FROM FileHash f JOIN HashLookup l ON l.path = f.path
+"""
+CLEAR_TEMP_PATHS_QUERY = "DELETE FROM HashLookup"
+UPSERT_FILE_HASH_QUERY = """
+INSERT INTO FileHash (path, size, mtime_ns, inode, digest, hashed_at) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(path) DO UPDATE SET
+    size = excluded.size, mtime_ns = excluded.mtime_ns, inode = excluded.inode,
+    digest = excluded.digest, hashed_at = excluded.hashed_at
+"""
+
+FileKey = Tuple[int, int, int]
+
+
+def hash_file(path: str) -> str:
+    """
+    Computes the BLAKE2b content hash of a file, reading large files through mmap
+    and small ones in chunks into a reused buffer. Archive members are hashed from
+    their content in memory.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    if split_member_path(path):
+        digest.update(read_bytes(path))
+        return digest.hexdigest()
+    with open(path, "rb", buffering=0) as file:
+        size = os.fstat(file.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        else:
+            buffer = bytearray(min(max(size, 1), CHUNK_SIZE))
+            view = memoryview(buffer)
+            while True:
+                read = file.readinto(buffer)
+                if not read:
+                    break
+                digest.update(view[:read])
+    return digest.hexdigest()
+
+
+def _file_key(path: str) -> Optional[FileKey]:
+    # An archive member is unchanged as long as its archive is.
+    parts = split_member_path(path)
+    try:
+        stat = os.stat(parts[0] if parts else path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+class ContentHasher:
+    """
+    Content hashes for many files, memoized in the FileHash table of the app database.
+
+    A cached digest is reused while the file's (size, mtime_ns, inode) are unchanged,
+    so rehashing an unchanged folder costs one stat per file. Only new or modified
+    files are read, in a thread pool.
+    """
+
+    def __init__(self, db_path: str, max_workers: int = DEFAULT_MAX_WORKERS):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.ensure_table()
+
+    def ensure_table(self) -> None:
+        with DatabaseManager(self.db_path) as cursor:
+            cursor.execute(CREATE_FILE_HASH_TABLE_QUERY)
+
+    def _load_cached(self, cursor: sqlite3.Cursor, paths: List[str]) -> Dict[str, Tuple[FileKey, str]]:
+        cursor.execute(CREATE_TEMP_PATHS_QUERY)
+        cursor.execute(CLEAR_TEMP_PATHS_QUERY)
+        cursor.executemany(INSERT_TEMP_PATH_QUERY, ((path,) for path in paths))
+        cursor.execute(SELECT_CACHED_HASHES_QUERY)
+        cached = {path: ((size, mtime_ns, inode), digest) for path, size, mtime_ns, inode, digest in cursor.fetchall()}
+        cursor.execute(CLEAR_TEMP_PATHS_QUERY)
+        return cached
+
+    def hash_files(self, paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Returns the content hash of each path (None for files that cannot be read).
+        """
+        originals = {path: os.path.abspath(path) for path in paths}
+        paths = list(dict.fromkeys(originals.values()))
+        if not paths:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            keys = dict(zip(paths, executor.map(_file_key, paths)))
+
+            with DatabaseManager(self.db_path) as cursor:
+                cached = self._load_cached(cursor, paths)
+
+            digests: Dict[str, Optional[str]] = {}
+            stale = []
+            hits = 0
+            for path, key in keys.items():
+                if key is None:
+                    digests[path] = None
+                elif path in cached and cached[path][0] == key:
+                    digests[path] = cached[path][1]
+                    hits += 1
+                else:
+                    stale.append(path)
+            metrics.inc("hash_cache_total", hits, result="hit")
+            metrics.inc("hash_cache_total", len(stale), result="miss")
+
+            rows = []
+            with metrics.timer("pipeline_stage_seconds", stage="content_hash"):
+                for path, digest in zip(stale, executor.map(self._hash_or_none, stale)):
+                    digests[path] = digest
+                    if digest is not None:
+                        rows.append((path, *keys[path], digest, time.time()))
+
+        if rows:
+            with DatabaseManager(self.db_path) as cursor:
+                cursor.executemany(UPSERT_FILE_HASH_QUERY, rows)
+            logger.debug(f"Hashed {len(rows)} new or changed files, {hits} served from cache.")
+        return {path: digests[absolute] for path, absolute in originals.items()}
+
+    @staticmethod
+    def _hash_or_none(path: str) -> Optional[str]:
+        try:
+            return hash_file(path)
+        except OSError as e:
+            logger.warning(f"Could not hash {path}: {e}")
+            return None
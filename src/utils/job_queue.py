@@ -0,0 +1,254 @@
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+from utils.logger import setup_logger
+from utils.db_manager import DatabaseManager
+
+logger = setup_logger()
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_MAX_ATTEMPTS = 3
+BUSY_TIMEOUT_SECONDS = 30
+
+CREATE_JOBS_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS Jobs (
+    path TEXT NOT NULL,
+    source TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    updated_at REAL,
+    priority REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (source, path)
+)
+"""
+# Columns added after the first release, with their definitions.
+MIGRATED_JOB_COLUMNS = {"priority": "REAL NOT NULL DEFAULT 0"}
+# Serves the status counts as well as claiming pending jobs in priority order.
+CREATE_JOBS_INDEX_QUERY = "CREATE INDEX IF NOT EXISTS idx_jobs_claim ON Jobs (source, status, priority)"
+DROP_OLD_JOBS_INDEX_QUERY = "DROP INDEX IF EXISTS idx_jobs_source_status"
+
+ENQUEUE_JOB_QUERY = "INSERT OR IGNORE INTO Jobs (path, source, status, updated_at, priority) VALUES (?, ?, 'pending', ?, ?)"
+RESET_JOBS_QUERY = "DELETE FROM Jobs WHERE source = ?"
+
+# Claims run inside BEGIN IMMEDIATE, so no other worker can claim between the
+# SELECT and the UPDATE. Jobs whose lease expired (their worker crashed) are claimed
+# first, then pending jobs by priority; each query walks idx_jobs_claim instead of
+# sorting the whole queue.
+SELECT_ABANDONED_QUERY = """
+SELECT path FROM Jobs
+WHERE source = ? AND status = 'in_flight' AND lease_expires < ?
+ORDER BY priority
+LIMIT ?
+"""
+SELECT_PENDING_QUERY = """
+SELECT path FROM Jobs
+WHERE source = ? AND status = 'pending'
+ORDER BY priority
+LIMIT ?
+"""
+CLAIM_JOB_QUERY = """
+UPDATE Jobs
+SET status = 'in_flight', lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ?
+WHERE source = ? AND path = ?
+"""
+COMPLETE_JOB_QUERY = "UPDATE Jobs SET status = 'done', lease_owner = NULL, lease_expires = NULL, last_error = NULL, updated_at = ? WHERE source = ? AND path = ?"
+FAIL_JOB_QUERY = """
+UPDATE Jobs
+SET status = CASE WHEN ? OR attempts >= ? THEN 'failed' ELSE 'pending' END,
+    lease_owner = NULL, lease_expires = NULL, last_error = ?, updated_at = ?
+WHERE source = ? AND path = ?
+"""
+RENEW_LEASES_QUERY = "UPDATE Jobs SET lease_expires = ? WHERE source = ? AND status = 'in_flight' AND lease_owner = ?"
+RELEASE_JOBS_QUERY = """
+UPDATE Jobs
+SET status = 'pending', lease_owner = NULL, lease_expires = NULL, attempts = MAX(attempts - 1, 0), updated_at = ?
+WHERE source = ? AND status = 'in_flight' AND lease_owner = ?
+"""
+COUNT_JOBS_QUERY = "SELECT status, COUNT(*) FROM Jobs WHERE source = ? GROUP BY status"
+# In-flight jobs leased by other workers, e.g. a run that crashed moments ago.
+SELECT_OTHER_OWNERS_QUERY = "SELECT DISTINCT lease_owner FROM Jobs WHERE source = ? AND status = 'in_flight' AND lease_owner != ?"
+SELECT_OTHER_LEASE_EXPIRY_QUERY = "SELECT MIN(lease_expires) FROM Jobs WHERE source = ? AND status = 'in_flight' AND lease_owner != ?"
+EXPIRE_LEASES_QUERY = "UPDATE Jobs SET lease_expires = 0 WHERE source = ? AND status = 'in_flight' AND lease_owner = ?"
+
+
+def new_worker_id() -> str:
+    """Returns an identifier unique to this host, process and queue consumer."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def worker_is_dead(worker_id: str) -> bool:
+    """
+    Whether the process behind a worker id (see new_worker_id) is known to have exited.
+    Only processes on this host can be checked; others count as alive.
+    """
+    try:
+        host, pid, _ = worker_id.rsplit(":", 2)
+        pid = int(pid)
+    except ValueError:
+        return False
+    # Signal 0 only probes for the process on POSIX; on Windows os.kill would stop it.
+    if host != socket.gethostname() or pid == os.getpid() or os.name == "nt":
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+class JobQueue:
+    """
+    A durable work queue of files to analyze, stored in the Jobs table of the app database.
+
+    Each job moves pending -> in_flight -> done/failed. Claiming a job takes a lease
+    that the worker renews as it goes; if the worker dies, its leases expire and the
+    jobs become claimable again, so an interrupted run resumes where it stopped and
+    several processes can share a queue. Leases of a worker process on this host
+    that has exited are taken over at once instead of after they expire.
+    """
+
+    def __init__(self, db_path: str, source: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, worker_id: Optional[str] = None):
+        self.db_path = db_path
+        self.source = os.path.abspath(source)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = worker_id or new_worker_id()
+        self.ensure_table()
+
+    @contextmanager
+    def _transaction(self):
+        """Yields a connection whose work is committed (or rolled back) and which is then closed."""
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_SECONDS)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def ensure_table(self) -> None:
+        with DatabaseManager(self.db_path) as cursor:
+            # WAL lets workers read while another one commits.
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(CREATE_JOBS_TABLE_QUERY)
+            cursor.execute("PRAGMA table_info(Jobs)")
+            existing_columns = {row[1] for row in cursor.fetchall()}
+            for column, column_type in MIGRATED_JOB_COLUMNS.items():
+                if column not in existing_columns:
+                    cursor.execute(f"ALTER TABLE Jobs ADD COLUMN {column} {column_type}")
+            cursor.execute(DROP_OLD_JOBS_INDEX_QUERY)
+            cursor.execute(CREATE_JOBS_INDEX_QUERY)
+
+    def reset(self, paths: Iterable[str], priorities: Optional[Iterable[float]] = None) -> None:
+        """
+        Replaces all jobs of this source with the given paths, all pending. Jobs are
+        claimed in ascending priority, in the given order when priorities are omitted.
+        """
+        now = time.time()
+        paths = list(paths)
+        priorities = priorities if priorities is not None else range(len(paths))
+        with self._transaction() as conn:
+            conn.execute(RESET_JOBS_QUERY, (self.source,))
+            conn.executemany(ENQUEUE_JOB_QUERY, (
+                (path, self.source, now, priority) for path, priority in zip(paths, priorities)
+            ))
+        logger.info(f"Queued {self.total()} files for {self.source}.")
+
+    def enqueue(self, paths: Iterable[str], priority: float = 0.0) -> None:
+        """Adds paths that are not queued yet."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(ENQUEUE_JOB_QUERY, ((path, self.source, now, priority) for path in paths))
+
+    def claim(self, limit: int = 1) -> List[str]:
+        """
+        Leases up to limit pending (or abandoned) jobs to this worker.
+
+        Returns:
+            List[str]: Paths newly leased to this worker, in priority order. Jobs it
+            already holds are not returned again.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for (owner,) in conn.execute(SELECT_OTHER_OWNERS_QUERY, (self.source, self.worker_id)).fetchall():
+                if worker_is_dead(owner):
+                    logger.info(f"Taking over the jobs of exited worker {owner}.")
+                    conn.execute(EXPIRE_LEASES_QUERY, (self.source, owner))
+            paths = [row[0] for row in conn.execute(SELECT_ABANDONED_QUERY, (self.source, now, limit))]
+            if len(paths) < limit:
+                paths += [row[0] for row in conn.execute(SELECT_PENDING_QUERY, (self.source, limit - len(paths)))]
+            conn.executemany(CLAIM_JOB_QUERY, (
+                (self.worker_id, now + self.lease_seconds, now, self.source, path) for path in paths
+            ))
+            return paths
+
+    def complete(self, path: str, cursor: Optional[sqlite3.Cursor] = None) -> None:
+        """
+        Marks a job done. Pass the cursor of an open transaction to commit it together
+        with the job's results.
+        """
+        params = (time.time(), self.source, path)
+        if cursor is not None:
+            cursor.execute(COMPLETE_JOB_QUERY, params)
+            return
+        with self._transaction() as conn:
+            conn.execute(COMPLETE_JOB_QUERY, params)
+
+    def fail(self, path: str, error: str, permanent: bool = False) -> None:
+        """
+        Records a failed attempt. The job is retried until max_attempts unless permanent.
+        """
+        with self._transaction() as conn:
+            conn.execute(FAIL_JOB_QUERY, (permanent, self.max_attempts, error, time.time(), self.source, path))
+
+    def renew(self) -> None:
+        """Extends the leases of this worker's in-flight jobs; call it as work progresses."""
+        with self._transaction() as conn:
+            conn.execute(RENEW_LEASES_QUERY, (time.time() + self.lease_seconds, self.source, self.worker_id))
+
+    def release(self) -> int:
+        """Returns this worker's in-flight jobs to the queue without counting an attempt."""
+        with self._transaction() as conn:
+            released = conn.execute(RELEASE_JOBS_QUERY, (time.time(), self.source, self.worker_id)).rowcount
+        if released:
+            logger.info(f"Released {released} in-flight jobs back to the queue.")
+        return released
+
+    def leased_elsewhere(self) -> Optional[float]:
+        """
+        Seconds until the earliest lease held by another worker expires (0 if one
+        already has), or None if no other worker holds jobs of this source.
+        """
+        with self._transaction() as conn:
+            expires = conn.execute(SELECT_OTHER_LEASE_EXPIRY_QUERY, (self.source, self.worker_id)).fetchone()[0]
+        return None if expires is None else max(0.0, expires - time.time())
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status for this source."""
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        with self._transaction() as conn:
+            counts.update(dict(conn.execute(COUNT_JOBS_QUERY, (self.source,)).fetchall()))
+        return counts
+
+    def total(self) -> int:
+        return sum(self.counts().values())
+
+    def has_unfinished(self) -> bool:
+        """Whether a previous run of this source left pending or in-flight jobs."""
+        counts = self.counts()
+        return counts[PENDING] + counts[IN_FLIGHT] > 0
@@ -1,40 +1,171 @@
+import atexit
 import logging
+import logging.handlers
+import multiprocessing
 import os
+import queue
+import threading
 from pathlib import Path
 
-def setup_logger():
+# Single logging configuration shared by every module and the UI. LOG_PATH may point
+# elsewhere, e.g. so benchmarks and tests leave the application's log alone.
+LOG_PATH = Path(os.getenv("LOG_PATH") or Path(__file__).resolve().parents[1] / "outputs" / "logs" / "app.log")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+# Set to e.g. "midnight" to rotate by time instead of by size.
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN")
+
+_listener_lock = threading.Lock()
+_listener = None
+# Queue worker processes send their records through, and the thread draining it.
+_worker_queue = None
+_worker_listener = None
+
+
+class _SharedQueueHandler(logging.handlers.QueueHandler):
     """
-    Sets up a logger that writes to a file in the output directory.
+    The one handler attached to every application logger. Logging calls only put
+    the record on an in-memory queue; a QueueListener thread formats and writes it.
 
-    Returns:
-        logging.Logger: Configured logger instance.
+    Pool worker processes call forward_to_parent from their initializer, so their
+    records go to the main process over a multiprocessing queue and only the main
+    process ever writes (and rotates) the log file. Any other child process starts
+    a listener of its own on the first record it logs.
     """
-    project_dir = Path(__file__).resolve().parents[1] # Go up to src, then to project root
-    log_path = project_dir / "outputs" / "logs" / "app.log"
-    log_level = "INFO"
 
-    os.makedirs(log_path.parent, exist_ok=True)
+    def __init__(self):
+        super().__init__(None)
+        self.pid = None
+        # Set in worker processes whose records go to the main process.
+        self.forwarding = False
 
-    logger = logging.getLogger('Image_Analyser')
-    logger.setLevel(log_level.upper())
+    def prepare(self, record):
+        if self.forwarding:
+            # Format the message and drop unpicklable args before it crosses processes.
+            return super().prepare(record)
+        # Records never leave this process, so formatting is left to the listener thread.
+        return record
+
+    def enqueue(self, record):
+        if self.pid != os.getpid():
+            _start_listener()
+        self.queue.put_nowait(record)
+
+
+_handler = _SharedQueueHandler()
 
-    # Prevent adding duplicate handlers
-    if not logger.handlers:
-        file_handler = logging.FileHandler(log_path)
-        file_handler.setLevel(logging.DEBUG)
 
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
+def _is_main_process() -> bool:
+    # Under spawn a worker re-imports this module, so module state cannot tell.
+    return multiprocessing.parent_process() is None
 
-        log_format = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S"
+
+def _file_handler(main_process: bool) -> logging.Handler:
+    os.makedirs(LOG_PATH.parent, exist_ok=True)
+    if not main_process:
+        # Worker processes append without rotating; WatchedFileHandler reopens the
+        # file after the main process rotated it.
+        handler = logging.handlers.WatchedFileHandler(LOG_PATH, encoding="utf-8")
+    elif LOG_ROTATE_WHEN:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            LOG_PATH, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
         )
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+    return handler
+
+
+def _start_listener() -> None:
+    global _listener
+    with _listener_lock:
+        if _handler.pid == os.getpid():
+            return
+        log_queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, _file_handler(_is_main_process()), respect_handler_level=True)
+        _listener.start()
+        _handler.queue = log_queue
+        _handler.pid = os.getpid()
+        atexit.register(_stop_listener, _listener)
+
+
+def _stop_listener(listener) -> None:
+    """Flushes queued records on exit."""
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def worker_log_queue():
+    """
+    Returns the multiprocessing queue pool workers forward their records through
+    (see forward_to_parent), starting the thread that writes them in this process.
+    Pass it to the pool's initializer.
+    """
+    global _worker_queue, _worker_listener
+    # Started first so it is stopped last at exit, after the forwarded records are in.
+    _start_listener()
+    with _listener_lock:
+        if _worker_queue is None:
+            _worker_queue = multiprocessing.Queue()
+            # Forwarded records join this process's own queue, so they reach the same file and sinks.
+            _worker_listener = logging.handlers.QueueListener(_worker_queue, _handler)
+            _worker_listener.start()
+            atexit.register(_worker_listener.stop)
+    return _worker_queue
 
-        file_handler.setFormatter(log_format)
-        console_handler.setFormatter(log_format)
 
-        logger.addHandler(file_handler)
-        # logger.addHandler(console_handler) # Keep this commented unless console output is desired
+def forward_to_parent(log_queue) -> None:
+    """
+    Called in a pool worker's initializer: sends this process's records to the main
+    process through log_queue instead of writing the log file itself.
+    """
+    with _listener_lock:
+        _handler.queue = log_queue
+        _handler.forwarding = True
+        _handler.pid = os.getpid()
+
+
+def add_log_sink(handler: logging.Handler) -> None:
+    """
+    Adds a handler that the listener thread feeds, e.g. the UI log view. It runs
+    off the logging caller's thread, so it may format and do I/O.
+    """
+    _start_listener()
+    with _listener_lock:
+        _listener.handlers = _listener.handlers + (handler,)
 
-    return logger
\ No newline at end of file
+
+def remove_log_sink(handler: logging.Handler) -> None:
+    with _listener_lock:
+        if _listener is not None:
+            _listener.handlers = tuple(h for h in _listener.handlers if h is not handler)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Returns a logger that writes through the shared, non-blocking handler.
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(LOG_LEVEL.upper())
+    # Prevent adding duplicate handlers
+    if _handler not in logger.handlers:
+        logger.addHandler(_handler)
+    # The listener starts with the first record, after a pool worker's initializer
+    # had the chance to call forward_to_parent.
+    return logger
+
+
+def setup_logger():
+    """
+    Sets up a logger that writes to a file in the output directory.
+
+    Returns:
+        logging.Logger: Configured logger instance.
+    """
+    return get_logger('Image_Analyser')
@@ -0,0 +1,320 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+DEFAULT_METRICS_FILE = os.path.join("outputs", "metrics", "pipeline.prom")
+
+# Seconds; spans a local cache hit to a slow model call.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# name -> (type, help). Metrics used without a definition are still exported, untyped.
+METRIC_DEFINITIONS = {
+    "pipeline_stage_seconds": ("histogram", "Time spent per pipeline stage (discovery, hash, encode, api, parse, db_commit)."),
+    "api_request_seconds": ("histogram", "Latency of remote model requests, per model (hedges included)."),
+    "api_requests_total": ("counter", "Remote model requests by outcome."),
+    "api_hedges_total": ("counter", "Hedged model requests by which attempt answered first (primary, hedge)."),
+    "api_bytes_uploaded_total": ("counter", "Bytes of file data sent to the remote model."),
+    "parse_failures_total": ("counter", "Model responses that could not be parsed as JSON."),
+    "extraction_tier_total": ("counter", "Files extracted per tier (filename, ocr, remote)."),
+    "dedupe_checks_total": ("counter", "Files checked against the perceptual hash index, by result (hit, miss)."),
+    "jobs_total": ("counter", "Files finished by outcome (succeeded, failed, retried, duplicate)."),
+    "db_commit_seconds": ("histogram", "Time to commit a database transaction."),
+    "db_rows_written_total": ("counter", "Rows inserted into ImageData."),
+    "report_cache_total": ("counter", "Report cache lookups by result (hit, miss)."),
+    "hash_cache_total": ("counter", "Content hash lookups by result (hit: unchanged file, miss: file read and hashed)."),
+    "blob_store_total": ("counter", "Receipts added to the blob store by result (stored, deduplicated)."),
+    "blob_store_bytes_total": ("counter", "Bytes written to the blob store, after compression."),
+    "snapshot_refresh_total": ("counter", "Columnar snapshot refreshes by mode (full: reloaded, incremental: changed rows only)."),
+    "singleflight_total": ("counter", "Coalesced work by result (leader: started the work, shared: reused a running or finished one)."),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+MetricKey = Tuple[str, LabelKey]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """Bucketed observations, as in a Prometheus histogram."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # The last slot is +Inf.
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "Histogram") -> None:
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+    def copy(self) -> "Histogram":
+        clone = Histogram(self.buckets)
+        clone.merge(self)
+        return clone
+
+    def minus(self, other: Optional["Histogram"]) -> "Histogram":
+        clone = self.copy()
+        if other is not None:
+            clone.counts = [a - b for a, b in zip(self.counts, other.counts)]
+            clone.sum -= other.sum
+            clone.count -= other.count
+        return clone
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimates a quantile by linear interpolation inside the bucket it falls in,
+        like Prometheus' histogram_quantile.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process counters and histograms, exported in the Prometheus
+    text format. Worker processes drain() theirs and the coordinator merge()s them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[MetricKey, float] = {}
+        self.histograms: Dict[MetricKey, Histogram] = {}
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observes the seconds spent in the with-block, even if it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counter_value(self, name: str, **labels) -> float:
+        """Sum of the counter over all label sets matching the given labels."""
+        wanted = set(_label_key(labels))
+        with self._lock:
+            return sum(value for (metric, key), value in self.counters.items() if metric == name and wanted <= set(key))
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        """Merged histogram over all label sets matching the given labels."""
+        wanted = set(_label_key(labels))
+        merged = Histogram()
+        with self._lock:
+            for (metric, key), histogram in self.histograms.items():
+                if metric == name and wanted <= set(key):
+                    merged.merge(histogram)
+        return merged
+
+    def snapshot(self) -> Tuple[Dict[MetricKey, float], Dict[MetricKey, Histogram]]:
+        with self._lock:
+            return dict(self.counters), {key: histogram.copy() for key, histogram in self.histograms.items()}
+
+    def drain(self) -> Tuple[Dict[MetricKey, float], Dict[MetricKey, Histogram]]:
+        """Returns everything recorded so far and resets the registry."""
+        with self._lock:
+            counters, histograms = self.counters, self.histograms
+            self.counters, self.histograms = {}, {}
+        return counters, histograms
+
+    def merge(self, data: Tuple[Dict[MetricKey, float], Dict[MetricKey, Histogram]]) -> None:
+        counters, histograms = data
+        with self._lock:
+            for key, value in counters.items():
+                self.counters[key] = self.counters.get(key, 0.0) + value
+            for key, histogram in histograms.items():
+                if key in self.histograms:
+                    self.histograms[key].merge(histogram)
+                else:
+                    self.histograms[key] = histogram.copy()
+
+    def render_prometheus(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        counters, histograms = self.snapshot()
+        names = sorted({name for name, _ in counters} | {name for name, _ in histograms})
+        lines: List[str] = []
+        for name in names:
+            kind, help_text = METRIC_DEFINITIONS.get(name, ("untyped", ""))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            if name in {metric for metric, _ in histograms}:
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, labels), histogram in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_number(bound)))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+            else:
+                lines.append(f"# TYPE {name} {kind}")
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, path: str = DEFAULT_METRICS_FILE) -> None:
+        """
+        Writes the metrics for the node_exporter textfile collector, atomically so a
+        scrape never sees a half-written file.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(self.render_prometheus())
+        os.replace(temp_path, path)
+
+    def summary_table(self, baseline: Optional[Tuple[Dict[MetricKey, float], Dict[MetricKey, Histogram]]] = None) -> str:
+        """
+        A plain-text table of every histogram (count, total, p50, p95, max bucket) and
+        counter, optionally only for what was recorded since baseline (see snapshot()).
+        """
+        base_counters, base_histograms = baseline or ({}, {})
+        counters, histograms = self.snapshot()
+        lines = [f"{'timer':<44}{'count':>8}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}"]
+        for key, histogram in sorted(histograms.items()):
+            delta = histogram.minus(base_histograms.get(key))
+            if not delta.count:
+                continue
+            label = key[0] + _format_labels(key[1])
+            p50, p95 = delta.quantile(0.5), delta.quantile(0.95)
+            lines.append(f"{label:<44}{delta.count:>8}{delta.sum:>10.2f}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}")
+        lines.append(f"{'counter':<44}{'value':>8}")
+        for key, value in sorted(counters.items()):
+            delta = value - base_counters.get(key, 0.0)
+            if delta:
+                lines.append(f"{key[0] + _format_labels(key[1]):<44}{_format_number(delta):>8}")
+        return "\n".join(lines)
+
+
+class ThroughputMeter:
+    """
+    Rate of a growing count over a sliding time window, for live rate and ETA
+    displays. update() and the readers may run on different threads.
+    """
+
+    def __init__(self, window_seconds: float = 30.0):
+        self.window_seconds = window_seconds
+        self._samples: List[Tuple[float, int]] = []
+        self._lock = threading.Lock()
+
+    def update(self, count: int, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._samples.append((now, count))
+            # Keep one sample older than the window as the baseline of the rate.
+            while len(self._samples) > 2 and self._samples[1][0] < now - self.window_seconds:
+                self._samples.pop(0)
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Counts per second over the window; decays while no progress arrives."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if len(self._samples) < 2:
+                return 0.0
+            (first_time, first_count), (_, last_count) = self._samples[0], self._samples[-1]
+        elapsed = now - first_time
+        return (last_count - first_count) / elapsed if elapsed > 0 else 0.0
+
+    def eta(self, remaining: int, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until remaining more counts at the current rate, or None if unknown."""
+        rate = self.rate(now)
+        return remaining / rate if rate > 0 else None
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+REGISTRY = MetricsRegistry()
+
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Metrics request: {format % args}")
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serves /metrics for Prometheus from a daemon thread.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,67 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Hashable, Optional, Tuple
+from utils import metrics
+
+DEFAULT_MAX_REMEMBERED = 100000
+
+
+class SingleFlight:
+    """
+    Coalesces work on the same key into one Future.
+
+    The first caller for a key starts the work; callers arriving while it runs get
+    the same Future and so the same result (or exception). Successful results are
+    remembered (up to max_remembered keys, oldest dropped first) so later callers
+    are served without starting the work again; failed or cancelled work is
+    forgotten so the next caller retries it.
+    """
+
+    def __init__(self, max_remembered: int = DEFAULT_MAX_REMEMBERED):
+        self.max_remembered = max_remembered
+        self._flights: "OrderedDict[Hashable, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, start: Callable[[], Future]) -> Tuple[Future, bool]:
+        """
+        Returns the Future for key, calling start() only if there is none.
+
+        Returns:
+            Tuple[Future, bool]: The Future and whether it was shared with an earlier caller.
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                metrics.inc("singleflight_total", result="shared")
+                return future, True
+            future = start()
+            self._flights[key] = future
+        metrics.inc("singleflight_total", result="leader")
+        # Outside the lock: an already finished future runs the callback right away.
+        future.add_done_callback(lambda done, key=key: self._finished(key, done))
+        return future, False
+
+    def join(self, key: Hashable) -> Optional[Future]:
+        """
+        Returns the running or remembered Future for key, or None if there is none.
+        """
+        with self._lock:
+            future = self._flights.get(key)
+        if future is not None:
+            metrics.inc("singleflight_total", result="shared")
+        return future
+
+    def _finished(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._flights.get(key) is not future:
+                return
+            if future.cancelled() or future.exception() is not None:
+                del self._flights[key]
+                return
+            self._flights.move_to_end(key)
+            while len(self._flights) > self.max_remembered:
+                oldest_key, oldest = next(iter(self._flights.items()))
+                if not oldest.done():
+                    break
+                del self._flights[oldest_key]
@@ -0,0 +1,322 @@
+"""
+End-to-end benchmark of the ingestion pipeline on a synthetic receipt corpus.
+
+Generates N receipts (PNG, JPEG and PDF of varying sizes), then times each stage:
+discovery, content hashing (cold, then warm from the cache), perceptual
+hashing, extraction against a local stub backend, full
+ingest into SQLite, Treeview load, stats and reports, data export and file export.
+Timings and peak memory are compared against tests/benchmark_baseline.json, and
+the script exits with status 1 if a stage regressed beyond the thresholds.
+
+    python tests/benchmark_pipeline.py --files 500
+    python tests/benchmark_pipeline.py --files 500 --update-baseline
+    python tests/benchmark_pipeline.py --latency-ms 200 --workers 4 --no-compare
+
+Baselines are machine-specific: record one on the machine that runs the comparison.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+# Keep the benchmark's own logging out of the timings and the app log.
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_PATH", os.path.join(tempfile.mkdtemp(prefix="expense_benchmark_logs_"), "app.log"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PIL import Image, ImageDraw
+
+from core.data_exporter import export_records
+from core.dedupe import compute_hashes
+from core.exporter import FileExporter
+from core.processor import RunSummary, TieredExtractor, get_image_data
+from core.renamer import FileOrganizer
+from core.reports import REPORT_TYPES, ReportEngine
+from utils.hashing import ContentHasher
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+DEFAULT_THRESHOLDS = {
+    # A stage regresses when it is this much slower than the baseline...
+    "max_slowdown": 1.25,
+    # ...and slower by at least this many seconds, so tiny stages don't flap.
+    "min_seconds": 0.05,
+    "max_rss_growth": 1.5,
+}
+PAGE_SIZES = ((620, 877), (1240, 1754), (1654, 2339))
+CATEGORIES = ("Food", "Travel", "Office", "Shopping", "Medical", "Other")
+
+# Answers of the stub backend by file name, filled in by make_corpus.
+STUB_ANSWERS = {}
+STUB_LATENCY_SECONDS = 0.0
+
+
+class StubAnalyzer:
+    """Stands in for GeminiImageAnalyzer, answering from the corpus manifest."""
+
+    def get_file_analysis(self, question, file_path, timeout=None):
+        if STUB_LATENCY_SECONDS:
+            time.sleep(STUB_LATENCY_SECONDS)
+        answer = STUB_ANSWERS.get(os.path.basename(file_path))
+        return json.dumps(answer) if answer else "Error: unknown file"
+
+
+def make_corpus(directory, count, seed=42):
+    """Writes count synthetic receipts and records the stub's answer for each."""
+    rnd = random.Random(seed)
+    for i in range(count):
+        width, height = rnd.choice(PAGE_SIZES)
+        amount = round(rnd.uniform(10, 25000), 2)
+        day, month = rnd.randint(1, 28), rnd.randint(1, 12)
+        img = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(img)
+        draw.text((40, 30), f"MERCHANT {rnd.randint(1, 500):03d}   RECEIPT #{i:06d}", fill="black")
+        draw.text((40, 60), f"DATE {day:02d}/{month:02d}/2024", fill="black")
+        for line in range(rnd.randint(5, 40)):
+            draw.text((40, 100 + line * 22), f"ITEM {rnd.randint(1, 999):03d} ....... {rnd.uniform(1, 999):.2f}", fill="black")
+        draw.text((40, height - 80), f"TOTAL RS {amount:,.2f}", fill="black")
+        # Noise blocks keep the receipts perceptually distinct.
+        for _ in range(12):
+            x, y = rnd.randint(0, width - 60), rnd.randint(0, height - 60)
+            draw.rectangle((x, y, x + rnd.randint(10, 60), y + rnd.randint(10, 60)), fill=(rnd.randint(0, 255),) * 3)
+
+        extension = rnd.choice((".png", ".jpg", ".jpg", ".pdf"))
+        name = f"receipt_{i:06d}{extension}"
+        if extension == ".pdf":
+            img.save(os.path.join(directory, name), "PDF", resolution=150)
+        else:
+            img.save(os.path.join(directory, name), quality=85)
+        STUB_ANSWERS[name] = {
+            "date": f"{day:02d}_{month:02d}_2024",
+            "amount": f"₹{amount:,.2f}",
+            "category": rnd.choice(CATEGORIES),
+            "tags": ["benchmark", extension.lstrip(".")],
+        }
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class _FakeWidget:
+    def __init__(self, value=""):
+        self.value = value
+
+    def configure(self, **kwargs):
+        pass
+
+    def get(self):
+        return self.value
+
+
+class _FakeTree:
+    """Records Treeview calls when no display is available."""
+
+    def __init__(self):
+        self.items = {}
+
+    def get_children(self, item=""):
+        return tuple(self.items)
+
+    def exists(self, item):
+        return item in self.items
+
+    def delete(self, *items):
+        self.items.clear()
+
+    def insert(self, parent, index, iid=None, values=(), tags=()):
+        iid = iid if iid is not None else len(self.items)
+        self.items[iid] = values
+        return iid
+
+
+def make_ui_stand_in(db_path):
+    """
+    An object with just enough of ImageAnalyzerUI to run its data loading and stats
+    methods unchanged, on a real Treeview when a display is available.
+    """
+    import logging
+    from UI.tk_UI import ALL_CATEGORIES_LABEL, ALL_TAGS_LABEL, ImageAnalyzerUI
+    from utils.db_manager import DEFAULT_SORT
+
+    root = None
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        root = tk.Tk()
+        root.withdraw()
+        tree = ttk.Treeview(root, columns=("id", "amount", "date", "original_path", "rename_name", "category", "tags"))
+    except Exception:
+        tree = _FakeTree()
+
+    ui = SimpleNamespace(
+        tree=tree, root=root, db_path=db_path, logger=logging.getLogger("benchmark"),
+        total_records_label=_FakeWidget(), total_amount_label=_FakeWidget(), date_range_label=_FakeWidget(),
+        category_filter=_FakeWidget(ALL_CATEGORIES_LABEL), tag_filter=_FakeWidget(ALL_TAGS_LABEL),
+        sort_key=DEFAULT_SORT, sort_descending=True, page_after=None, pages_exhausted=True, page_pending=False,
+        stats={}, columnar_cache=True, snapshot=None,
+    )
+    for name in ("update_stats", "reset_stats", "render_stats", "load_data_from_db",
+                 "current_filters", "refresh_filter_choices", "load_next_page", "current_snapshot"):
+        method = getattr(ImageAnalyzerUI, name)
+        setattr(ui, name, lambda *args, _method=method: _method(ui, *args))
+    return ui, "ttk" if root is not None else "fake"
+
+
+def run_stages(args, workdir):
+    corpus = os.path.join(workdir, "corpus")
+    db_path = os.path.join(workdir, "DB", "image_data.db")
+    os.makedirs(corpus)
+    results = {}
+
+    def stage(name, func, note=None):
+        started = time.perf_counter()
+        value = func()
+        seconds = time.perf_counter() - started
+        results[name] = {"seconds": round(seconds, 4), "peak_rss_mb": peak_rss_mb()}
+        if note:
+            results[name]["note"] = note(value) if callable(note) else note
+        print(f"  {name:<16}{seconds:>9.3f} s")
+        return value
+
+    stage("corpus", lambda: make_corpus(corpus, args.files), note=f"{args.files} receipts")
+    files = stage("discovery", lambda: FileOrganizer(corpus).file_list)
+    hash_db = os.path.join(workdir, "hashes.db")
+    stage("content_hash", lambda: ContentHasher(hash_db).hash_files(files))
+    stage("content_rehash", lambda: ContentHasher(hash_db).hash_files(files), note="unchanged files, stat only")
+    stage("hashing", lambda: compute_hashes(files),
+          note=lambda hashes: f"{sum(1 for value in hashes.values() if value is not None)} of {len(hashes)} hashed")
+
+    def extract_all():
+        extractor = TieredExtractor(analyzer_factory=StubAnalyzer, use_ocr=False)
+        return sum(1 for path in files if extractor.extract(path)[0])
+    stage("extraction", extract_all, note=lambda count: f"{count} extracted")
+
+    def ingest():
+        summary = RunSummary()
+        for _ in get_image_data(corpus, db_path, resume=False, summary=summary, workers=args.workers,
+                                metrics_file=None, analyzer_factory=StubAnalyzer, use_ocr=False):
+            pass
+        return summary
+    stage("ingest", ingest, note=lambda summary: f"{summary.succeeded} saved, {summary.failed} failed, "
+                                                 f"{summary.duplicates} duplicates")
+
+    ui, tree_kind = make_ui_stand_in(db_path)
+    stage("treeview_load", lambda: ui.load_data_from_db(db_path), note=f"{tree_kind} Treeview, first page")
+    stage("stats", lambda: [ui.update_stats() for _ in range(10)], note="10 refreshes, columnar snapshot")
+    ui.columnar_cache = False
+    stage("stats_sql", lambda: [ui.update_stats() for _ in range(10)], note="10 refreshes, SQL")
+    stage("reports", lambda: [ReportEngine(db_path).get_report(report_type) for report_type in REPORT_TYPES])
+    if ui.root is not None:
+        ui.root.destroy()
+
+    stage("export_data", lambda: export_records(db_path, os.path.join(workdir, "export.csv")),
+          note=lambda rows: f"{rows} rows")
+    jobs = [(path, f"{i:05d}_{os.path.basename(path)}") for i, path in enumerate(files)]
+    stage("export_files", lambda: FileExporter(os.path.join(workdir, "export")).export(jobs),
+          note=lambda summary: f"{summary['linked']} linked, {summary['copied']} copied")
+    return results
+
+
+def compare(results, baseline):
+    thresholds = {**DEFAULT_THRESHOLDS, **baseline.get("thresholds", {})}
+    regressions = []
+    print(f"\n{'stage':<16}{'seconds':>10}{'baseline':>10}{'ratio':>8}  status")
+    for name, result in results.items():
+        base = baseline.get("stages", {}).get(name)
+        if name == "corpus":
+            # Generating the corpus is setup, not pipeline code.
+            continue
+        if not base:
+            print(f"{name:<16}{result['seconds']:>10.3f}{'-':>10}{'-':>8}  new")
+            continue
+        ratio = result["seconds"] / base["seconds"] if base["seconds"] else 1.0
+        status = "ok"
+        if ratio > thresholds["max_slowdown"] and result["seconds"] - base["seconds"] > thresholds["min_seconds"]:
+            status = "SLOWER"
+            regressions.append(f"{name}: {result['seconds']:.3f} s vs {base['seconds']:.3f} s")
+        elif ratio < 1 / thresholds["max_slowdown"]:
+            status = "faster"
+        print(f"{name:<16}{result['seconds']:>10.3f}{base['seconds']:>10.3f}{ratio:>8.2f}  {status}")
+
+    base_rss = max((stage.get("peak_rss_mb") or 0 for stage in baseline.get("stages", {}).values()), default=0)
+    rss = max((stage.get("peak_rss_mb") or 0 for stage in results.values()), default=0)
+    if base_rss and rss > base_rss * thresholds["max_rss_growth"]:
+        regressions.append(f"peak RSS: {rss} MB vs {base_rss} MB")
+    print(f"peak RSS {rss} MB (baseline {base_rss} MB)")
+    return regressions
+
+
+def main():
+    global STUB_LATENCY_SECONDS
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200, help="Receipts in the synthetic corpus")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated model latency per request")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes for the ingest stage")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Record these results as the new baseline")
+    parser.add_argument("--no-compare", action="store_true", help="Only print the timings")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+    STUB_LATENCY_SECONDS = args.latency_ms / 1000.0
+
+    workdir = tempfile.mkdtemp(prefix="expense_benchmark_")
+    cwd = os.getcwd()
+    try:
+        # The pipeline writes outputs/failed relative to the working directory.
+        os.chdir(workdir)
+        print(f"Benchmarking {args.files} receipts in {workdir}")
+        results = run_stages(args, workdir)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "files": args.files,
+        "latency_ms": args.latency_ms,
+        "workers": args.workers,
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "stages": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        report["thresholds"] = DEFAULT_THRESHOLDS
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if args.no_compare or not os.path.exists(args.baseline):
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if (baseline.get("files"), baseline.get("latency_ms"), baseline.get("workers")) != (args.files, args.latency_ms, args.workers):
+        print(f"Baseline was recorded with --files {baseline.get('files')} --latency-ms {baseline.get('latency_ms')} "
+              f"--workers {baseline.get('workers')}; not comparing.")
+        return 0
+    regressions = compare(results, baseline)
+    if regressions:
+        print("Regressions:\n  " + "\n  ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
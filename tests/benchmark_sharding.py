@@ -0,0 +1,75 @@
+"""
+Throughput of the CPU-bound ingestion stages versus worker count.
+
+Generates a synthetic corpus of receipt-sized images and times perceptual hashing
+(decode, resize, hash) in this process's thread pool and in process pools of
+1, 2, 4, ... workers up to the number of cores.
+
+    python tests/benchmark_sharding.py --files 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Log outside the app's log file; worker processes inherit the setting.
+os.environ.setdefault("LOG_PATH", os.path.join(tempfile.mkdtemp(prefix="expense_benchmark_logs_"), "app.log"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PIL import Image, ImageDraw
+from core.dedupe import compute_hashes
+
+
+def make_corpus(directory, count, size=(1240, 1754)):
+    paths = []
+    for i in range(count):
+        rnd = random.Random(i)
+        img = Image.new("RGB", size, "white")
+        draw = ImageDraw.Draw(img)
+        for line in range(60):
+            y = 40 + line * 28
+            draw.text((60, y), f"ITEM {rnd.randint(1, 999):03d} ........ RS {rnd.randint(1, 9999)}.00", fill="black")
+        path = os.path.join(directory, f"receipt_{i:05d}.png")
+        img.save(path)
+        paths.append(path)
+    return paths
+
+
+def worker_counts():
+    counts, n = [], 1
+    while n < (os.cpu_count() or 1):
+        counts.append(n)
+        n *= 2
+    counts.append(os.cpu_count() or 1)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_corpus(directory, args.files)
+        print(f"{'mode':<18}{'workers':>8}{'seconds':>10}{'files/s':>10}")
+
+        started = time.perf_counter()
+        compute_hashes(paths)
+        elapsed = time.perf_counter() - started
+        print(f"{'threads':<18}{8:>8}{elapsed:>10.2f}{len(paths) / elapsed:>10.1f}")
+
+        for workers in worker_counts():
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Start the workers before timing.
+                list(executor.map(abs, range(workers)))
+                started = time.perf_counter()
+                compute_hashes(paths, executor=executor)
+                elapsed = time.perf_counter() - started
+            print(f"{'processes':<18}{workers:>8}{elapsed:>10.2f}{len(paths) / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Keep test runs out of the application's log file.
+os.environ["LOG_PATH"] = os.path.join(tempfile.mkdtemp(prefix="expense_tests_"), "app.log")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+# Imported only now: the import sets up the logger and needs src on the path.
+from utils.db_manager import DatabaseManager, ensure_schema, insert_records
+
+
+def _record(i, amount=10.0, date="2024-01-15", category="Food", tags='["work"]', raw_amount=None, currency="INR"):
+    """An ImageData row as insert_records takes it; raw_amount defaults to the amount as text."""
+    return (f"id{i:03d}", str(amount) if raw_amount is None else raw_amount, date, f"in/r{i}.png", f"r{i}",
+            category, tags, amount, currency, None, None)
+
+
+@pytest.fixture
+def record():
+    return _record
+
+
+@pytest.fixture
+def make_db(tmp_path):
+    """Adds records to tmp_path/<name>, creating the database first, and returns its path."""
+    def make(records=(), name="records.db"):
+        db_path = str(tmp_path / name)
+        with DatabaseManager(db_path) as cursor:
+            ensure_schema(cursor)
+            insert_records(cursor, records)
+        return db_path
+    return make
@@ -0,0 +1,90 @@
+import io
+import os
+import tarfile
+import zipfile
+from email.message import EmailMessage
+
+import pytest
+
+from utils.archives import (copy_to, is_member_path, iter_member_paths, local_file, member_path, path_exists,
+                            read_bytes, size_and_mtime, split_member_path)
+
+EXTENSIONS = (".png", ".pdf")
+
+
+@pytest.fixture
+def zip_path(tmp_path):
+    path = tmp_path / "march.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("scans/", b"")
+        zf.writestr("scans/r1.png", b"first")
+        zf.writestr("scans/notes.txt", b"skip me")
+        zf.writestr("bill!2.pdf", b"second")
+    return str(path)
+
+
+@pytest.mark.parametrize("path, parts", [
+    ("in/march.zip!scans/r1.png", ("in/march.zip", "scans/r1.png")),
+    ("in/Wow!/march.ZIP!r1.png", ("in/Wow!/march.ZIP", "r1.png")),
+    ("in/march.tar.gz!a!b.png", ("in/march.tar.gz", "a!b.png")),
+    ("in/inbox.mbox!12/2/invoice.pdf", ("in/inbox.mbox", "12/2/invoice.pdf")),
+    ("in/Wow!.png", None),
+    ("in/r1.png", None),
+])
+def test_split_member_path(path, parts):
+    assert split_member_path(path) == parts
+    assert is_member_path(path) is (parts is not None)
+
+
+def test_zip_members_are_listed_and_read_in_place(zip_path):
+    paths = list(iter_member_paths(zip_path, EXTENSIONS))
+    assert paths == [member_path(zip_path, "scans/r1.png"), member_path(zip_path, "bill!2.pdf")]
+    assert [read_bytes(path) for path in paths] == [b"first", b"second"]
+    assert size_and_mtime(paths[1]) == (6, os.stat(zip_path).st_mtime)
+    assert path_exists(paths[0])
+
+
+def test_missing_members_and_containers(zip_path, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_bytes(member_path(zip_path, "scans/r9.png"))
+    assert not path_exists(str(tmp_path / "april.zip!r1.png"))
+    assert list(iter_member_paths(str(tmp_path / "april.zip"), EXTENSIONS)) == []
+
+
+def test_tar_members(tmp_path):
+    path = str(tmp_path / "march.tar.gz")
+    with tarfile.open(path, "w:gz") as tf:
+        for name, data in [("b/r2.pdf", b"second"), ("a/r1.png", b"first")]:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    paths = list(iter_member_paths(path, EXTENSIONS))
+    # Archive order, not name order.
+    assert paths == [f"{path}!b/r2.pdf", f"{path}!a/r1.png"]
+    assert read_bytes(paths[1]) == b"first"
+
+
+def test_eml_attachments_are_members(tmp_path):
+    message = EmailMessage()
+    message["Subject"] = "March receipts"
+    message.set_content("See attached.")
+    message.add_attachment(b"%PDF-1 receipt", maintype="application", subtype="pdf", filename="inv/1.pdf")
+    path = tmp_path / "mail.eml"
+    path.write_bytes(message.as_bytes())
+
+    (attachment,) = iter_member_paths(str(path), EXTENSIONS)
+    container, member = split_member_path(attachment)
+    assert container == str(path) and member.endswith("/inv_1.pdf")
+    assert read_bytes(attachment) == b"%PDF-1 receipt"
+
+
+def test_local_file_and_copy_to_materialize_a_member(zip_path, tmp_path):
+    path = member_path(zip_path, "scans/r1.png")
+    with local_file(path) as on_disk:
+        assert on_disk.endswith(".png")
+        with open(on_disk, "rb") as f:
+            assert f.read() == b"first"
+    assert not os.path.exists(on_disk)
+
+    copy_to(path, str(tmp_path / "r1.png"))
+    assert (tmp_path / "r1.png").read_bytes() == b"first"
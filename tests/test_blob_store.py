@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from core.exporter import FileExporter
+from utils.blob_store import COMPRESSED_SUFFIX, BlobStore
+from utils.hashing import hash_file
+
+
+def make_file(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return str(path), hash_file(str(path))
+
+
+def test_put_stores_each_content_once(tmp_path):
+    store = BlobStore(str(tmp_path / "store"), compress=False)
+    source, digest = make_file(tmp_path / "in" / "r1.png", b"receipt one")
+
+    assert store.put(source, digest)
+    assert not store.put(source, digest)
+    assert digest in store
+    assert store.blob_path(digest) == os.path.join(str(tmp_path / "store"), digest[:2], digest[2:4], digest)
+    assert store.read(digest) == b"receipt one"
+
+
+def test_read_of_a_missing_blob_fails(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        BlobStore(str(tmp_path / "store")).read("00" * 32)
+
+
+def test_export_never_hard_links_blobs(tmp_path):
+    store = BlobStore(str(tmp_path / "store"), compress=False)
+    source, digest = make_file(tmp_path / "in" / "r1.png", b"receipt one")
+    store.put(source, digest)
+    os.remove(source)
+    export_dir = tmp_path / "export"
+
+    FileExporter(str(export_dir), use_hardlinks=True, blob_store=store).export([(source, "01_r1.png", digest)])
+
+    exported = export_dir / "01_r1.png"
+    assert os.stat(exported).st_ino != os.stat(store.blob_path(digest)).st_ino
+    exported.write_bytes(b"edited")
+    assert store.read(digest) == b"receipt one"
+
+
+def test_export_replaces_a_hard_linked_blob(tmp_path):
+    store = BlobStore(str(tmp_path / "store"), compress=False)
+    source, digest = make_file(tmp_path / "in" / "r1.png", b"receipt one")
+    store.put(source, digest)
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    # Left behind by an export that still hard-linked blobs.
+    os.link(store.blob_path(digest), export_dir / "01_r1.png")
+
+    summary = FileExporter(str(export_dir), blob_store=store).export([(source, "01_r1.png", digest)])
+
+    assert summary["skipped"] == 0
+    assert os.stat(export_dir / "01_r1.png").st_ino != os.stat(store.blob_path(digest)).st_ino
+
+
+def test_compressed_pdf_round_trip_and_export(tmp_path):
+    pytest.importorskip("zstandard")
+    store = BlobStore(str(tmp_path / "store"))
+    source, digest = make_file(tmp_path / "in" / "r1.pdf", b"%PDF-1.4 " + b"receipt " * 200)
+
+    store.put(source, digest)
+    assert store.blob_path(digest).endswith(COMPRESSED_SUFFIX)
+    assert os.path.getsize(store.blob_path(digest)) < os.path.getsize(source)
+    assert store.read(digest) == (tmp_path / "in" / "r1.pdf").read_bytes()
+
+    export_dir = tmp_path / "export"
+    jobs = [(source, "01_r1.pdf", digest)]
+    assert FileExporter(str(export_dir), blob_store=store).export(jobs)["copied"] == 1
+    assert (export_dir / "01_r1.pdf").read_bytes() == (tmp_path / "in" / "r1.pdf").read_bytes()
+    assert FileExporter(str(export_dir), blob_store=store).export(jobs)["skipped"] == 1
@@ -0,0 +1,23 @@
+import csv
+import importlib.util
+
+from core import data_exporter
+
+
+def test_csv_export_writes_every_row_in_chunks(tmp_path, make_db, record):
+    db_path = make_db([record(i, float(i), f"2024-01-{i % 28 + 1:02d}", raw_amount=f"{i}.00") for i in range(25)])
+    output = tmp_path / "records.csv"
+
+    assert data_exporter.export_records(db_path, str(output), chunk_size=7) == 25
+
+    with open(output, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert tuple(rows[0]) == data_exporter.EXPORT_COLUMNS
+    assert len(rows) == 26
+
+
+def test_parquet_is_only_offered_with_pyarrow(monkeypatch):
+    real_find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec",
+                        lambda name, *args: None if name == "pyarrow" else real_find_spec(name, *args))
+    assert data_exporter.available_formats() == ("csv", "xlsx")
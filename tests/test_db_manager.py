@@ -0,0 +1,111 @@
+import sqlite3
+
+import pytest
+
+from utils.db_manager import (SORT_COLUMNS, clear_db_data, delete_records, fetch_records_page, filter_choices,
+                              record_filter, update_record)
+
+
+def count(db_path, category=None, tag=None):
+    where, params = record_filter(category, tag)
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM ImageData{where}", params).fetchone()[0]
+
+
+def test_schema_has_no_per_row_triggers(make_db):
+    db_path = make_db()
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall() == []
+
+
+def test_write_helpers_log_changed_rows(make_db, record):
+    db_path = make_db([record(i) for i in range(4)])
+    delete_records(db_path, ["id001"])
+    with sqlite3.connect(db_path) as conn:
+        assert [row for (row,) in conn.execute("SELECT row FROM ChangeLog ORDER BY seq")] == [1, 2, 3, 4, 2]
+
+
+def test_clear_leaves_one_reset_entry(make_db, record):
+    db_path = make_db([record(i) for i in range(4)])
+    clear_db_data(db_path)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT row FROM ChangeLog").fetchall() == [(None,)]
+
+
+def test_delete_removes_tag_index_rows(make_db, record):
+    db_path = make_db([record(i, tags='["work", "cab"]') for i in range(6)])
+    assert count(db_path, tag="cab") == 6
+
+    assert delete_records(db_path, ["id000", "id001"]) == 2
+
+    assert count(db_path, tag="cab") == 4
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM ImageTag WHERE image_id IN ('id000', 'id001')").fetchone()[0] == 0
+
+
+def test_clear_empties_the_tag_index(make_db, record):
+    db_path = make_db([record(i) for i in range(6)])
+    clear_db_data(db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM ImageTag").fetchone()[0] == 0
+    assert filter_choices(db_path) == ([], [])
+
+
+def test_delete_on_a_new_database_creates_the_schema(tmp_path):
+    db_path = str(tmp_path / "records.db")
+    assert delete_records(db_path, ["id000"]) == 0
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] > 0
+
+
+def test_update_record_reindexes_and_logs_the_row(make_db, record):
+    db_path = make_db([record(i) for i in range(3)])
+
+    assert update_record(db_path, "id001", {"category": "Travel", "tags": '["cab"]'}) == 1
+
+    assert count(db_path, category="Travel", tag="cab") == 1
+    assert count(db_path, tag="work") == 2
+    with sqlite3.connect(db_path) as conn:
+        assert [row for (row,) in conn.execute("SELECT row FROM ChangeLog ORDER BY seq")] == [1, 2, 3, 2]
+    assert update_record(db_path, "missing", {"amount": "20"}) == 0
+
+
+def test_update_record_rejects_other_columns(make_db, record):
+    db_path = make_db([record(0)])
+    with pytest.raises(ValueError):
+        update_record(db_path, "id000", {"id": "id999"})
+
+
+@pytest.fixture
+def tied_db(make_db, record):
+    # Long runs of equal sort values and NULLs, so page boundaries fall inside ties.
+    amounts = [5.0, None, 5.0, 2.0, 5.0, None, 5.0, 9.0, 2.0, 5.0, None]
+    dates = ["2024-01-15", "2024-01-15", None, "2024-01-14", "2024-01-15", "2024-01-16"] * 2
+    return make_db([record(i, amount, dates[i], category="Food" if i % 3 else "Travel",
+                           tags='["work", "cab"]' if i % 2 else '["work"]')
+                    for i, amount in enumerate(amounts)])
+
+
+@pytest.mark.parametrize("sort", ["amount", "date", "category"])
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("limit", [1, 2, 3])
+@pytest.mark.parametrize("tag", [None, "cab"])
+def test_keyset_pages_cover_ties_once_in_order(tied_db, sort, descending, limit, tag):
+    column = SORT_COLUMNS[sort]
+    direction = "DESC" if descending else "ASC"
+    where, params = record_filter(tag=tag)
+    with sqlite3.connect(tied_db) as conn:
+        expected = [row[0] for row in conn.execute(
+            f"SELECT id FROM ImageData{where} ORDER BY {column} {direction}, id {direction}", params)]
+
+        paged, after = [], None
+        while True:
+            page = fetch_records_page(conn.cursor(), sort, descending, after, tag=tag, limit=limit)
+            assert len(page) <= limit
+            if not page:
+                break
+            paged.extend(row[0] for row in page)
+            after = (page[-1][-1], page[-1][0])
+
+    assert paged == expected
@@ -0,0 +1,85 @@
+import os
+import shutil
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from PIL import Image
+
+from core.dedupe import REVIEW_TAG, MultiIndexHash, PerceptualIndex, compute_perceptual_hash, dhash, receipt_key
+from core.processor import RunSummary, get_image_data
+from utils.db_manager import parse_tags
+
+INPUTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inputs")
+# Two different R700 payments of the same day whose screenshots hash 4 bits apart.
+LOOK_ALIKES = ("03_28042025_R700.png", "04_28042025_R700.png")
+
+
+def test_dhash_bits_run_row_by_row_from_the_top_left():
+    # Brighter than the right neighbour only in the top row's first pixel.
+    image = Image.new("L", (4, 3), 0)
+    image.putpixel((0, 0), 255)
+    assert dhash(image, hash_size=3) == 0b100_000_000
+    # White on the left fading to black on the right sets every bit.
+    assert dhash(Image.linear_gradient("L").rotate(-90)) == (1 << 256) - 1
+
+
+def test_multi_index_hash_finds_everything_within_the_radius():
+    table = MultiIndexHash(max_distance=3, bits=64)
+    for i, value in enumerate((0, 0b111, 0b1111, (1 << 64) - 1)):
+        table.add(value, f"item{i}")
+    assert table.search(0) == [(0, "item0"), (3, "item1")]
+
+
+def test_look_alike_receipts_need_the_same_amount_and_day():
+    first, second = (compute_perceptual_hash(os.path.join(INPUTS, name)) for name in LOOK_ALIKES)
+    index = PerceptualIndex()
+    index.add(first, "03", receipt_key(700.0, "2025-04-28"))
+
+    assert index.find_similar(second) == "03"
+    assert index.find_duplicate(second, receipt_key(700.0, datetime(2025, 4, 28))) == "03"
+    assert index.find_duplicate(second, receipt_key(750.0, datetime(2025, 4, 28))) is None
+    assert index.find_duplicate(second, None) is None
+
+
+class NoAnalyzer:
+    """Both inputs are read from their file names; the model must not be needed."""
+
+    def get_file_analysis(self, question, file_path, timeout=None):
+        raise AssertionError(f"unexpected model call for {file_path}")
+
+
+@pytest.fixture
+def look_alikes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "in"
+    source.mkdir()
+    for name in LOOK_ALIKES:
+        shutil.copy(os.path.join(INPUTS, name), source / name)
+    return source
+
+
+def ingest(source, db_path, **options):
+    summary = RunSummary()
+    for _ in get_image_data(str(source), db_path, resume=False, summary=summary, metrics_file=None,
+                            analyzer_factory=NoAnalyzer, use_ocr=False, **options):
+        pass
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT original_path, tags FROM ImageData ORDER BY original_path").fetchall()
+    return summary, [(os.path.basename(path), parse_tags(tags)) for path, tags in rows]
+
+
+def test_look_alike_receipts_are_saved_and_tagged_for_review(look_alikes, tmp_path):
+    summary, rows = ingest(look_alikes, str(tmp_path / "db" / "records.db"))
+
+    assert [name for name, _ in rows] == list(LOOK_ALIKES)
+    assert sum(REVIEW_TAG in tags for _, tags in rows) == 1
+    assert (summary.succeeded, summary.duplicates, summary.flagged) == (2, 0, 1)
+
+
+def test_skipping_near_duplicates_is_opt_in(look_alikes, tmp_path):
+    summary, rows = ingest(look_alikes, str(tmp_path / "db" / "records.db"), skip_near_duplicates=True)
+
+    assert len(rows) == 1
+    assert (summary.succeeded, summary.duplicates) == (1, 1)
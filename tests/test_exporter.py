@@ -0,0 +1,87 @@
+import json
+import os
+
+from core.exporter import MANIFEST_NAME, FileExporter
+
+
+def make_file(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_export_copies_by_default(tmp_path):
+    source = make_file(tmp_path / "in" / "r1.png", b"receipt one")
+    export_dir = tmp_path / "export"
+
+    summary = FileExporter(str(export_dir)).export([(source, "01_r1.png")])
+
+    assert summary["copied"] + summary["linked"] == 1
+    exported = export_dir / "01_r1.png"
+    assert os.stat(exported).st_ino != os.stat(source).st_ino
+    exported.write_bytes(b"edited")
+    assert (tmp_path / "in" / "r1.png").read_bytes() == b"receipt one"
+
+
+def test_unchanged_export_is_skipped(tmp_path):
+    source = make_file(tmp_path / "in" / "r1.png", b"receipt one")
+    export_dir = str(tmp_path / "export")
+    FileExporter(export_dir).export([(source, "01_r1.png")])
+    os.remove(os.path.join(export_dir, MANIFEST_NAME))
+
+    assert FileExporter(export_dir).export([(source, "01_r1.png")])["skipped"] == 1
+
+
+def test_same_size_different_content_is_exported_again(tmp_path):
+    source = make_file(tmp_path / "in" / "r1.png", b"receipt one")
+    export_dir = tmp_path / "export"
+    FileExporter(str(export_dir)).export([(source, "01_r1.png")])
+    os.remove(export_dir / MANIFEST_NAME)
+
+    # Same size, different content and modification time.
+    (tmp_path / "in" / "r1.png").write_bytes(b"receipt two")
+    stat = os.stat(source)
+    os.utime(source, (stat.st_atime, stat.st_mtime + 10))
+
+    summary = FileExporter(str(export_dir)).export([(source, "01_r1.png")])
+
+    assert summary["skipped"] == 0
+    assert (export_dir / "01_r1.png").read_bytes() == b"receipt two"
+
+
+def test_resume_exports_the_current_selection(tmp_path):
+    first = make_file(tmp_path / "in" / "r1.png", b"receipt one")
+    second = make_file(tmp_path / "in" / "r2.png", b"receipt two")
+    third = make_file(tmp_path / "in" / "r3.png", b"receipt three")
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    # An interrupted export of an older selection, with r1 done.
+    manifest = {"status": "in_progress", "jobs": [[first, "01_r1.png"], [second, "02_r2.png"]], "done": ["01_r1.png"]}
+    (export_dir / MANIFEST_NAME).write_text(json.dumps(manifest))
+    make_file(export_dir / "01_r1.png", b"receipt one")
+
+    # r2 was deleted from the records since, r3 was added, and 01_ now names r3.
+    summary = FileExporter(str(export_dir)).export([(third, "01_r3.png"), (first, "02_r1.png")])
+
+    assert summary["failed"] == 0
+    assert (export_dir / "01_r3.png").read_bytes() == b"receipt three"
+    assert (export_dir / "02_r1.png").read_bytes() == b"receipt one"
+    assert not (export_dir / "02_r2.png").exists()
+    saved = json.loads((export_dir / MANIFEST_NAME).read_text())
+    assert saved["status"] == "complete"
+    assert sorted(job[1] for job in saved["jobs"]) == ["01_r3.png", "02_r1.png"]
+
+
+def test_done_file_of_a_different_job_is_not_trusted(tmp_path):
+    old = make_file(tmp_path / "in" / "old.png", b"old receipt")
+    new = make_file(tmp_path / "in" / "new.png", b"new receipt")
+    os.utime(new, (1700000000, 1700000000))
+    export_dir = tmp_path / "export"
+    FileExporter(str(export_dir)).export([(old, "01_receipt.png")])
+    manifest = json.loads((export_dir / MANIFEST_NAME).read_text())
+    manifest["status"] = "in_progress"
+    (export_dir / MANIFEST_NAME).write_text(json.dumps(manifest))
+
+    FileExporter(str(export_dir)).export([(new, "01_receipt.png")])
+
+    assert (export_dir / "01_receipt.png").read_bytes() == b"new receipt"
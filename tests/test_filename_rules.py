@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from core.filename_rules import FilenameRuleExtractor, rule_matches_model
+
+
+@pytest.fixture
+def defaults(tmp_path):
+    return FilenameRuleExtractor(str(tmp_path / "missing.json"))
+
+
+def write_config(tmp_path, config):
+    path = tmp_path / "filename_rules.json"
+    path.write_text(json.dumps(config))
+    return str(path)
+
+
+@pytest.mark.parametrize("file_name, rule, date, amount", [
+    ("02_18042025_R800.jpg", "index_ddmmyyyy_amount", "18_04_2025", "800"),
+    ("s1_20_01_2025_RS82.png", "prefix_dd_mm_yyyy_amount", "20_01_2025", "82"),
+    ("01_20_01_2025_RS82.5.pdf", "prefix_dd_mm_yyyy_amount", "20_01_2025", "82.5"),
+    ("5_1_2025_rs40.png", "prefix_dd_mm_yyyy_amount", "05_01_2025", "40"),
+])
+def test_default_rules_read_date_and_amount(defaults, file_name, rule, date, amount):
+    data = defaults.extract(f"in/{file_name}")
+    assert (data["rule"], data["date"], data["amount"]) == (rule, date, amount)
+    assert data["confidence"] == 0.95
+    assert data["category"] is None and data["tags"] is None
+
+
+@pytest.mark.parametrize("file_name", [
+    "IMG_20250120.jpg",           # no amount
+    "02_31042025_R800.jpg",       # no 31 April
+    "s1_20_01_2025_RS0.png",      # zero amount
+    "receipt_20_01_2025_RS82_copy.png",
+])
+def test_default_rules_leave_other_names_to_the_model(defaults, file_name):
+    assert defaults.extract(file_name) is None
+
+
+def test_rules_below_min_confidence_are_skipped(tmp_path):
+    config_path = write_config(tmp_path, {"min_confidence": 0.9, "rules": [
+        {"name": "loose", "pattern": r"^(?P<day>\d\d)(?P<month>\d\d)(?P<year>\d{4})_(?P<amount>\d+)$", "confidence": 0.5},
+        {"name": "strict", "pattern": r"^(?P<day>\d\d)(?P<month>\d\d)(?P<year>\d{4})_(?P<amount>\d+)$",
+         "confidence": 0.92, "category": "Travel", "tags": ["scanner"]},
+    ]})
+    data = FilenameRuleExtractor(config_path).extract("15012024_120.png")
+    assert (data["rule"], data["confidence"], data["category"], data["tags"]) == ("strict", 0.92, "Travel", ["scanner"])
+
+
+def test_disabled_config_matches_nothing(tmp_path):
+    extractor = FilenameRuleExtractor(write_config(tmp_path, {"enabled": False}))
+    assert extractor.extract("02_18042025_R800.jpg") is None
+
+
+@pytest.mark.parametrize("rate, draw, verify", [
+    (0.0, 0.0, False),
+    (0.05, 0.01, True),
+    (0.05, 0.5, False),
+    (1.0, 0.99, True),
+])
+def test_should_verify_samples_at_the_configured_rate(tmp_path, monkeypatch, rate, draw, verify):
+    extractor = FilenameRuleExtractor(write_config(tmp_path, {"verify_sample_rate": rate}))
+    monkeypatch.setattr("core.filename_rules.random.random", lambda: draw)
+    assert extractor.should_verify() is verify
+
+
+def test_rule_matches_model_compares_normalized_values():
+    rule = {"date": "18_04_2025", "amount": "800"}
+    assert rule_matches_model(rule, {"date": "2025-04-18", "amount": "₹800.00"})
+    assert not rule_matches_model(rule, {"date": "2025-04-18", "amount": "₹80"})
+    assert not rule_matches_model(rule, {"date": "19_04_2025", "amount": "800"})
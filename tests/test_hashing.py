@@ -0,0 +1,61 @@
+import hashlib
+import zipfile
+
+import pytest
+
+from utils import hashing
+from utils.hashing import ContentHasher, hash_file
+
+
+def blake2b(data):
+    return hashlib.blake2b(data, digest_size=hashing.DIGEST_SIZE).hexdigest()
+
+
+@pytest.mark.parametrize("size", [0, 10, hashing.CHUNK_SIZE + 7])
+def test_hash_file_is_the_blake2b_of_the_content(tmp_path, size):
+    path = tmp_path / "r1.png"
+    data = bytes(i % 251 for i in range(size))
+    path.write_bytes(data)
+    assert hash_file(str(path)) == blake2b(data)
+
+
+def test_large_files_hash_the_same_through_mmap(tmp_path, monkeypatch):
+    path = tmp_path / "r1.pdf"
+    data = b"receipt" * 1000
+    path.write_bytes(data)
+    monkeypatch.setattr(hashing, "MMAP_THRESHOLD", 1024)
+    assert hash_file(str(path)) == blake2b(data)
+
+
+def test_archive_members_are_hashed_from_their_content(tmp_path):
+    archive = tmp_path / "march.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("scans/r1.png", b"first")
+        zf.writestr("scans/r2.png", b"second")
+    assert hash_file(f"{archive}!scans/r1.png") == blake2b(b"first")
+    assert hash_file(f"{archive}!scans/r2.png") == blake2b(b"second")
+
+
+def test_hasher_only_reads_new_or_changed_files(tmp_path, monkeypatch):
+    hashed = []
+    original = hashing.hash_file
+    monkeypatch.setattr(hashing, "hash_file", lambda path: hashed.append(path) or original(path))
+    first, second = tmp_path / "r1.png", tmp_path / "r2.png"
+    first.write_bytes(b"first")
+    second.write_bytes(b"second")
+    hasher = ContentHasher(str(tmp_path / "records.db"))
+
+    assert hasher.hash_files([str(first), str(second)]) == {str(first): blake2b(b"first"), str(second): blake2b(b"second")}
+    assert len(hashed) == 2
+
+    second.write_bytes(b"second, edited")
+    digests = ContentHasher(str(tmp_path / "records.db")).hash_files([str(first), str(second)])
+    assert digests[str(second)] == blake2b(b"second, edited")
+    assert hashed[2:] == [str(second)]
+
+
+def test_hasher_returns_none_for_missing_files(tmp_path):
+    hasher = ContentHasher(str(tmp_path / "records.db"))
+    missing = str(tmp_path / "gone.png")
+    assert hasher.hash_files([missing]) == {missing: None}
+    assert hasher.hash_files([]) == {}
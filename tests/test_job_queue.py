@@ -0,0 +1,80 @@
+import socket
+import subprocess
+import sys
+
+from utils.job_queue import DONE, FAILED, IN_FLIGHT, PENDING, JobQueue
+
+
+def queue(tmp_path, **options):
+    return JobQueue(str(tmp_path / "jobs.db"), str(tmp_path / "in"), **options)
+
+
+def exited_worker_id():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return f"{socket.gethostname()}:{process.pid}:deadbeef"
+
+
+def test_claim_follows_priority_and_never_returns_a_job_twice(tmp_path):
+    jobs = queue(tmp_path)
+    jobs.reset(["c", "a", "b"], priorities=[3, 1, 2])
+
+    assert jobs.claim(2) == ["a", "b"]
+    assert jobs.claim(2) == ["c"]
+    assert jobs.claim(2) == []
+    assert jobs.counts()[IN_FLIGHT] == 3
+
+
+def test_complete_and_fail(tmp_path):
+    jobs = queue(tmp_path, max_attempts=2)
+    jobs.reset(["a", "b", "c"])
+    jobs.claim(3)
+
+    jobs.complete("a")
+    jobs.fail("b", "timeout")
+    jobs.fail("c", "bad date", permanent=True)
+    assert jobs.counts() == {PENDING: 1, IN_FLIGHT: 0, DONE: 1, FAILED: 1}
+
+    # The second failed attempt uses up max_attempts.
+    assert jobs.claim() == ["b"]
+    jobs.fail("b", "timeout")
+    assert jobs.counts() == {PENDING: 0, IN_FLIGHT: 0, DONE: 1, FAILED: 2}
+    assert not jobs.has_unfinished()
+
+
+def test_release_returns_jobs_without_counting_an_attempt(tmp_path):
+    jobs = queue(tmp_path, max_attempts=1)
+    jobs.reset(["a"])
+    jobs.claim()
+    assert jobs.release() == 1
+
+    assert jobs.claim() == ["a"]
+    jobs.fail("a", "timeout")
+    assert jobs.counts()[FAILED] == 1
+
+
+def test_resume_takes_over_the_jobs_of_an_exited_run(tmp_path):
+    crashed = queue(tmp_path, worker_id=exited_worker_id())
+    crashed.reset(["a", "b"])
+    assert crashed.claim(2) == ["a", "b"]
+
+    resumed = queue(tmp_path)
+    assert resumed.has_unfinished()
+    assert resumed.claim(2) == ["a", "b"]
+    assert resumed.leased_elsewhere() is None
+
+
+def test_jobs_leased_on_another_host_wait_for_the_lease(tmp_path):
+    other = queue(tmp_path, worker_id="elsewhere:1:cafe", lease_seconds=60)
+    other.reset(["a"])
+    other.claim()
+
+    jobs = queue(tmp_path)
+    assert jobs.claim() == []
+    assert 0 < jobs.leased_elsewhere() <= 60
+
+    expired = queue(tmp_path, worker_id="elsewhere:2:cafe", lease_seconds=-1)
+    expired.enqueue(["b"])
+    assert expired.claim() == ["b"]
+    assert jobs.leased_elsewhere() == 0
+    assert jobs.claim() == ["b"]
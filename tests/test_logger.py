@@ -0,0 +1,57 @@
+import logging
+import os
+import subprocess
+import sys
+import textwrap
+
+from utils import logger as app_logger
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Run as a script so the pool uses spawn, the start method on Windows, from a clean main module.
+SPAWN_SCRIPT = textwrap.dedent("""
+    import multiprocessing
+    import sys
+    from concurrent.futures import ProcessPoolExecutor
+    from pathlib import Path
+
+    import utils.logger as app_logger
+
+
+    def log_from_worker(message):
+        app_logger.setup_logger().info(message)
+        return multiprocessing.parent_process() is not None
+
+
+    if __name__ == "__main__":
+        multiprocessing.set_start_method("spawn")
+        app_logger.LOG_PATH = Path(sys.argv[1])
+        app_logger.setup_logger().info("main process record")
+        with ProcessPoolExecutor(max_workers=2, initializer=app_logger.forward_to_parent,
+                                 initargs=(app_logger.worker_log_queue(),)) as executor:
+            assert all(executor.map(log_from_worker, [f"worker record {i}" for i in range(4)]))
+""")
+
+
+def test_spawned_workers_log_through_the_main_process(tmp_path):
+    script = tmp_path / "spawn_logging.py"
+    script.write_text(SPAWN_SCRIPT)
+    log_path = tmp_path / "logs" / "app.log"
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    subprocess.run([sys.executable, str(script), str(log_path)], env=env, check=True, timeout=60)
+
+    text = log_path.read_text(encoding="utf-8")
+    assert "main process record" in text
+    for i in range(4):
+        assert f"worker record {i}" in text
+    # Only the main process opened the log: no rotated or per-worker files next to it.
+    assert [path.name for path in log_path.parent.iterdir()] == ["app.log"]
+
+
+def test_forwarded_records_are_formatted_for_pickling():
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "value %s", (object(),), None)
+    handler = app_logger._SharedQueueHandler()
+    handler.forwarding = True
+    prepared = handler.prepare(record)
+    assert prepared.args is None
+    assert prepared.getMessage().startswith("value <object object")
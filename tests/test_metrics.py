@@ -0,0 +1,77 @@
+import pytest
+
+from utils.metrics import Histogram, MetricsRegistry
+
+
+def histogram(*values, buckets=(1.0, 2.0, 4.0)):
+    h = Histogram(buckets)
+    for value in values:
+        h.observe(value)
+    return h
+
+
+def test_observations_on_a_bound_fall_in_that_bucket():
+    h = histogram(1.0, 2.5, 9.0)
+    assert h.counts == [1, 0, 1, 1]
+    assert (h.count, h.sum) == (3, 12.5)
+
+
+@pytest.mark.parametrize("q, expected", [(0.25, 1.0), (0.5, 1.5), (0.75, 2.0), (1.0, 4.0)])
+def test_quantile_interpolates_inside_the_bucket(q, expected):
+    assert histogram(0.5, 1.5, 1.5, 3.0).quantile(q) == pytest.approx(expected)
+
+
+def test_quantile_in_the_overflow_bucket_is_the_highest_bound():
+    assert histogram(0.5, 10.0, 20.0).quantile(0.9) == 4.0
+    assert Histogram().quantile(0.5) is None
+
+
+def test_minus_leaves_what_was_observed_since_the_baseline():
+    h = histogram(0.5, 3.0)
+    baseline = h.copy()
+    h.observe(1.5)
+    delta = h.minus(baseline)
+    assert (delta.counts, delta.count, delta.sum) == ([0, 1, 0, 0], 1, 1.5)
+
+
+def test_render_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.inc("jobs_total", outcome="succeeded")
+    registry.inc("jobs_total", outcome="succeeded")
+    registry.inc("jobs_total", outcome="failed")
+    registry.inc("custom_total", 0.5, path='in/"a"\\b')
+    registry.observe("db_commit_seconds", 0.003)
+    registry.observe("db_commit_seconds", 100.0)
+
+    lines = registry.render_prometheus().splitlines()
+
+    assert lines[:2] == ["# TYPE custom_total untyped", 'custom_total{path="in/\\"a\\"\\\\b"} 0.5']
+    assert "# TYPE db_commit_seconds histogram" in lines
+    assert 'db_commit_seconds_bucket{le="0.001"} 0' in lines
+    assert 'db_commit_seconds_bucket{le="0.005"} 1' in lines
+    assert 'db_commit_seconds_bucket{le="60"} 1' in lines
+    assert 'db_commit_seconds_bucket{le="+Inf"} 2' in lines
+    assert "db_commit_seconds_sum 100.003" in lines
+    assert "db_commit_seconds_count 2" in lines
+    assert lines[-4:] == [
+        "# HELP jobs_total Files finished by outcome (succeeded, failed, retried, duplicate).",
+        "# TYPE jobs_total counter",
+        'jobs_total{outcome="failed"} 1',
+        'jobs_total{outcome="succeeded"} 2',
+    ]
+
+
+def test_merge_adds_drained_worker_metrics():
+    coordinator, worker = MetricsRegistry(), MetricsRegistry()
+    coordinator.inc("jobs_total", outcome="succeeded")
+    coordinator.observe("api_request_seconds", 0.2, model="a")
+    worker.inc("jobs_total", outcome="succeeded")
+    worker.observe("api_request_seconds", 0.4, model="a")
+    worker.observe("api_request_seconds", 0.4, model="b")
+
+    coordinator.merge(worker.drain())
+
+    assert coordinator.counter_value("jobs_total") == 2
+    assert coordinator.histogram("api_request_seconds").count == 3
+    assert coordinator.histogram("api_request_seconds", model="a").sum == pytest.approx(0.6)
+    assert worker.snapshot() == ({}, {})
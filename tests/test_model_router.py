@@ -0,0 +1,51 @@
+import threading
+import time
+
+import pytest
+
+from core.model_router import (ECONOMY_MODEL_TIERS, MAX_ABANDONED_ATTEMPTS, MIN_LATENCY_SAMPLES, ModelRouter,
+                               ModelTier)
+
+
+def test_default_routing_keeps_every_file_on_one_model():
+    router = ModelRouter()
+    assert router.route("image/png", 10_000).name == "gemini-2.0-flash"
+    assert router.route("application/pdf", 10_000).name == "gemini-2.0-flash"
+
+
+def test_economy_routing_sends_small_images_to_the_cheaper_model():
+    router = ModelRouter(ECONOMY_MODEL_TIERS)
+    assert router.route("image/png", 10_000).name == "gemini-2.0-flash-lite"
+    assert router.route("image/png", 5 * 1024 * 1024).name == "gemini-2.0-flash"
+    assert router.route("application/pdf", 10_000).name == "gemini-2.0-flash"
+
+
+def test_degraded_tier_is_skipped():
+    router = ModelRouter(ECONOMY_MODEL_TIERS)
+    for _ in range(MIN_LATENCY_SAMPLES):
+        router.record("gemini-2.0-flash-lite", 30.0)
+    assert router.route("image/png", 10_000).name == "gemini-2.0-flash"
+
+
+def test_call_gives_up_at_the_deadline_and_counts_the_abandoned_attempt():
+    router = ModelRouter((ModelTier("slow", deadline=0.05),))
+    release = threading.Event()
+
+    with pytest.raises(TimeoutError):
+        router.call(router.tiers[0], lambda model, timeout: release.wait(1.0))
+    assert router.abandoned == 1
+
+    release.set()
+    deadline = time.monotonic() + 1.0
+    while router.abandoned and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert router.abandoned == 0
+
+
+def test_no_hedges_while_abandoned_attempts_run():
+    router = ModelRouter(hedge_budget=1.0)
+    router.requests = 100
+    router.abandoned = MAX_ABANDONED_ATTEMPTS
+    assert not router._take_hedge()
+    router.abandoned = 0
+    assert router._take_hedge()
@@ -0,0 +1,27 @@
+import sqlite3
+
+from core.normalizer import UNPARSED_CURRENCY, backfill_normalized_columns
+
+
+def raw_records(record, amounts):
+    """Rows as an old analysis left them: raw amount and date, nothing normalized."""
+    return [record(i, None, "15_01_2024", raw_amount=amount, currency=None) for i, amount in enumerate(amounts)]
+
+
+def test_backfill_normalizes_amounts_and_dates(make_db, record):
+    db_path = make_db(raw_records(record, ["RS82", "₹1,200.50", "$ 12"]))
+    assert backfill_normalized_columns(db_path) == 3
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT amount_value, currency, date FROM ImageData ORDER BY id").fetchall()
+    assert rows == [(82.0, "INR", "2024-01-15"), (1200.5, "INR", "2024-01-15"), (12.0, "USD", "2024-01-15")]
+
+
+def test_backfill_converges_on_unparsable_amounts(make_db, record):
+    db_path = make_db(raw_records(record, ["RS82", "illegible", ""]))
+    assert backfill_normalized_columns(db_path) == 3
+    assert backfill_normalized_columns(db_path) == 0
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT amount_value, currency FROM ImageData ORDER BY id").fetchall()
+    assert rows == [(82.0, "INR"), (None, UNPARSED_CURRENCY), (None, UNPARSED_CURRENCY)]
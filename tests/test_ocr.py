@@ -0,0 +1,32 @@
+import pytest
+
+from core.ocr import parse_receipt_text
+from core.processor import TieredExtractor
+from core.reports import UNCATEGORIZED
+
+
+@pytest.mark.parametrize("text, amount", [
+    ("Subtotal 1,100.00\nTax 100.00\nGrand Total ₹1,200.00\nTotal items 3\n12/03/2024", "₹1,200.00"),
+    ("TOTAL Rs. 450\nDate 12-03-2024", "Rs. 450"),
+    ("Total: 99.50\n12.03.2024", "99.50"),
+    ("Total amount 1,25,000\n12/03/2024", "1,25,000"),
+])
+def test_total_line_needs_a_currency_or_money_format(text, amount):
+    assert parse_receipt_text(text)[:2] == (amount, "12_03_2024")
+
+
+def test_item_count_is_not_a_total():
+    amount, _, score = parse_receipt_text("Total items 3\nTotal qty 12\nPaid by card\n12/03/2024")
+    assert (amount, score) == (None, 0.0)
+
+
+class NoAnalyzer:
+    def get_file_analysis(self, question, file_path, timeout=None):
+        raise AssertionError("the file name tier should have answered")
+
+
+def test_local_tiers_file_records_as_uncategorized(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    extractor = TieredExtractor(analyzer_factory=NoAnalyzer, use_ocr=False)
+    data, tier = extractor.extract(str(tmp_path / "02_18042025_R800.png"))
+    assert (tier, data["amount"], data["category"]) == ("filename", "800", UNCATEGORIZED)
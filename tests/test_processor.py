@@ -0,0 +1,138 @@
+import json
+import os
+import random
+import shutil
+import sqlite3
+
+import pytest
+from PIL import Image
+
+from core.processor import RunSummary, build_record, get_image_data
+from core.sharding import shard_of, shard_source_key
+from utils.job_queue import DONE, FAILED, JobQueue
+from test_job_queue import exited_worker_id
+
+ANSWERS = {
+    "r1.png": {"amount": "RS100", "date": "15_01_2024"},
+    "r1b.png": {"amount": "RS100", "date": "15_01_2024"},
+    "r2.png": {"amount": "RS250", "date": "16_01_2024"},
+    **{f"r{i}.png": {"amount": f"RS{i}0", "date": "17_01_2024"} for i in range(3, 9)},
+}
+
+
+class StubAnalyzer:
+    """Answers from ANSWERS; fails the files in failures, once for each entry."""
+
+    def __init__(self, failures=(), error=None):
+        self.failures = list(failures)
+        self.error = error
+        self.calls = []
+
+    def get_file_analysis(self, question, file_path, timeout=None):
+        name = os.path.basename(file_path)
+        self.calls.append(name)
+        if name in self.failures:
+            self.failures.remove(name)
+            if self.error:
+                return self.error
+            raise RuntimeError("quota exceeded")
+        return json.dumps(ANSWERS[name])
+
+
+@pytest.mark.parametrize("amount, date, rename_name", [
+    ("RS1234567.5", "15_01_2024", "15_01_2024_RS1234567.5"),
+    ("₹12,345.67", "2024-01-15", "15_01_2024_RS12345.67"),
+    ("RS82", "15/01/2024", "15_01_2024_RS82"),
+    ("illegible", "15_01_2024", "15_01_2024_RSillegible"),
+])
+def test_rename_name_keeps_the_whole_amount(amount, date, rename_name):
+    record = build_record("in/r1.png", {"amount": amount, "date": date}, None)
+    assert record[4] == rename_name
+
+
+def noise_image(path, seed, tweak=False):
+    rnd = random.Random(seed)
+    img = Image.new("L", (64, 64))
+    img.putdata([rnd.randrange(256) for _ in range(64 * 64)])
+    if tweak:
+        img.putpixel((0, 0), (img.getpixel((0, 0)) + 128) % 256)
+    img.save(path)
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    # Failed files are moved to outputs/failed relative to the working directory.
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "in"
+    source.mkdir()
+    noise_image(source / "r1.png", 1)
+    noise_image(source / "r2.png", 2)
+    return source
+
+
+def run(source, db_path, analyzer, resume=False, shard=(0, 1)):
+    summary = RunSummary()
+    for _ in get_image_data(str(source), db_path, resume=resume, summary=summary, metrics_file=None,
+                            analyzer_factory=lambda: analyzer, use_ocr=False, shard=shard):
+        pass
+    with sqlite3.connect(db_path) as conn:
+        names = sorted(os.path.basename(row[0]) for row in conn.execute("SELECT original_path FROM ImageData"))
+    return summary, names, JobQueue(db_path, shard_source_key(str(source), shard)).counts()
+
+
+def test_retried_file_is_not_a_duplicate_of_itself(corpus, tmp_path):
+    analyzer = StubAnalyzer(failures=["r1.png"])
+    summary, names, counts = run(corpus, str(tmp_path / "db" / "records.db"), analyzer)
+
+    assert analyzer.calls.count("r1.png") == 2
+    assert names == ["r1.png", "r2.png"]
+    assert (summary.succeeded, summary.duplicates, summary.retried) == (2, 0, 1)
+    assert counts[DONE] == 2
+
+
+def test_near_copy_of_a_failed_file_is_still_extracted(corpus, tmp_path):
+    noise_image(corpus / "r1b.png", 1, tweak=True)
+    analyzer = StubAnalyzer(failures=["r1.png"], error="Error: unreadable")
+    summary, names, counts = run(corpus, str(tmp_path / "db" / "records.db"), analyzer)
+
+    assert names == ["r1b.png", "r2.png"]
+    assert (summary.succeeded, summary.failed, summary.duplicates) == (2, 1, 0)
+    assert (counts[DONE], counts[FAILED]) == (2, 1)
+
+
+def test_identical_copies_share_one_extraction_and_each_get_a_row(corpus, tmp_path):
+    shutil.copyfile(corpus / "r1.png", corpus / "r1c.png")
+    analyzer = StubAnalyzer()
+    summary, names, counts = run(corpus, str(tmp_path / "db" / "records.db"), analyzer)
+
+    assert sorted(analyzer.calls) == ["r1.png", "r2.png"]
+    assert names == ["r1.png", "r1c.png", "r2.png"]
+    assert (summary.succeeded, summary.coalesced, summary.duplicates) == (3, 1, 0)
+    assert counts[DONE] == 3
+
+
+def test_resume_right_after_a_crash_finishes_the_crashed_run(corpus, tmp_path):
+    db_path = str(tmp_path / "db" / "records.db")
+    os.makedirs(os.path.dirname(db_path))
+    crashed = JobQueue(db_path, str(corpus), worker_id=exited_worker_id())
+    crashed.reset([str(corpus / "r1.png"), str(corpus / "r2.png")])
+    crashed.claim(2)
+
+    summary, names, counts = run(corpus, db_path, StubAnalyzer(), resume=True)
+
+    assert names == ["r1.png", "r2.png"]
+    assert counts[DONE] == 2
+    assert summary.elapsed < 30
+
+
+def test_sharded_ingest_on_a_new_database(corpus, tmp_path):
+    for i in range(3, 9):
+        noise_image(corpus / f"r{i}.png", i)
+    mine = sorted(path.name for path in corpus.iterdir() if shard_of(str(path), str(corpus), 2) == 0)
+
+    summary, names, counts = run(corpus, str(tmp_path / "db" / "records.db"), StubAnalyzer(), shard=(0, 2))
+
+    assert summary.error is None
+    assert 0 < len(mine) < 8
+    assert names == mine
+    assert counts[DONE] == len(mine)
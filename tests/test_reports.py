@@ -0,0 +1,38 @@
+import os
+
+from core.reports import ReportEngine
+from utils.db_manager import bulk_edit_records, delete_records, get_data_version
+
+
+def test_version_moves_once_per_write(make_db, record):
+    db_path = make_db([record(i) for i in range(50)])
+    version = get_data_version(db_path)
+
+    delete_records(db_path, [f"id{i:03d}" for i in range(10)])
+    assert get_data_version(db_path) == version + 1
+
+    bulk_edit_records(db_path, [f"id{i:03d}" for i in range(10, 40)], category="Travel")
+    assert get_data_version(db_path) == version + 2
+
+
+def test_reading_the_version_does_not_write(tmp_path, make_db, record):
+    missing = str(tmp_path / "missing.db")
+    assert get_data_version(missing) == -1
+    assert not os.path.exists(missing)
+
+    db_path = make_db([record(1)])
+    before = os.stat(db_path).st_mtime_ns
+    get_data_version(db_path)
+    assert os.stat(db_path).st_mtime_ns == before
+
+
+def test_reports_follow_writes(make_db, record):
+    db_path = make_db([record(1, 10.0, category="Food"), record(2, 30.0, category="Travel")])
+    engine = ReportEngine(db_path)
+    assert {row["category"]: row["total"] for row in engine.get_report("category")} == {"Food": 10.0, "Travel": 30.0}
+
+    bulk_edit_records(db_path, ["id001"], category="Travel")
+    assert {row["category"]: row["total"] for row in engine.get_report("category")} == {"Travel": 40.0}
+
+    delete_records(db_path, ["id002"])
+    assert engine.get_report("monthly")[0]["total"] == 10.0
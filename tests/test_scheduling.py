@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from core.scheduling import ExtractionTimings, dispatch_priorities
+
+
+@pytest.fixture
+def files(tmp_path):
+    """name -> path of files with distinct sizes and modification times."""
+    made = {}
+    for name, size, mtime in [("big.png", 3000, 100), ("small.jpg", 10, 300), ("doc.pdf", 500, 200)]:
+        path = tmp_path / name
+        path.write_bytes(b"x" * size)
+        os.utime(path, ns=(mtime * 10**9, mtime * 10**9))
+        made[name] = str(path)
+    made["gone.png"] = str(tmp_path / "gone.png")
+    return made
+
+
+def dispatched(files, order, timings=None):
+    paths = list(files.values())
+    priorities = dispatch_priorities(paths, order, timings)
+    return [os.path.basename(path) for _, path in sorted(zip(priorities, paths))]
+
+
+@pytest.mark.parametrize("order, expected", [
+    ("walk", ["big.png", "small.jpg", "doc.pdf", "gone.png"]),
+    ("smallest", ["small.jpg", "doc.pdf", "big.png", "gone.png"]),
+    ("newest", ["small.jpg", "doc.pdf", "big.png", "gone.png"]),
+    ("fastest", ["small.jpg", "doc.pdf", "big.png", "gone.png"]),
+])
+def test_dispatch_orders(files, order, expected):
+    assert dispatched(files, order) == expected
+
+
+def test_fastest_uses_learned_timings(files, tmp_path):
+    timings = ExtractionTimings(str(tmp_path / "records.db"))
+    timings.record(files["doc.pdf"], 0.5)
+    timings.record(files["big.png"], 9.0)
+    timings.save()
+
+    # Reloaded from the database; no JPEG was timed, so small.jpg is guessed.
+    assert dispatched(files, "fastest", ExtractionTimings(str(tmp_path / "records.db"))) == \
+        ["doc.pdf", "small.jpg", "big.png", "gone.png"]
+
+
+def test_estimate_falls_back_to_the_nearest_timed_size(files, tmp_path):
+    timings = ExtractionTimings(str(tmp_path / "records.db"))
+    timings.record(files["doc.pdf"], 4.0)
+    timings.record(files["doc.pdf"], 9.0)
+
+    assert timings.estimate("other.pdf", 500) == pytest.approx(5.0)
+    assert timings.estimate("huge.pdf", 50 * 1024 * 1024) == pytest.approx(5.0)
+
+
+def test_unknown_order_is_rejected(files):
+    with pytest.raises(ValueError):
+        dispatch_priorities(list(files.values()), "largest")
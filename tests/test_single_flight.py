@@ -0,0 +1,60 @@
+from concurrent.futures import Future
+
+from utils.single_flight import SingleFlight
+
+
+def starter(calls):
+    def start():
+        future = Future()
+        calls.append(future)
+        return future
+    return start
+
+
+def test_callers_share_a_running_and_a_finished_flight():
+    flights = SingleFlight()
+    calls = []
+
+    first, shared = flights.submit("h1", starter(calls))
+    assert not shared
+    assert flights.submit("h1", starter(calls)) == (first, True)
+    assert flights.join("h1") is first
+
+    first.set_result("row")
+    assert flights.join("h1") is first
+    assert flights.submit("h1", starter(calls)) == (first, True)
+    assert len(calls) == 1
+    assert flights.join("h2") is None
+
+
+def test_failed_and_cancelled_flights_are_forgotten():
+    flights = SingleFlight()
+    calls = []
+
+    failed, _ = flights.submit("h1", starter(calls))
+    failed.set_exception(ValueError("bad date"))
+    assert flights.join("h1") is None
+    retried, shared = flights.submit("h1", starter(calls))
+    assert retried is not failed and not shared
+
+    cancelled, _ = flights.submit("h2", starter(calls))
+    cancelled.cancel()
+    assert flights.join("h2") is None
+    assert len(calls) == 3
+
+
+def test_only_finished_flights_are_dropped_past_the_limit():
+    flights = SingleFlight(max_remembered=1)
+    calls = []
+
+    running, _ = flights.submit("h1", starter(calls))
+    done, _ = flights.submit("h2", starter(calls))
+    done.set_result("row")
+    # The running flight is the oldest, so nothing can be dropped yet.
+    assert flights.join("h1") is running and flights.join("h2") is done
+
+    running.set_result("row")
+    newest, _ = flights.submit("h3", starter(calls))
+    newest.set_result("row")
+    assert flights.join("h1") is None and flights.join("h2") is None
+    assert flights.join("h3") is newest
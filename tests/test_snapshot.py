@@ -0,0 +1,36 @@
+import sqlite3
+
+from core.snapshot import ColumnarSnapshot
+from utils.db_manager import bulk_edit_records, clear_db_data, delete_records
+
+
+def test_incremental_refresh_matches_database(make_db, record):
+    db_path = make_db([record(i) for i in range(20)])
+    snapshot = ColumnarSnapshot(db_path)
+    assert snapshot.refresh() == 20
+
+    make_db([record(20, amount=5.0)])
+    delete_records(db_path, ["id003"])
+    bulk_edit_records(db_path, ["id004"], category="Travel")
+
+    assert snapshot.refresh() == 2
+    assert snapshot.refresh() == 0
+    assert snapshot.summary()["count"] == 20
+    assert snapshot.summary()["total"] == 195.0
+    assert snapshot.summary(snapshot.mask(category="travel"))["count"] == 1
+    with sqlite3.connect(db_path) as conn:
+        assert snapshot.rowids.tolist() == [row for (row,) in conn.execute("SELECT rowid FROM ImageData ORDER BY rowid")]
+
+
+def test_refresh_after_clear_reloads(make_db, record):
+    db_path = make_db([record(i) for i in range(20)])
+    snapshot = ColumnarSnapshot(db_path)
+    snapshot.refresh()
+
+    clear_db_data(db_path)
+    snapshot.refresh()
+    assert len(snapshot) == 0
+
+    make_db([record(1)])
+    snapshot.refresh()
+    assert snapshot.summary()["count"] == 1